@@ -4,25 +4,58 @@
 # Version 3.0 (the "License") available at https://www.gnu.org/licenses/agpl-3.0.en.html.
 # You may not use this file except in compliance with the License.
 
-from common import LineageClient as Lineage
+import time
+from typing import Any
+
+import httpx
+from common.lineage.lineage_object import Lineage
+from common.lineage.lineage_object import LineageAttirbute
 
 from app.config import ConfigClass
+from app.logger import logger
 
 
 class LineageClient:
+    """Create lineage in Atlas over one connection pool shared by all requests.
+
+    Lineage entities are built the same way as in the common LineageClient, but they are sent in bulk requests of up
+    to ATLAS_BULK_SIZE entities instead of opening a new connection for every lineage.
+    """
+
     def __init__(self):
-        self.client = Lineage(ConfigClass.ATLAS_API, ConfigClass.ATLAS_ADMIN, ConfigClass.ATLAS_PASSWD)
+        self.entity_type = ConfigClass.ATLAS_ENTITY_TYPE
+        self.bulk_size = ConfigClass.ATLAS_BULK_SIZE
+        self.client = httpx.AsyncClient(
+            base_url=ConfigClass.ATLAS_API,
+            auth=(ConfigClass.ATLAS_ADMIN, ConfigClass.ATLAS_PASSWD),
+            headers={'content-type': 'application/json'},
+            timeout=ConfigClass.ATLAS_TIMEOUT,
+            verify=False,
+        )
+
+    def build_lineage(
+        self, input_id, output_id, input_path, output_path, container_code, action_type, description
+    ) -> dict[str, Any]:
+        name = f'{container_code}:{action_type}:{input_path}:to:{output_path}@{time.time()}'
+        attributes = LineageAttirbute(name, self.entity_type, input_id, self.entity_type, output_id, description)
+        return Lineage('Process', attributes).json()
+
+    async def create_lineages(self, lineages: list[dict[str, Any]]) -> None:
+        """Create the lineage entities in Atlas using bulk requests."""
+
+        for start in range(0, len(lineages), self.bulk_size):
+            entities = lineages[start : start + self.bulk_size]
+            response = await self.client.post('/api/atlas/v2/entity/bulk', json={'entities': entities})
+            if response.status_code != 200:
+                raise Exception(f'Fail to create lineage in Atlas with error: {response.text}')
+            logger.info(f'Created {len(entities)} lineage entities in Atlas')
+
+    async def aclose(self) -> None:
+        await self.client.aclose()
 
     async def create_lineage(
         self, input_id, output_id, input_path, output_path, container_code, action_type, description
     ):
-        await self.client.create_lineage(
-            input_id=input_id,
-            output_id=output_id,
-            input_name=input_path,
-            output_name=output_path,
-            project_code=container_code,
-            pipeline_name=action_type,
-            entity_type=ConfigClass.ATLAS_ENTITY_TYPE,
-            description=description,
+        await self.create_lineages(
+            [self.build_lineage(input_id, output_id, input_path, output_path, container_code, action_type, description)]
         )
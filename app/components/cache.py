@@ -0,0 +1,105 @@
+# Copyright (C) 2022-Present Indoc Systems
+#
+# Licensed under the GNU AFFERO GENERAL PUBLIC LICENSE,
+# Version 3.0 (the "License") available at https://www.gnu.org/licenses/agpl-3.0.en.html.
+# You may not use this file except in compliance with the License.
+
+import asyncio
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable
+from collections.abc import Callable
+from collections.abc import Hashable
+from functools import partial
+from typing import Any
+
+from app.logger import logger
+
+
+class TTLCache:
+    """In-memory cache where every entry expires ttl seconds after it was set.
+
+    The least recently set entries are evicted once the cache holds more than max_size entries.
+    Concurrent misses of the same key in get_or_set share one computation of the value.
+    """
+
+    name = 'cache'
+
+    def __init__(self, ttl: float, max_size: int) -> None:
+        self.ttl = ttl
+        self.max_size = max_size
+
+        self._entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._pending: dict[Hashable, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def hit_ratio(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def __contains__(self, key: Hashable) -> bool:
+        entry = self._entries.get(key)
+        return entry is not None and entry[0] >= time.monotonic()
+
+    def get(self, key: Hashable) -> Any | None:
+        """Return cached value or None when there is no fresh entry."""
+
+        entry = self._entries.get(key)
+        if entry and entry[0] < time.monotonic():
+            del self._entries[key]
+            entry = None
+
+        if entry:
+            self.hits += 1
+        else:
+            self.misses += 1
+        logger.info(f'{self.name.capitalize()} {"hit" if entry else "miss"} for {key}, hit ratio {self.hit_ratio:.2f}')
+
+        return entry[1] if entry else None
+
+    def set(self, key: Hashable, value: Any) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    async def get_or_set(self, key: Hashable, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """Return cached value or compute it with factory and cache it, concurrent callers share one computation."""
+
+        value = self.get(key)
+        if value is not None:
+            return value
+
+        if key not in self._pending:
+            future = asyncio.ensure_future(factory())
+            future.add_done_callback(partial(self._settle, key))
+            self._pending[key] = future
+        return await asyncio.shield(self._pending[key])
+
+    def _settle(self, key: Hashable, future: asyncio.Future) -> None:
+        # the value is not cached if the key was invalidated while it was being computed
+        if self._pending.get(key) is not future:
+            return
+
+        del self._pending[key]
+        if not future.cancelled() and future.exception() is None:
+            self.set(key, future.result())
+
+    def invalidate(self, predicate: Callable[[Any], bool]) -> int:
+        """Remove entries with keys matching the predicate and return their number."""
+
+        for key in [key for key in self._pending if predicate(key)]:
+            del self._pending[key]
+
+        keys = [key for key in self._entries if predicate(key)]
+        for key in keys:
+            del self._entries[key]
+        return len(keys)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._pending.clear()
+        self.hits = 0
+        self.misses = 0
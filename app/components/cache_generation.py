@@ -0,0 +1,50 @@
+# Copyright (C) 2022-Present Indoc Systems
+#
+# Licensed under the GNU AFFERO GENERAL PUBLIC LICENSE,
+# Version 3.0 (the "License") available at https://www.gnu.org/licenses/agpl-3.0.en.html.
+# You may not use this file except in compliance with the License.
+
+from functools import lru_cache
+
+from redis.asyncio import Redis
+
+from app.components.redis_client import get_redis
+from app.logger import logger
+
+
+class CacheGenerations:
+    """Generation counters of cached project data kept in Redis, so they are shared by all worker processes.
+
+    Cache keys include the current generation of the project and zone. Uploads bump the generation, which makes the
+    entries cached by every worker unreachable, they are then evicted as they expire. When Redis is not available, no
+    generation is returned and the caller bypasses its cache.
+    """
+
+    key_prefix = 'bff-cli:cache-generation:'
+
+    def __init__(self, redis: Redis) -> None:
+        self.redis = redis
+
+    def get_key(self, project_code: str, zone: int) -> str:
+        return f'{self.key_prefix}{project_code}:{zone}'
+
+    async def get(self, project_code: str, zone: int) -> int | None:
+        try:
+            generation = await self.redis.get(self.get_key(project_code, zone))
+        except Exception:
+            logger.exception(f'Unable to get cache generation of "{project_code}" in zone {zone}')
+            return None
+        return int(generation) if generation else 0
+
+    async def bump(self, project_code: str, zone: int) -> None:
+        try:
+            generation = await self.redis.incr(self.get_key(project_code, zone))
+        except Exception:
+            logger.exception(f'Unable to bump cache generation of "{project_code}" in zone {zone}')
+            return
+        logger.info(f'Bumped cache generation of "{project_code}" in zone {zone} to {generation}')
+
+
+@lru_cache(1)
+def get_cache_generations() -> CacheGenerations:
+    return CacheGenerations(get_redis())
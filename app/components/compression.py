@@ -0,0 +1,158 @@
+# Copyright (C) 2022-Present Indoc Systems
+#
+# Licensed under the GNU AFFERO GENERAL PUBLIC LICENSE,
+# Version 3.0 (the "License") available at https://www.gnu.org/licenses/agpl-3.0.en.html.
+# You may not use this file except in compliance with the License.
+
+import zlib
+from functools import partial
+
+from opentelemetry import trace
+from starlette.datastructures import Headers
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp
+from starlette.types import Message
+from starlette.types import Receive
+from starlette.types import Scope
+from starlette.types import Send
+
+from app.logger import logger
+
+COMPRESSIBLE_MEDIA_TYPES = ('application/json', 'application/x-ndjson', 'text/')
+
+
+def negotiate_encoding(accept_encoding: str) -> str | None:
+    """Return the supported content encoding with the highest quality in the Accept-Encoding header."""
+
+    supported = ['gzip']
+    qualities = {}
+    for value in accept_encoding.split(','):
+        encoding, _, params = value.strip().partition(';')
+        quality = 1.0
+        if params.strip().startswith('q='):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        qualities[encoding.strip().lower()] = quality
+
+    candidates = [(qualities.get(encoding, qualities.get('*', 0.0)), encoding) for encoding in supported]
+    quality, encoding = max(candidates, key=lambda candidate: candidate[0])
+    return encoding if quality > 0 else None
+
+
+class GzipCompressor:
+    def __init__(self, level: int) -> None:
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+class CompressionResponder:
+    """Compress the body of one response, chunk by chunk for streaming responses.
+
+    Responses that are complete in the first body message are compressed only when they are at least minimum_size
+    bytes long. Streamed chunks are flushed as they are compressed, so the client receives each record right away.
+    Strong ETag of the uncompressed body is turned into a weak one, since the compressed bytes are different. A 304
+    response has no body to compress, so it gets the same weak ETag and Vary header as the compressed response would.
+    """
+
+    def __init__(self, encoding: str, minimum_size: int, level: int) -> None:
+        self.encoding = encoding
+        self.minimum_size = minimum_size
+        self.compressor = GzipCompressor(level)
+
+        self.start_message: Message | None = None
+        self.compressing: bool | None = None
+        self.uncompressed_size = 0
+        self.compressed_size = 0
+
+    def is_compressible(self, message: Message, headers: MutableHeaders) -> bool:
+        media_type = headers.get('content-type', '')
+        if 'content-encoding' in headers or not media_type.startswith(COMPRESSIBLE_MEDIA_TYPES):
+            return False
+
+        return message.get('more_body', False) or len(message.get('body', b'')) >= self.minimum_size
+
+    def record(self) -> None:
+        saved = self.uncompressed_size - self.compressed_size
+        span = trace.get_current_span()
+        span.set_attribute('http.response.uncompressed_size', self.uncompressed_size)
+        span.set_attribute('http.response.compressed_size', self.compressed_size)
+        span.set_attribute('http.response.compression_saved_bytes', saved)
+        logger.info(
+            f'Compressed response with {self.encoding} from {self.uncompressed_size} to {self.compressed_size} bytes, '
+            f'saved {saved} bytes'
+        )
+
+    def compress(self, message: Message) -> Message:
+        body = message.get('body', b'')
+        more_body = message.get('more_body', False)
+        compressed = self.compressor.compress(body) if body else b''
+        if not more_body:
+            compressed += self.compressor.finish()
+
+        self.uncompressed_size += len(body)
+        self.compressed_size += len(compressed)
+        if not more_body:
+            self.record()
+        return {'type': 'http.response.body', 'body': compressed, 'more_body': more_body}
+
+    async def send(self, send: Send, message: Message) -> None:
+        if message['type'] == 'http.response.start':
+            self.start_message = message
+            return
+        if message['type'] != 'http.response.body':
+            await send(message)
+            return
+
+        if self.compressing is None:
+            headers = MutableHeaders(scope=self.start_message)
+            not_modified = self.start_message['status'] == 304
+            self.compressing = not not_modified and self.is_compressible(message, headers)
+            if self.compressing:
+                headers['Content-Encoding'] = self.encoding
+                del headers['Content-Length']
+            if self.compressing or not_modified:
+                headers.add_vary_header('Accept-Encoding')
+                if headers.get('etag', 'W/').startswith('"'):
+                    headers['ETag'] = f'W/{headers["etag"]}'
+
+        if self.compressing:
+            message = self.compress(message)
+
+        if self.start_message is not None:
+            if self.compressing and not message['more_body']:
+                MutableHeaders(scope=self.start_message)['Content-Length'] = str(len(message['body']))
+            await send(self.start_message)
+            self.start_message = None
+        await send(message)
+
+
+class CompressionMiddleware:
+    """Compress responses with gzip if the Accept-Encoding header of the request allows it.
+
+    The number of bytes saved by the compression is added to the tracing span of the request.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int, level: int) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        self.level = level
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate_encoding(Headers(scope=scope).get('accept-encoding', ''))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        responder = CompressionResponder(encoding, self.minimum_size, self.level)
+        await self.app(scope, receive, partial(responder.send, send))
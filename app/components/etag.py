@@ -0,0 +1,44 @@
+# Copyright (C) 2022-Present Indoc Systems
+#
+# Licensed under the GNU AFFERO GENERAL PUBLIC LICENSE,
+# Version 3.0 (the "License") available at https://www.gnu.org/licenses/agpl-3.0.en.html.
+# You may not use this file except in compliance with the License.
+
+import hashlib
+
+from fastapi import Request
+from fastapi import Response
+
+
+def compute_etag(body: bytes) -> str:
+    """Return strong entity tag of the response body."""
+
+    return f'"{hashlib.sha256(body).hexdigest()}"'
+
+
+def etag_matches(etag: str, if_none_match: str) -> bool:
+    """Return true if the entity tag matches any of the If-None-Match header tags using the weak comparison."""
+
+    if if_none_match.strip() == '*':
+        return True
+
+    return etag.removeprefix('W/') in (tag.strip().removeprefix('W/') for tag in if_none_match.split(','))
+
+
+def conditional_response(request: Request, response: Response) -> Response:
+    """Add ETag to the successful response and replace it with 304 when the client already has the same body.
+
+    Responses are specific to the user, so they are marked as private and clients have to revalidate them. The
+    compression middleware weakens the ETag of the 304 like the one of the compressed response.
+    """
+
+    if response.status_code != 200:
+        return response
+
+    etag = compute_etag(response.body)
+    headers = {'ETag': etag, 'Cache-Control': 'private, no-cache'}
+    if etag_matches(etag, request.headers.get('if-none-match', '')):
+        return Response(status_code=304, headers=headers)
+
+    response.headers.update(headers)
+    return response
@@ -0,0 +1,42 @@
+# Copyright (C) 2022-Present Indoc Systems
+#
+# Licensed under the GNU AFFERO GENERAL PUBLIC LICENSE,
+# Version 3.0 (the "License") available at https://www.gnu.org/licenses/agpl-3.0.en.html.
+# You may not use this file except in compliance with the License.
+
+from functools import lru_cache
+from typing import Any
+from typing import NamedTuple
+
+from app.components.cache import TTLCache
+from app.config import ConfigClass
+
+
+class FolderSummaryKey(NamedTuple):
+    project_code: str
+    container_type: str
+    zone: int
+    folder: str
+    username: str
+    generation: int
+
+
+class FolderSummaryCache(TTLCache):
+    """Cache of aggregates computed over folder subtrees.
+
+    Summaries are computed with the permissions of the user, so they are cached per user. Uploads into the project
+    bump the cache generation which is part of the key, so summaries cached by every worker stop being used.
+    """
+
+    name = 'folder summary cache'
+
+    def get(self, key: FolderSummaryKey) -> dict[str, Any] | None:
+        return super().get(key)
+
+    def set(self, key: FolderSummaryKey, summary: dict[str, Any]) -> None:
+        super().set(key, summary)
+
+
+@lru_cache(1)
+def get_folder_summary_cache() -> FolderSummaryCache:
+    return FolderSummaryCache(ConfigClass.FOLDER_SUMMARY_CACHE_TTL, ConfigClass.FOLDER_SUMMARY_CACHE_MAX_SIZE)
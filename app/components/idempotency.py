@@ -0,0 +1,153 @@
+# Copyright (C) 2022-Present Indoc Systems
+#
+# Licensed under the GNU AFFERO GENERAL PUBLIC LICENSE,
+# Version 3.0 (the "License") available at https://www.gnu.org/licenses/agpl-3.0.en.html.
+# You may not use this file except in compliance with the License.
+
+import asyncio
+import hashlib
+import json
+import time
+from collections.abc import Awaitable
+from collections.abc import Callable
+from functools import lru_cache
+from typing import Any
+
+from fastapi import Request
+from fastapi import Response
+from redis.asyncio import Redis
+
+from app.components.redis_client import get_redis
+from app.config import ConfigClass
+from app.logger import logger
+from app.models.base_models import APIResponse
+from app.models.base_models import EAPIResponseCode
+
+IDEMPOTENCY_KEY_HEADER = 'Idempotency-Key'
+IDEMPOTENT_REPLAYED_HEADER = 'Idempotent-Replayed'
+REPLAYED_RESPONSE_HEADERS = ('content-type', 'location')
+
+ResponseHandler = Callable[[], Awaitable[Response]]
+
+
+class IdempotencyStore:
+    """Deduplicate requests carrying the same Idempotency-Key header using Redis.
+
+    The first request claims the key and runs, its response is then stored and replayed to every duplicate. Duplicates
+    arriving while the first request is still running wait for its response. The claim expires after lock_ttl seconds
+    and is refreshed while the request runs, so long running requests are not executed twice. Keys are scoped to the
+    user and the request path, and server errors are not stored, so retrying after them runs the request again.
+    """
+
+    key_prefix = 'bff-cli:idempotency:'
+
+    def __init__(self, redis: Redis, ttl: int, lock_ttl: int, poll_interval: float) -> None:
+        self.redis = redis
+        self.ttl = ttl
+        self.lock_ttl = lock_ttl
+        self.poll_interval = poll_interval
+
+    def get_key(self, username: str, path: str, idempotency_key: str) -> str:
+        return f'{self.key_prefix}{username}:{path}:{idempotency_key}'
+
+    @staticmethod
+    async def get_fingerprint(request: Request) -> str:
+        return hashlib.sha256(await request.body()).hexdigest()
+
+    @staticmethod
+    def error_response(code: EAPIResponseCode, error_msg: str) -> Response:
+        api_response = APIResponse()
+        api_response.code = code
+        api_response.error_msg = error_msg
+        api_response.result = {}
+        return api_response.json_response()
+
+    @staticmethod
+    def replay(entry: dict[str, Any]) -> Response:
+        response = Response(content=entry['body'], status_code=entry['status_code'], headers=entry['headers'])
+        response.headers[IDEMPOTENT_REPLAYED_HEADER] = 'true'
+        return response
+
+    async def _store(self, key: str, fingerprint: str, response: Response) -> None:
+        if response.status_code >= 500:
+            await self.redis.delete(key)
+            return
+
+        entry = {
+            'state': 'completed',
+            'fingerprint': fingerprint,
+            'status_code': response.status_code,
+            'headers': {name: response.headers[name] for name in REPLAYED_RESPONSE_HEADERS if name in response.headers},
+            'body': response.body.decode('utf-8'),
+        }
+        await self.redis.set(key, json.dumps(entry), ex=self.ttl)
+
+    async def _refresh_lock(self, key: str) -> None:
+        while True:
+            await asyncio.sleep(self.lock_ttl / 3)
+            try:
+                await self.redis.expire(key, self.lock_ttl)
+            except Exception:
+                logger.exception(f'Unable to refresh lock for idempotency key "{key}"')
+
+    async def _execute(self, key: str, fingerprint: str, handler: ResponseHandler) -> Response:
+        refresh = asyncio.create_task(self._refresh_lock(key))
+        try:
+            response = await handler()
+        except BaseException:
+            await self.redis.delete(key)
+            raise
+        finally:
+            refresh.cancel()
+            await asyncio.gather(refresh, return_exceptions=True)
+
+        try:
+            await self._store(key, fingerprint, response)
+        except Exception:
+            logger.exception(f'Unable to store response for idempotency key "{key}"')
+        return response
+
+    async def run(self, request: Request, username: str, handler: ResponseHandler) -> Response:
+        """Run the handler once per Idempotency-Key header value or without deduplication if there is no header."""
+
+        idempotency_key = request.headers.get(IDEMPOTENCY_KEY_HEADER)
+        if not idempotency_key:
+            return await handler()
+
+        key = self.get_key(username, request.url.path, idempotency_key)
+        fingerprint = await self.get_fingerprint(request)
+        running = json.dumps({'state': 'running', 'fingerprint': fingerprint})
+        deadline = time.monotonic() + self.lock_ttl
+        while True:
+            if await self.redis.set(key, running, ex=self.lock_ttl, nx=True):
+                return await self._execute(key, fingerprint, handler)
+
+            entry = await self.redis.get(key)
+            entry = json.loads(entry) if entry else None
+            if entry and entry['fingerprint'] != fingerprint:
+                return self.error_response(
+                    EAPIResponseCode.unprocessable_entity,
+                    f'{IDEMPOTENCY_KEY_HEADER} "{idempotency_key}" was already used with a different request',
+                )
+            if entry and entry['state'] == 'completed':
+                logger.info(f'Replaying stored response for idempotency key "{key}"')
+                return self.replay(entry)
+            if time.monotonic() >= deadline:
+                return self.error_response(
+                    EAPIResponseCode.conflict,
+                    f'Request with {IDEMPOTENCY_KEY_HEADER} "{idempotency_key}" is still being processed',
+                )
+
+            if entry:
+                logger.info(f'Waiting for running request with idempotency key "{key}"')
+                await asyncio.sleep(self.poll_interval)
+
+
+@lru_cache(1)
+def get_idempotency_store() -> IdempotencyStore:
+    return IdempotencyStore(
+        get_redis(),
+        ConfigClass.IDEMPOTENCY_KEY_TTL,
+        ConfigClass.IDEMPOTENCY_LOCK_TTL,
+        ConfigClass.IDEMPOTENCY_POLL_INTERVAL,
+    )
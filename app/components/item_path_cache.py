@@ -0,0 +1,45 @@
+# Copyright (C) 2022-Present Indoc Systems
+#
+# Licensed under the GNU AFFERO GENERAL PUBLIC LICENSE,
+# Version 3.0 (the "License") available at https://www.gnu.org/licenses/agpl-3.0.en.html.
+# You may not use this file except in compliance with the License.
+
+from functools import lru_cache
+from typing import Any
+from typing import NamedTuple
+
+from app.components.cache import TTLCache
+from app.config import ConfigClass
+
+
+class ItemPathKey(NamedTuple):
+    project_code: str
+    container_type: str
+    zone: int
+    parent_path: str
+    name: str
+    item_type: str | None
+    username: str
+    generation: int
+
+
+class ItemPathCache(TTLCache):
+    """Short living cache of item path resolutions in the metadata service.
+
+    Empty results are cached as well, so repeated lookups of items which do not exist yet are also answered from the
+    cache until they expire or an upload into the project bumps the cache generation which is part of the key. Lookups
+    are made with the permissions of the user, so they are cached per user.
+    """
+
+    name = 'item path cache'
+
+    def get(self, key: ItemPathKey) -> list[dict[str, Any]] | None:
+        return super().get(key)
+
+    def set(self, key: ItemPathKey, result: list[dict[str, Any]]) -> None:
+        super().set(key, result)
+
+
+@lru_cache(1)
+def get_item_path_cache() -> ItemPathCache:
+    return ItemPathCache(ConfigClass.ITEM_PATH_CACHE_TTL, ConfigClass.ITEM_PATH_CACHE_MAX_SIZE)
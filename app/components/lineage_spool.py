@@ -0,0 +1,204 @@
+# Copyright (C) 2022-Present Indoc Systems
+#
+# Licensed under the GNU AFFERO GENERAL PUBLIC LICENSE,
+# Version 3.0 (the "License") available at https://www.gnu.org/licenses/agpl-3.0.en.html.
+# You may not use this file except in compliance with the License.
+
+import asyncio
+import hashlib
+import json
+from functools import lru_cache
+from typing import Any
+from uuid import uuid4
+
+import httpx
+from redis.asyncio import Redis
+
+from app.clients.lineage import LineageClient
+from app.components.redis_client import get_redis
+from app.config import ConfigClass
+from app.logger import logger
+
+# expire or delete the lock only if it is still held with the token, otherwise it was taken over by another instance
+EXTEND_LOCK_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('expire', KEYS[1], ARGV[2])
+end
+return 0
+"""
+RELEASE_LOCK_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+class LineageSpool:
+    """Durable spool of lineage waiting to be created in Atlas, drained by a background worker.
+
+    Lineage is kept in a Redis hash keyed by the hash of its payload, so identical lineage spooled repeatedly is
+    created only once. The worker submits up to batch_size lineages, capped at ATLAS_BULK_SIZE so that a batch is
+    sent in a single bulk request, and removes them from the spool only after Atlas accepted them. When Atlas fails,
+    the delay before the next attempt doubles up to max_interval. A lock in Redis ensures that only one instance
+    drains the spool at a time.
+
+    When Atlas rejects a bulk request, the lineages of the batch are submitted one by one, so that a lineage which is
+    never accepted does not block the others. Lineage rejected max_attempts times is moved to the dead letter hash.
+    """
+
+    key = 'bff-cli:lineage-spool'
+    attempts_key = 'bff-cli:lineage-spool:attempts'
+    dead_letter_key = 'bff-cli:lineage-spool:dead-letter'
+    lock_key = 'bff-cli:lineage-spool:lock'
+
+    def __init__(self, redis: Redis, batch_size: int, interval: float, max_interval: float, max_attempts: int) -> None:
+        self.redis = redis
+        # a batch split into several bulk requests could be partially accepted and then resubmitted one by one
+        self.batch_size = min(batch_size, ConfigClass.ATLAS_BULK_SIZE)
+        self.interval = interval
+        self.max_interval = max_interval
+        self.max_attempts = max_attempts
+        # long enough for the bulk request of one batch, the lock is extended before each separate submission
+        self.lock_ttl = ConfigClass.ATLAS_TIMEOUT * 2
+
+        self._extend_lock = redis.register_script(EXTEND_LOCK_SCRIPT)
+        self._release_lock = redis.register_script(RELEASE_LOCK_SCRIPT)
+        self._task: asyncio.Task | None = None
+
+    @staticmethod
+    def get_field(lineage: dict[str, Any]) -> str:
+        return hashlib.sha256(json.dumps(lineage, sort_keys=True).encode('utf-8')).hexdigest()
+
+    async def put(self, lineage: dict[str, Any]) -> None:
+        await self.redis.hset(self.key, self.get_field(lineage), json.dumps(lineage))
+
+    async def extend_lock(self, token: str) -> None:
+        """Extend the lock before the next request to Atlas, unless it already expired and was taken over."""
+
+        if not await self._extend_lock(keys=[self.lock_key], args=[token, self.lock_ttl]):
+            raise Exception('Lineage spool lock was lost')
+
+    async def release_lock(self, token: str) -> None:
+        await self._release_lock(keys=[self.lock_key], args=[token])
+
+    async def reject(self, field: bytes, value: bytes) -> None:
+        """Count failed attempt of the lineage and move it to the dead letter hash after max_attempts."""
+
+        attempts = await self.redis.hincrby(self.attempts_key, field, 1)
+        if attempts < self.max_attempts:
+            return
+
+        logger.error(f'Moving lineage {field.decode()} to dead letter after {attempts} failed attempts')
+        await self.redis.hset(self.dead_letter_key, field, value)
+        await self.redis.hdel(self.key, field)
+        await self.redis.hdel(self.attempts_key, field)
+
+    async def drain_one_by_one(
+        self, lineage_client: LineageClient, spooled: dict[bytes, bytes], lineages: list[dict[str, Any]], token: str
+    ) -> int:
+        """Submit the lineages separately to isolate the ones rejected by Atlas."""
+
+        submitted = 0
+        for (field, value), lineage in zip(spooled.items(), lineages):
+            await self.extend_lock(token)
+            try:
+                await lineage_client.create_lineages([lineage])
+            except httpx.TransportError:
+                raise
+            except Exception as e:
+                logger.error(f'Atlas rejected lineage {field.decode()}: {e}')
+                await self.reject(field, value)
+                continue
+            await self.redis.hdel(self.key, field)
+            await self.redis.hdel(self.attempts_key, field)
+            submitted += 1
+
+        if not submitted:
+            raise Exception(f'Atlas rejected all {len(spooled)} lineages of the batch')
+        return submitted
+
+    async def drain(self, lineage_client: LineageClient) -> int:
+        """Submit one batch of spooled lineage to Atlas and return the number of submitted lineages."""
+
+        token = uuid4().hex
+        if not await self.redis.set(self.lock_key, token, ex=self.lock_ttl, nx=True):
+            return 0
+
+        try:
+            _, spooled = await self.redis.hscan(self.key, count=self.batch_size)
+            spooled = dict(list(spooled.items())[: self.batch_size])
+            if not spooled:
+                return 0
+
+            lineages = [
+                lineage_client.build_lineage(
+                    input_id=lineage['input_id'],
+                    output_id=lineage['output_id'],
+                    input_path=lineage['input_path'],
+                    output_path=lineage['output_path'],
+                    container_code=lineage['project_code'],
+                    action_type=lineage['action_type'],
+                    description=lineage['description'],
+                )
+                for lineage in map(json.loads, spooled.values())
+            ]
+            try:
+                await lineage_client.create_lineages(lineages)
+            except httpx.TransportError:
+                raise
+            except Exception as e:
+                if len(spooled) == 1:
+                    await self.reject(*spooled.popitem())
+                    raise
+                logger.warning(f'Atlas rejected batch of {len(spooled)} lineages, submitting them one by one: {e}')
+                return await self.drain_one_by_one(lineage_client, spooled, lineages, token)
+
+            await self.redis.hdel(self.key, *spooled)
+            await self.redis.hdel(self.attempts_key, *spooled)
+            logger.info(f'Drained {len(spooled)} lineages from spool')
+            return len(spooled)
+        finally:
+            await self.release_lock(token)
+
+    async def run(self, lineage_client: LineageClient) -> None:
+        """Keep draining the spool, backing off while Atlas or Redis fail."""
+
+        delay = self.interval
+        while True:
+            try:
+                drained = await self.drain(lineage_client)
+                delay = self.interval
+            except Exception:
+                logger.exception('Failed to drain lineage spool')
+                drained = 0
+                delay = min(delay * 2, self.max_interval)
+
+            if drained < self.batch_size:
+                await asyncio.sleep(delay)
+
+    def start(self, lineage_client: LineageClient) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run(lineage_client))
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+
+@lru_cache(1)
+def get_lineage_spool() -> LineageSpool:
+    return LineageSpool(
+        get_redis(),
+        ConfigClass.LINEAGE_SPOOL_BATCH_SIZE,
+        ConfigClass.LINEAGE_SPOOL_INTERVAL,
+        ConfigClass.LINEAGE_SPOOL_MAX_INTERVAL,
+        ConfigClass.LINEAGE_SPOOL_MAX_ATTEMPTS,
+    )
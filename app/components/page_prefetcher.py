@@ -0,0 +1,112 @@
+# Copyright (C) 2022-Present Indoc Systems
+#
+# Licensed under the GNU AFFERO GENERAL PUBLIC LICENSE,
+# Version 3.0 (the "License") available at https://www.gnu.org/licenses/agpl-3.0.en.html.
+# You may not use this file except in compliance with the License.
+
+import asyncio
+from collections.abc import Awaitable
+from collections.abc import Callable
+from collections.abc import Hashable
+from functools import lru_cache
+from typing import Any
+
+from httpx import Response
+from starlette.datastructures import MultiDict
+
+from app.components.cache import TTLCache
+from app.config import ConfigClass
+from app.logger import logger
+from app.resources.helpers import has_next_page
+
+PageParameters = dict[str, Any] | MultiDict
+PageFetcher = Callable[[PageParameters], Awaitable[Response]]
+Page = dict[str, Any]
+
+
+class PagePrefetcher(TTLCache):
+    """Cache of speculatively fetched next pages of paginated listings.
+
+    After a page is served, the following one is fetched in the background, so the client paging sequentially gets
+    it from memory. Pages are kept parsed per user and only for listings with page size up to max_page_size, which
+    together with max_size bounds the memory used by the cache.
+    """
+
+    name = 'page prefetch cache'
+
+    def __init__(self, ttl: float, max_size: int, max_page_size: int) -> None:
+        super().__init__(ttl, max_size)
+        self.max_page_size = max_page_size
+
+    @staticmethod
+    def make_key(username: str, listing: str, params: PageParameters) -> Hashable:
+        items = params.multi_items() if isinstance(params, MultiDict) else params.items()
+        return username, listing, tuple(sorted((str(key), str(value)) for key, value in items))
+
+    @staticmethod
+    def _log_failure(task: asyncio.Task) -> None:
+        if not task.cancelled() and task.exception():
+            logger.warning(f'Failed to prefetch page: {task.exception()}')
+
+    @staticmethod
+    async def _fetch_successful_page(params: PageParameters, fetch_page: PageFetcher) -> Page:
+        response = await fetch_page(params)
+        if response.status_code != 200:
+            raise Exception(f'Received "{response.status_code}" status code')
+        return response.json()
+
+    async def _fetch(self, key: Hashable, params: PageParameters, fetch_page: PageFetcher) -> tuple[int, Page]:
+        prefetched = self.get(key)
+        if prefetched is not None:
+            try:
+                return 200, await asyncio.shield(prefetched)
+            except Exception:
+                logger.exception('Prefetched page is not available')
+
+        response = await fetch_page(params)
+        return response.status_code, response.json()
+
+    def _prefetch(self, key: Hashable, params: PageParameters, fetch_page: PageFetcher) -> None:
+        if key in self:
+            return
+
+        task = asyncio.ensure_future(self._fetch_successful_page(params, fetch_page))
+        task.add_done_callback(self._log_failure)
+        self.set(key, task)
+
+    async def get_page(self, username: str, listing: str, params: PageParameters, fetch_page: PageFetcher) -> Page:
+        """Return the parsed page from prefetched pages or fetch it and start prefetching the next page."""
+
+        status_code, page = await self._fetch(self.make_key(username, listing, params), params, fetch_page)
+        if 'page' not in params or 'page_size' not in params or status_code != 200:
+            return page
+
+        page_number, page_size = int(params['page']), int(params['page_size'])
+        if 0 < page_size <= self.max_page_size and has_next_page(page, page_number, page_size):
+            next_params = type(params)(params)
+            next_params['page'] = str(page_number + 1)
+            self._prefetch(self.make_key(username, listing, next_params), next_params, fetch_page)
+
+        return page
+
+    def invalidate_listing(self, listing: str, project_code: str, zone: int) -> None:
+        """Remove prefetched pages of the listing in the project and zone for all users."""
+
+        def matches(key: Hashable) -> bool:
+            _, key_listing, items = key
+            params = dict(items)
+            return (
+                key_listing == listing
+                and params.get('container_code') == project_code
+                and params.get('zone') == str(zone)
+            )
+
+        removed = self.invalidate(matches)
+        logger.info(f'Invalidated {removed} prefetched {listing} pages of "{project_code}" in zone {zone}')
+
+
+@lru_cache(1)
+def get_page_prefetcher() -> PagePrefetcher:
+    return PagePrefetcher(
+        ConfigClass.PAGE_PREFETCH_TTL, ConfigClass.PAGE_PREFETCH_MAX_SIZE, ConfigClass.PAGE_PREFETCH_MAX_PAGE_SIZE
+    )
@@ -0,0 +1,160 @@
+# Copyright (C) 2022-Present Indoc Systems
+#
+# Licensed under the GNU AFFERO GENERAL PUBLIC LICENSE,
+# Version 3.0 (the "License") available at https://www.gnu.org/licenses/agpl-3.0.en.html.
+# You may not use this file except in compliance with the License.
+
+import asyncio
+from collections.abc import Sequence
+from typing import Any
+from typing import NamedTuple
+
+from common import get_project_role
+from fastapi import Depends
+
+from app.components.request.context import RequestContextDependency
+from app.components.request.http_client import HTTPClient
+from app.components.user.models import CurrentUser
+from app.config import SettingsDependency
+from app.logger import logger
+from app.resources.dependencies import jwt_required
+
+RuleKey = tuple[str, str, str, str, str]
+
+
+class PermissionSubject(NamedTuple):
+    """Attributes of an item that are relevant for the permission rules."""
+
+    project_code: str
+    role: str
+    zone: str
+    root_folder: str
+
+
+class FilePermissionEvaluator:
+    """Evaluate file permissions locally using the rules from the authorize matrix of the auth service.
+
+    Each (project, role, resource, zone, operation) rule is requested from the auth service only once per evaluator
+    and the decision for every item is made in-process, so checking N items costs as many calls as there are distinct
+    rules instead of one or two calls per item.
+    """
+
+    def __init__(self, endpoint: str, client: HTTPClient, current_identity: CurrentUser) -> None:
+        self.endpoint_v1 = f'{endpoint}/v1'
+        self.client = client
+        self.current_identity = current_identity
+
+        self._rules: dict[RuleKey, asyncio.Future] = {}
+
+    async def _fetch_rule(self, project_code: str, role: str, resource: str, zone: str, operation: str) -> bool:
+        """Get single rule of the authorize matrix from the auth service."""
+
+        params = {
+            'role': role,
+            'resource': resource,
+            'zone': zone,
+            'operation': operation,
+            'project_code': project_code,
+        }
+        response = await self.client.get(f'{self.endpoint_v1}/authorize', params=params)
+        if response.status_code != 200:
+            raise Exception(f'Error calling authorize API - {response.json()}')
+
+        return bool(response.json()['result'].get('has_permission'))
+
+    def _get_rule(self, subject: PermissionSubject, resource: str, operation: str) -> asyncio.Future:
+        """Return the future holding the rule, concurrent lookups of the same rule share one request."""
+
+        key = (subject.project_code, subject.role, resource, subject.zone, operation)
+        if key not in self._rules:
+            self._rules[key] = asyncio.ensure_future(self._fetch_rule(*key))
+
+        return self._rules[key]
+
+    async def _get_subject(self, item: dict[str, Any]) -> PermissionSubject | None:
+        """Extract permission related attributes from the item or return None when no permission can be granted."""
+
+        if item['container_type'] != 'project':
+            logger.info('Unsupported container type, permission denied')
+            return None
+
+        project_code = item['container_code']
+        zone = 'greenroom' if item['zone'] == 0 else 'core'
+
+        if item.get('type') == 'name_folder':
+            path_for_permissions = 'name'
+        elif item.get('status') == 'ARCHIVED':
+            path_for_permissions = 'restore_path'
+        else:
+            path_for_permissions = 'parent_path'
+        root_folder = item[path_for_permissions].split('/')[0]
+
+        if self.current_identity['role'] != 'admin' and not project_code:
+            logger.info('No project code and not a platform admin, permission denied')
+            return None
+
+        role = await get_project_role(project_code, self.current_identity)
+        if not role:
+            logger.info('Unable to get project role in permissions check, user might not belong to project')
+            return None
+
+        return PermissionSubject(project_code, role, zone, root_folder)
+
+    async def _evaluate(self, checks: Sequence[tuple[dict[str, Any], str]]) -> list[bool]:
+        """Evaluate the list of (item, operation) pairs.
+
+        The user is allowed to perform the operation when there is file_any permission, or when the item is located
+        in the user name folder and there is file_in_own_namefolder permission.
+        """
+
+        username = self.current_identity['username']
+        granted = [False] * len(checks)
+        subjects = [await self._get_subject(item) for item, _ in checks]
+
+        any_rules = {}
+        for index, (subject, (_, operation)) in enumerate(zip(subjects, checks)):
+            if subject is not None:
+                any_rules[index] = self._get_rule(subject, 'file_any', operation)
+        await asyncio.gather(*set(any_rules.values()))
+
+        own_rules = {}
+        for index, rule in any_rules.items():
+            subject = subjects[index]
+            if rule.result():
+                granted[index] = True
+            elif subject.root_folder == username:
+                own_rules[index] = self._get_rule(subject, 'file_in_own_namefolder', checks[index][1])
+        await asyncio.gather(*set(own_rules.values()))
+
+        for index, rule in own_rules.items():
+            granted[index] = rule.result()
+
+        logger.info(f'Evaluated {len(checks)} permission checks using {len(self._rules)} authorize rules')
+        return granted
+
+    async def has_permission(self, item: dict[str, Any], operation: str) -> bool:
+        """Return true if the current user is allowed to perform the operation on the item."""
+
+        granted = await self._evaluate([(item, operation)])
+        return granted[0]
+
+    async def has_permissions(self, items: Sequence[dict[str, Any]], operation: str) -> list[bool]:
+        """Return the permission to perform the operation for each item keeping the order of items."""
+
+        return await self._evaluate([(item, operation) for item in items])
+
+    async def has_operations(self, item: dict[str, Any], operations: Sequence[str]) -> dict[str, bool]:
+        """Return the permission for each of the operations on the item in a single evaluation."""
+
+        granted = await self._evaluate([(item, operation) for operation in operations])
+        return dict(zip(operations, granted))
+
+
+def get_file_permission_evaluator(
+    request_context: RequestContextDependency,
+    settings: SettingsDependency,
+    current_identity: CurrentUser = Depends(jwt_required),
+) -> FilePermissionEvaluator:
+    """Get file permission evaluator for the current user as a FastAPI dependency."""
+
+    return FilePermissionEvaluator(settings.AUTH_SERVICE, request_context.client, current_identity)
@@ -0,0 +1,172 @@
+# Copyright (C) 2022-Present Indoc Systems
+#
+# Licensed under the GNU AFFERO GENERAL PUBLIC LICENSE,
+# Version 3.0 (the "License") available at https://www.gnu.org/licenses/agpl-3.0.en.html.
+# You may not use this file except in compliance with the License.
+
+import asyncio
+import json
+import time
+from collections.abc import Coroutine
+from functools import lru_cache
+from typing import Any
+from uuid import uuid4
+
+from fastapi import Request
+from redis.asyncio import Redis
+
+from app.components.redis_client import get_redis
+from app.components.types import StrEnum
+from app.config import ConfigClass
+from app.logger import logger
+from app.models.base_models import APIResponse
+from app.models.base_models import EAPIResponseCode
+
+
+def prefers_async(request: Request) -> bool:
+    """Return true if the client asked for asynchronous processing with the Prefer header."""
+
+    return 'respond-async' in request.headers.get('prefer', '')
+
+
+class PreuploadJobStatus(StrEnum):
+    RUNNING = 'RUNNING'
+    SUCCEEDED = 'SUCCEEDED'
+    FAILED = 'FAILED'
+
+
+class PreuploadJobTracker:
+    """Run preuploads in the background and keep their state in Redis, so any instance can report it.
+
+    The job runs only in the instance which started it. A preupload still running after max_runtime seconds is
+    cancelled. While the job runs, its state is refreshed every heartbeat_interval seconds, and a job left running by
+    an instance which stopped is reported as failed once it missed three heartbeats. Jobs still running when the
+    instance shuts down are cancelled and saved as failed.
+    """
+
+    key_prefix = 'bff-cli:preupload-job:'
+    missed_heartbeats = 3
+
+    def __init__(self, redis: Redis, ttl: int, max_runtime: int, heartbeat_interval: float) -> None:
+        self.redis = redis
+        self.ttl = ttl
+        self.max_runtime = max_runtime
+        self.heartbeat_interval = heartbeat_interval
+
+        self._tasks: set[asyncio.Task] = set()
+
+    def get_key(self, job_id: str) -> str:
+        return f'{self.key_prefix}{job_id}'
+
+    async def save(self, job: dict[str, Any]) -> None:
+        job['updated_at'] = time.time()
+        await self.redis.set(self.get_key(job['job_id']), json.dumps(job), ex=self.ttl)
+
+    async def get(self, job_id: str) -> dict[str, Any] | None:
+        job = await self.redis.get(self.get_key(job_id))
+        if not job:
+            return None
+
+        job = json.loads(job)
+        stale_after = self.heartbeat_interval * self.missed_heartbeats
+        if job['status'] == PreuploadJobStatus.RUNNING and time.time() > job['updated_at'] + stale_after:
+            job['status'] = PreuploadJobStatus.FAILED.value
+            job['code'] = EAPIResponseCode.internal_error.value
+            job['error_msg'] = 'Preupload job was interrupted'
+        return job
+
+    async def start(
+        self, project_code: str, username: str, preupload: Coroutine[Any, Any, APIResponse]
+    ) -> dict[str, Any]:
+        """Register the job as running and await the preupload in the background task."""
+
+        job = {
+            'job_id': str(uuid4()),
+            'project_code': project_code,
+            'username': username,
+            'status': PreuploadJobStatus.RUNNING.value,
+            'code': None,
+            'error_msg': '',
+            'result': None,
+        }
+        try:
+            await self.save(job)
+        except Exception:
+            preupload.close()
+            raise
+
+        task = asyncio.create_task(self._run(job, preupload))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        logger.info(f'Started preupload job "{job["job_id"]}" in project {project_code}')
+        return job
+
+    async def stop(self) -> None:
+        """Cancel the jobs still running in this instance and wait until they are saved as failed."""
+
+        tasks = list(self._tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _heartbeat(self, job: dict[str, Any]) -> None:
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            try:
+                await self.save(dict(job))
+            except Exception:
+                logger.exception(f'Unable to refresh state of preupload job "{job["job_id"]}"')
+
+    async def _run_with_heartbeat(
+        self, job: dict[str, Any], preupload: Coroutine[Any, Any, APIResponse]
+    ) -> APIResponse:
+        heartbeat = asyncio.create_task(self._heartbeat(job))
+        try:
+            return await asyncio.wait_for(preupload, self.max_runtime)
+        finally:
+            heartbeat.cancel()
+            await asyncio.gather(heartbeat, return_exceptions=True)
+
+    async def _run(self, job: dict[str, Any], preupload: Coroutine[Any, Any, APIResponse]) -> None:
+        cancelled = False
+        try:
+            api_response = await self._run_with_heartbeat(job, preupload)
+            succeeded = api_response.code == EAPIResponseCode.success
+            job['status'] = (PreuploadJobStatus.SUCCEEDED if succeeded else PreuploadJobStatus.FAILED).value
+            job['code'] = api_response.code.value
+            job['error_msg'] = api_response.error_msg
+            job['result'] = api_response.result
+        except asyncio.TimeoutError:
+            logger.error(f'Preupload job "{job["job_id"]}" did not finish within {self.max_runtime} seconds')
+            job['status'] = PreuploadJobStatus.FAILED.value
+            job['code'] = EAPIResponseCode.internal_error.value
+            job['error_msg'] = f'Preupload job did not finish within {self.max_runtime} seconds'
+        except asyncio.CancelledError:
+            logger.error(f'Preupload job "{job["job_id"]}" was cancelled')
+            cancelled = True
+            job['status'] = PreuploadJobStatus.FAILED.value
+            job['code'] = EAPIResponseCode.internal_error.value
+            job['error_msg'] = 'Preupload job was cancelled on shutdown'
+        except Exception as e:
+            logger.exception(f'Preupload job "{job["job_id"]}" failed')
+            job['status'] = PreuploadJobStatus.FAILED.value
+            job['code'] = EAPIResponseCode.internal_error.value
+            job['error_msg'] = f'Preupload error: {e}'
+
+        try:
+            await self.save(job)
+        except Exception:
+            logger.exception(f'Unable to save state of preupload job "{job["job_id"]}"')
+
+        if cancelled:
+            raise asyncio.CancelledError
+
+
+@lru_cache(1)
+def get_preupload_job_tracker() -> PreuploadJobTracker:
+    return PreuploadJobTracker(
+        get_redis(),
+        ConfigClass.PREUPLOAD_JOB_TTL,
+        ConfigClass.PREUPLOAD_JOB_MAX_RUNTIME,
+        ConfigClass.PREUPLOAD_JOB_HEARTBEAT_INTERVAL,
+    )
@@ -0,0 +1,44 @@
+# Copyright (C) 2022-Present Indoc Systems
+#
+# Licensed under the GNU AFFERO GENERAL PUBLIC LICENSE,
+# Version 3.0 (the "License") available at https://www.gnu.org/licenses/agpl-3.0.en.html.
+# You may not use this file except in compliance with the License.
+
+from collections.abc import AsyncIterable
+from collections.abc import AsyncIterator
+from collections.abc import Iterable
+from typing import Annotated
+from typing import Any
+
+from fastapi import Depends
+from fastapi import Query
+
+
+class ItemProjection:
+    """Trim items to the requested top level fields, all fields are kept when no fields are requested."""
+
+    def __init__(self, fields: Iterable[str] | None = None) -> None:
+        self.fields = tuple(dict.fromkeys(fields or ()))
+
+    def __call__(self, item: dict[str, Any] | None) -> dict[str, Any] | None:
+        if not self.fields or not item:
+            return item
+        return {field: item[field] for field in self.fields if field in item}
+
+    def items(self, items: Iterable[dict[str, Any]] | None) -> list[dict[str, Any]] | None:
+        if not self.fields or items is None:
+            return items
+        return [self(item) for item in items]
+
+    async def stream(self, items: AsyncIterable[dict[str, Any]]) -> AsyncIterator[dict[str, Any]]:
+        async for item in items:
+            yield self(item)
+
+
+def get_item_projection(
+    fields: str | None = Query(None, description='Comma separated list of item fields to return, e.g. id,name,type')
+) -> ItemProjection:
+    return ItemProjection(field.strip() for field in fields.split(',') if field.strip()) if fields else ItemProjection()
+
+
+ItemProjectionDependency = Annotated[ItemProjection, Depends(get_item_projection)]
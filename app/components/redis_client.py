@@ -0,0 +1,23 @@
+# Copyright (C) 2022-Present Indoc Systems
+#
+# Licensed under the GNU AFFERO GENERAL PUBLIC LICENSE,
+# Version 3.0 (the "License") available at https://www.gnu.org/licenses/agpl-3.0.en.html.
+# You may not use this file except in compliance with the License.
+
+from functools import lru_cache
+
+from redis.asyncio import Redis
+
+from app.config import ConfigClass
+
+
+@lru_cache(1)
+def get_redis() -> Redis:
+    """Get Redis client with connection pool shared by the whole application."""
+
+    return Redis(
+        host=ConfigClass.REDIS_HOST,
+        port=ConfigClass.REDIS_PORT,
+        db=ConfigClass.REDIS_DB,
+        password=ConfigClass.REDIS_PASSWORD,
+    )
@@ -10,6 +10,7 @@ from fastapi import Depends
 from fastapi import Request
 
 from app.components.request.http_client import HTTPClient
+from app.components.request.memo import RequestMemo
 from app.config import SettingsDependency
 
 
@@ -32,6 +33,7 @@ class RequestContext:
                 self.headers[key] = value
 
         self.client = HTTPClient(headers=self.headers, timeout=client_timeout)
+        self.memo = RequestMemo()
 
 
 def get_request_context(request: Request, settings: SettingsDependency) -> RequestContext:
@@ -0,0 +1,81 @@
+# Copyright (C) 2022-Present Indoc Systems
+#
+# Licensed under the GNU AFFERO GENERAL PUBLIC LICENSE,
+# Version 3.0 (the "License") available at https://www.gnu.org/licenses/agpl-3.0.en.html.
+# You may not use this file except in compliance with the License.
+
+import asyncio
+from collections.abc import Awaitable
+from collections.abc import Callable
+from collections.abc import Hashable
+from typing import Any
+from uuid import UUID
+
+from common import ProjectClient
+
+from app.components.request.http_client import HTTPClient
+from app.logger import logger
+from app.resources.helpers import get_attribute_templates
+from app.resources.helpers import get_dataset
+from app.resources.helpers import get_item_by_id
+from app.resources.helpers import get_user_projects
+
+
+class RequestMemo:
+    """Memo of upstream entities which lives only as long as the request it belongs to.
+
+    Helpers asking for the same entity within one request receive the already fetched object and the number of
+    upstream calls avoided this way is counted in saved_calls.
+    """
+
+    def __init__(self) -> None:
+        self._entries: dict[tuple[str, Hashable], asyncio.Future] = {}
+        self.saved_calls = 0
+
+    async def memoize(self, namespace: str, key: Hashable, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """Return the entity from the memo or fetch it using factory, concurrent callers share one lookup."""
+
+        memo_key = (namespace, key)
+        if memo_key in self._entries:
+            self.saved_calls += 1
+            logger.info(f'Reusing memoized {namespace} "{key}", saved {self.saved_calls} upstream calls')
+        else:
+            self._entries[memo_key] = asyncio.ensure_future(factory())
+
+        return await self._entries[memo_key]
+
+    async def get_item(self, item_id: str) -> dict[str, Any] | None:
+        """Get item from the metadata service by id."""
+
+        return await self.memoize('item', item_id, lambda: get_item_by_id(item_id))
+
+    async def get_user_projects(self, current_identity: dict[str, Any]) -> list[dict[str, str]]:
+        """Get projects the user has access to."""
+
+        key = (current_identity['username'], current_identity['role'], tuple(current_identity['realm_roles']))
+        return await self.memoize('user_projects', key, lambda: get_user_projects(current_identity))
+
+    async def get_attribute_templates(self, project_code: str, manifest_name: str | None = None) -> dict | None:
+        """Get attribute templates of the project optionally filtered by manifest name."""
+
+        return await self.memoize(
+            'attribute_templates',
+            (project_code, manifest_name),
+            lambda: get_attribute_templates(project_code, manifest_name),
+        )
+
+    async def get_dataset(self, client: HTTPClient, dataset_code: str) -> dict[str, Any] | None:
+        """Get dataset from the dataset service by code."""
+
+        return await self.memoize('dataset', dataset_code, lambda: get_dataset(client, dataset_code))
+
+    async def get_project(self, project_client: ProjectClient, code: str) -> Any:
+        """Get project from the project service by code."""
+
+        return await self.memoize('project', code, lambda: project_client.get(code=code))
+
+    async def get_project_ids(self, project_client: ProjectClient, codes: list[str]) -> list[UUID]:
+        """Get ids of the projects from the project service by codes."""
+
+        projects = await asyncio.gather(*(self.get_project(project_client, code) for code in codes))
+        return [UUID(project.id) for project in projects]
@@ -0,0 +1,82 @@
+# Copyright (C) 2022-Present Indoc Systems
+#
+# Licensed under the GNU AFFERO GENERAL PUBLIC LICENSE,
+# Version 3.0 (the "License") available at https://www.gnu.org/licenses/agpl-3.0.en.html.
+# You may not use this file except in compliance with the License.
+
+import json
+from collections.abc import AsyncIterable
+from collections.abc import AsyncIterator
+from typing import Any
+
+from fastapi import Request
+from fastapi.responses import StreamingResponse
+
+from app.logger import logger
+
+NDJSON_MEDIA_TYPE = 'application/x-ndjson'
+
+
+def accepts_ndjson(request: Request) -> bool:
+    """Return true if the client opted in for newline delimited JSON response."""
+
+    return NDJSON_MEDIA_TYPE in request.headers.get('accept', '')
+
+
+class NDJSONResponse(StreamingResponse):
+    """Response that sends each record of the async iterable as a separate JSON line as soon as it is available."""
+
+    media_type = NDJSON_MEDIA_TYPE
+
+    def __init__(self, records: AsyncIterable[dict[str, Any]], status_code: int = 200, **kwargs: Any) -> None:
+        super().__init__(self.encode(records), status_code=status_code, media_type=self.media_type, **kwargs)
+
+    @staticmethod
+    async def encode(records: AsyncIterable[dict[str, Any]]) -> AsyncIterator[bytes]:
+        try:
+            async for record in records:
+                yield json.dumps(record).encode('utf-8') + b'\n'
+        except Exception:
+            logger.exception('Failed to stream records')
+            raise
+
+
+async def iter_ndjson(chunks: AsyncIterable[bytes], max_line_size: int) -> AsyncIterator[Any]:
+    """Parse newline delimited JSON records from the byte chunks as soon as each line is complete.
+
+    Only the incomplete line is buffered between chunks. Raises ValueError if a line is longer than max_line_size
+    bytes.
+    """
+
+    buffer = bytearray()
+    async for chunk in chunks:
+        *lines, rest = chunk.split(b'\n')
+        for line in lines:
+            buffer += line
+            if len(buffer) > max_line_size:
+                break
+            if buffer.strip():
+                yield json.loads(buffer)
+            buffer.clear()
+        else:
+            buffer += rest
+
+        if len(buffer) > max_line_size:
+            raise ValueError(f'line longer than {max_line_size} bytes')
+
+    if buffer.strip():
+        yield json.loads(buffer)
+
+
+async def iter_batches(records: AsyncIterable[Any], size: int) -> AsyncIterator[list[Any]]:
+    """Group records of the async iterable into lists of at most size records."""
+
+    batch = []
+    async for record in records:
+        batch.append(record)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+
+    if batch:
+        yield batch
@@ -0,0 +1,86 @@
+# Copyright (C) 2022-Present Indoc Systems
+#
+# Licensed under the GNU AFFERO GENERAL PUBLIC LICENSE,
+# Version 3.0 (the "License") available at https://www.gnu.org/licenses/agpl-3.0.en.html.
+# You may not use this file except in compliance with the License.
+
+import base64
+import json
+from datetime import datetime
+from datetime import timedelta
+from datetime import timezone
+from typing import NamedTuple
+
+SYNC_CURSOR_HEADER = 'X-Sync-Cursor'
+SYNC_PAGE_CURSOR_HEADER = 'X-Sync-Page-Cursor'
+
+
+def to_naive_utc(value: datetime) -> datetime:
+    """Convert datetime into naive UTC datetime the way metadata service stores modification times."""
+
+    if value.tzinfo:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def encode_sync_cursor(synced_at: datetime, until: datetime | None = None) -> str:
+    payload = {'synced_at': synced_at.isoformat()}
+    if until:
+        payload['until'] = until.isoformat()
+    return base64.urlsafe_b64encode(json.dumps(payload).encode('utf-8')).decode('ascii')
+
+
+def decode_sync_cursor_payload(cursor: str) -> tuple[datetime, datetime | None]:
+    """Return the start and the pinned end of the window stored in the cursor or raise ValueError when it is invalid."""
+
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        until = to_naive_utc(datetime.fromisoformat(payload['until'])) if payload.get('until') else None
+        return to_naive_utc(datetime.fromisoformat(payload['synced_at'])), until
+    except (ValueError, TypeError, KeyError, AttributeError) as e:
+        raise ValueError(f'Invalid sync cursor "{cursor}"') from e
+
+
+def decode_sync_cursor(cursor: str) -> datetime:
+    """Return the time of the previous sync stored in the cursor or raise ValueError when cursor is invalid."""
+
+    return decode_sync_cursor_payload(cursor)[0]
+
+
+class SyncWindow(NamedTuple):
+    """Range of modification times covered by one incremental listing.
+
+    The window ends lag seconds in the past, so items which are not visible in the search yet or are stamped by a
+    slightly skewed clock of the metadata service are covered by the next window instead of being missed. The page
+    cursor pins the end of the window, so all pages of one sync come from the same result set.
+    """
+
+    start: datetime
+    end: datetime
+
+    @classmethod
+    def open(cls, modified_since: datetime | None, cursor: str | None, lag: float = 0) -> 'SyncWindow':
+        """Open the window from the previous sync until lag seconds ago.
+
+        The cursor takes precedence over modified_since and the end pinned in a page cursor is kept.
+        """
+
+        if cursor:
+            start, end = decode_sync_cursor_payload(cursor)
+        else:
+            start, end = to_naive_utc(modified_since), None
+        if end is None:
+            end = max(start, to_naive_utc(datetime.now(timezone.utc)) - timedelta(seconds=lag))
+        return cls(start, end)
+
+    @property
+    def params(self) -> dict[str, str]:
+        return {'last_updated_start': self.start.isoformat(), 'last_updated_end': self.end.isoformat()}
+
+    @property
+    def next_cursor(self) -> str:
+        return encode_sync_cursor(self.end)
+
+    @property
+    def page_cursor(self) -> str:
+        return encode_sync_cursor(self.start, self.end)
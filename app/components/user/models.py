@@ -7,6 +7,7 @@
 from typing import Any
 from uuid import UUID
 
+from app.components.request.memo import RequestMemo
 from app.components.types import StrEnum
 from app.services.project.client import ProjectServiceClient
 
@@ -71,8 +72,16 @@ class CurrentUser(dict[str, Any]):
 
         return [code for code, role in self.get_project_roles().items() if role == matching_role]
 
-    async def can_access_dataset(self, dataset: dict[str, Any], project_service_client: ProjectServiceClient) -> bool:
-        """Return true if the user has permission to access the dataset."""
+    async def can_access_dataset(
+        self,
+        dataset: dict[str, Any],
+        project_service_client: ProjectServiceClient,
+        memo: RequestMemo | None = None,
+    ) -> bool:
+        """Return true if the user has permission to access the dataset.
+
+        Projects are fetched through the request memo when it is given, so they are shared with the rest of the request.
+        """
 
         if dataset['creator'] == self.username:
             return True
@@ -82,6 +91,9 @@ class CurrentUser(dict[str, Any]):
             return False
 
         user_project_codes = self.get_projects_with_role('admin')
-        user_project_ids = await project_service_client.convert_project_codes_into_ids(user_project_codes)
+        if memo is None:
+            user_project_ids = await project_service_client.convert_project_codes_into_ids(user_project_codes)
+        else:
+            user_project_ids = await memo.get_project_ids(project_service_client, user_project_codes)
 
         return UUID(dataset_project_id) in user_project_ids
@@ -27,6 +27,14 @@ class Settings(BaseSettings):
     ATLAS_ADMIN: str = ''
     ATLAS_PASSWD: str = ''
     ATLAS_ENTITY_TYPE: str = ''
+    ATLAS_TIMEOUT: int = 60
+    ATLAS_BULK_SIZE: int = 500
+    LINEAGE_BATCH_MAX_SIZE: int = 10000
+    LINEAGE_SPOOL_ENABLED: bool = False
+    LINEAGE_SPOOL_BATCH_SIZE: int = 500
+    LINEAGE_SPOOL_INTERVAL: float = 1
+    LINEAGE_SPOOL_MAX_INTERVAL: float = 300
+    LINEAGE_SPOOL_MAX_ATTEMPTS: int = 10
 
     CLI_SECRET: str = ''
     CLI_PUBLIC_KEY_PATH: str = ''
@@ -48,6 +56,49 @@ class Settings(BaseSettings):
     METADATA_SERVICE: str = 'http://127.0.0.1:5065'
     PROJECT_SERVICE: str = 'http://127.0.0.1:5064'
 
+    METADATA_BATCH_QUERY_SIZE: int = 100
+    METADATA_BATCH_QUERY_CONCURRENCY: int = 5
+
+    FOLDER_TREE_CONCURRENCY: int = 5
+    FOLDER_TREE_MAX_DEPTH: int = 20
+    FOLDER_TREE_PAGE_SIZE: int = 500
+
+    ITEM_PATH_CACHE_TTL: int = 10
+    ITEM_PATH_CACHE_MAX_SIZE: int = 10000
+    ITEM_PATH_CHECK_MAX_PATHS: int = 10000
+
+    FOLDER_SUMMARY_CACHE_TTL: int = 60
+    FOLDER_SUMMARY_CACHE_MAX_SIZE: int = 1000
+
+    PAGE_PREFETCH_TTL: int = 5
+    PAGE_PREFETCH_MAX_SIZE: int = 200
+    PAGE_PREFETCH_MAX_PAGE_SIZE: int = 1000
+
+    SYNC_WINDOW_LAG: int = 5
+
+    PREUPLOAD_CHUNK_SIZE: int = 1000
+    PREUPLOAD_CHUNK_CONCURRENCY: int = 4
+    PREUPLOAD_CHUNK_TIMEOUT: int = 120
+    PREUPLOAD_JOB_TTL: int = 86400
+    PREUPLOAD_JOB_MAX_RUNTIME: int = 3600
+    PREUPLOAD_JOB_HEARTBEAT_INTERVAL: float = 5
+    PREUPLOAD_BATCH_MAX_JOBS: int = 100
+    PREUPLOAD_BATCH_CONCURRENCY: int = 4
+
+    PREDOWNLOAD_CHUNK_SIZE: int = 500
+    PREDOWNLOAD_CHUNK_CONCURRENCY: int = 4
+    PREDOWNLOAD_CHUNK_TIMEOUT: int = 120
+    PREDOWNLOAD_MAX_FILES: int = 100000
+    PREDOWNLOAD_MAX_LINE_SIZE: int = 4096
+
+    IDEMPOTENCY_KEY_TTL: int = 86400
+    IDEMPOTENCY_LOCK_TTL: int = 300
+    IDEMPOTENCY_POLL_INTERVAL: float = 0.5
+
+    COMPRESSION_ENABLED: bool = True
+    COMPRESSION_MINIMUM_SIZE: int = 1024
+    COMPRESSION_LEVEL: int = 6
+
     ENABLE_CACHE: bool = True
 
     REDIS_HOST: str = '127.0.0.1'
@@ -4,6 +4,8 @@
 # Version 3.0 (the "License") available at https://www.gnu.org/licenses/agpl-3.0.en.html.
 # You may not use this file except in compliance with the License.
 
+from contextlib import asynccontextmanager
+
 from common import configure_logging
 from fastapi import FastAPI
 from fastapi import Request
@@ -18,8 +20,12 @@ from opentelemetry.sdk.resources import Resource
 from opentelemetry.sdk.trace import TracerProvider
 from opentelemetry.sdk.trace.export import BatchSpanProcessor
 
+from app.components.compression import CompressionMiddleware
+from app.components.lineage_spool import get_lineage_spool
+from app.components.preupload_jobs import get_preupload_job_tracker
 from app.config import ConfigClass
 from app.namespace import namespace
+from app.resources.dependencies import get_lineage_client
 from app.resources.error_handler import APIException
 
 from .api_registry import api_registry
@@ -41,9 +47,41 @@ def instrument_app(app) -> None:
     HTTPXClientInstrumentor().instrument()
 
 
+async def close_lineage_client() -> None:
+    if get_lineage_client.cache_info().currsize:
+        await get_lineage_client().aclose()
+        get_lineage_client.cache_clear()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Run the lineage spool worker while the application is running if the spool is enabled.
+
+    On shutdown, the preupload jobs still running are cancelled and saved as failed, and the connection pool of the
+    shared lineage client is closed.
+    """
+    spool = get_lineage_spool() if ConfigClass.LINEAGE_SPOOL_ENABLED else None
+    if spool:
+        spool.start(get_lineage_client())
+    try:
+        yield
+    finally:
+        if get_preupload_job_tracker.cache_info().currsize:
+            await get_preupload_job_tracker().stop()
+        if spool:
+            await spool.stop()
+        await close_lineage_client()
+
+
 def create_app():
     """Create app function."""
-    app = FastAPI(title='BFF CLI', description='BFF for cli', docs_url='/v1/api-doc', version=ConfigClass.version)
+    app = FastAPI(
+        title='BFF CLI',
+        description='BFF for cli',
+        docs_url='/v1/api-doc',
+        version=ConfigClass.version,
+        lifespan=lifespan,
+    )
 
     configure_logging(ConfigClass.LOGGING_LEVEL, ConfigClass.LOGGING_FORMAT)
 
@@ -55,6 +93,13 @@ def create_app():
         allow_headers=['*'],
     )
 
+    if ConfigClass.COMPRESSION_ENABLED:
+        app.add_middleware(
+            CompressionMiddleware,
+            minimum_size=ConfigClass.COMPRESSION_MINIMUM_SIZE,
+            level=ConfigClass.COMPRESSION_LEVEL,
+        )
+
     @app.exception_handler(APIException)
     async def http_exception_handler(request: Request, exc: APIException):
         return JSONResponse(
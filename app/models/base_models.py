@@ -5,19 +5,35 @@
 # You may not use this file except in compliance with the License.
 
 from enum import Enum
+from typing import Any
 
+import orjson
 from fastapi.responses import JSONResponse
 from pydantic import BaseModel
+from pydantic.json import pydantic_encoder
 
 
 class EAPIResponseCode(Enum):
     success = 200
+    accepted = 202
+    multi_status = 207
     internal_error = 500
     bad_request = 400
     not_found = 404
     forbidden = 403
     unauthorized = 401
     conflict = 409
+    unprocessable_entity = 422
+
+
+class APIJSONResponse(JSONResponse):
+    """JSON response encoded with orjson.
+
+    Values which are not natively serializable, like nested pydantic models, are encoded the same way as by pydantic.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, default=pydantic_encoder, option=orjson.OPT_NON_STR_KEYS)
 
 
 class APIResponse(BaseModel):
@@ -26,6 +42,6 @@ class APIResponse(BaseModel):
     result = []
 
     def json_response(self):
-        data = self.dict()
+        data = {name: getattr(self, name) for name in self.__fields__}
         data['code'] = self.code.value
-        return JSONResponse(status_code=self.code.value, content=data)
+        return APIJSONResponse(status_code=self.code.value, content=data)
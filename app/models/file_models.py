@@ -28,6 +28,33 @@ class ItemStatus(str, Enum):
         return f'{self.name}'
 
 
+class FolderTreeOrder(str, Enum):
+    """The order of items returned by the folder tree walk.
+
+    - PATH means items are returned depth first with the items of each folder sorted by name.
+    - DISCOVERY means items are returned as soon as their folder is listed.
+    """
+
+    PATH = 'path'
+    DISCOVERY = 'discovery'
+
+
+class GetFolderSummaryResponse(APIResponse):
+    result: dict = Field(
+        {},
+        example={
+            'code': 200,
+            'error_msg': '',
+            'result': {
+                'file_count': 120,
+                'folder_count': 8,
+                'total_size': 1048576,
+                'last_updated_time': '2022-04-13 18:17:51.008227',
+            },
+        },
+    )
+
+
 class GetProjectFileList(BaseModel):
     project_code: str
     zone: str
@@ -24,3 +24,13 @@ class LineageCreateResponse(APIResponse):
     """Lineage Creation Response class."""
 
     result: dict = Field({}, example={'message': 'Succeed'})
+
+
+class LineageBatchCreatePost(BaseModel):
+    lineages: list[LineageCreatePost]
+
+
+class LineageBatchCreateResponse(APIResponse):
+    """Lineage Batch Creation Response class, with the number of created lineages also when the creation failed."""
+
+    result: dict = Field({}, example={'created': 2})
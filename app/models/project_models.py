@@ -4,9 +4,11 @@
 # Version 3.0 (the "License") available at https://www.gnu.org/licenses/agpl-3.0.en.html.
 # You may not use this file except in compliance with the License.
 
+from enum import Enum
 from typing import Any
 
 from pydantic import BaseModel
+from pydantic import Extra
 from pydantic import Field
 
 from .base_models import APIResponse
@@ -32,6 +34,25 @@ class POSTProjectFileResponse(APIResponse):
     result: dict = Field({}, example={'code': 200, 'error_msg': '', 'result': {}})
 
 
+class PreuploadJobResponse(APIResponse):
+    result: dict = Field(
+        {},
+        example={
+            'code': 200,
+            'error_msg': '',
+            'result': {
+                'job_id': '7b5c2a54-5d51-4b3e-a8a6-bf8a0b3b8d4e',
+                'project_code': 'sampleproject',
+                'username': 'admin',
+                'status': 'SUCCEEDED',
+                'code': 200,
+                'error_msg': '',
+                'result': {},
+            },
+        },
+    )
+
+
 class ResumableResponse(APIResponse):
     result: dict
 
@@ -46,29 +67,87 @@ class POSTProjectFile(BaseModel):
     folder_tags: list[str] = []
 
 
+class POSTProjectFileBatch(BaseModel):
+    """Pre upload jobs into the same zone sent in one request."""
+
+    zone: str
+    jobs: list[POSTProjectFile]
+
+
+class POSTProjectFileBatchResponse(APIResponse):
+    result: list = Field(
+        [],
+        example=[
+            {'code': 200, 'error_msg': '', 'result': {}},
+            {'code': 403, 'error_msg': 'Unauthorized upload action on project sampleproject', 'result': {}},
+        ],
+    )
+
+
 class ResumableUploadPOST(BaseModel):
-    """Pre upload payload model."""
+    """Resumable upload parameters, the raw request body is relayed to the upload service so no other fields are
+    allowed."""
 
     class ObjectInfo(BaseModel):
         object_path: str
         resumable_id: str
         item_id: str
 
+        class Config:
+            extra = Extra.forbid
+
     bucket: str
     zone: str
     object_infos: list[ObjectInfo]
 
+    class Config:
+        extra = Extra.forbid
+
 
 class PreDownloadProjectFile(BaseModel):
+    """Pre download parameters, the raw request body is relayed to the download service so no other fields are
+    allowed."""
+
     class DownloadFileList(BaseModel):
         id: str
 
+        class Config:
+            extra = Extra.forbid
+
     files: list[DownloadFileList]
     zone: str
     operator: str
     container_code: str
     container_type: str
 
+    class Config:
+        extra = Extra.forbid
+
+
+class PreDownloadProjectFileStream(BaseModel):
+    """Pre download parameters of files whose ids are streamed in the request body."""
+
+    zone: str
+    operator: str
+    container_code: str
+    container_type: str
+
+
+class POSTProjectFileDownloadStreamResponse(APIResponse):
+    """Download jobs created for every chunk of the streamed files together with the chunks which failed."""
+
+    result: dict = Field(
+        {},
+        example={
+            'code': 200,
+            'error_msg': '',
+            'result': {
+                'jobs': [{'job_id': 'data-download-1650000000'}],
+                'failed_chunks': [{'chunk': 1, 'files': 500, 'status_code': 500, 'error_msg': 'error'}],
+            },
+        },
+    )
+
 
 class GetProjectRoleResponse(APIResponse):
     result: dict = Field({}, example={'code': 200, 'error_msg': '', 'result': 'role'})
@@ -81,6 +160,13 @@ class GetProjectFolder(BaseModel):
     relative_path: str
 
 
+class ItemSearchMatch(str, Enum):
+    """Which of the matching items are returned by the item search."""
+
+    FIRST = 'first'
+    ALL = 'all'
+
+
 class GetProjectFolderResponse(APIResponse):
     result: dict = Field(
         {},
@@ -103,3 +189,27 @@ class GetProjectFolderResponse(APIResponse):
             },
         },
     )
+
+
+class POSTProjectItemPaths(BaseModel):
+    """Relative paths of items to check in the project."""
+
+    zone: str
+    container_type: str = 'project'
+    paths: list[str]
+
+
+class POSTProjectItemPathsResponse(APIResponse):
+    result: list = Field(
+        [],
+        example=[
+            {
+                'path': 'admin/folder/file.txt',
+                'exists': True,
+                'id': '96510da0-22f4-4487-ac88-71cd48967c8d',
+                'type': 'file',
+                'status': 'ACTIVE',
+            },
+            {'path': 'admin/folder/new.txt', 'exists': False, 'id': None, 'type': None, 'status': None},
+        ],
+    )
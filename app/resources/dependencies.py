@@ -4,7 +4,9 @@
 # Version 3.0 (the "License") available at https://www.gnu.org/licenses/agpl-3.0.en.html.
 # You may not use this file except in compliance with the License.
 
+import asyncio
 import time
+from functools import lru_cache
 
 import httpx
 import jwt as pyjwt
@@ -137,6 +139,14 @@ def select_url_by_zone(zone):
     return url
 
 
+def select_download_url_by_zone(zone):
+    if zone == ConfigClass.GREEN_ZONE_LABEL.lower():
+        url = ConfigClass.DOWNLOAD_SERVICE_GREENROOM + '/v2/download/pre/'
+    else:
+        url = ConfigClass.DOWNLOAD_SERVICE_CORE + '/v2/download/pre/'
+    return url
+
+
 async def transfer_to_pre(data, project_code, headers):
     try:
         logger.info('transfer_to_pre'.center(80, '-'))
@@ -149,6 +159,9 @@ async def transfer_to_pre(data, project_code, headers):
             'job_type': data.job_type,
         }
         url = select_url_by_zone(data.zone)
+        # folder jobs create the folder structure, so they are sent in one request
+        if data.job_type == 'AS_FILE' and len(data.data) > ConfigClass.PREUPLOAD_CHUNK_SIZE:
+            return await transfer_chunks_to_pre(url, payload, headers)
         async with httpx.AsyncClient() as client:
             result = await client.post(url, headers=headers, json=payload, timeout=None)
             logger.info(f'pre response: {result.text}')
@@ -158,7 +171,91 @@ async def transfer_to_pre(data, project_code, headers):
         raise e
 
 
-async def get_lineage_client() -> LineageClient:
-    """Create a callable dependency for Lineage client instance."""
-    client = LineageClient()
-    yield client
+async def transfer_chunks_to_pre(url, payload, headers):
+    """
+    Summary:
+        the helper function to split the large AS_FILE pre upload job
+        into chunks of PREUPLOAD_CHUNK_SIZE files, send them concurrently
+        to the upload service and merge the responses. AS_FOLDER jobs
+        must not be chunked, since every chunk would create the same
+        folders concurrently.
+    Parameter:
+        - url(str): the url of upload service in the zone
+        - payload(dict): the pre upload payload with all files in data
+        - headers(dict): the headers forwarded to upload service
+    return:
+        - response(httpx.Response): the merged response, when some of the
+          chunks fail the result contains created jobs and failed chunks,
+          the status is 207 if any chunk succeeded, 409 if all chunks
+          conflicted and 500 otherwise
+    """
+    data = payload['data']
+    chunk_size = ConfigClass.PREUPLOAD_CHUNK_SIZE
+    chunks = [data[index : index + chunk_size] for index in range(0, len(data), chunk_size)]
+    logger.info(f'Sending {len(data)} files to pre upload in {len(chunks)} chunks')
+
+    semaphore = asyncio.Semaphore(ConfigClass.PREUPLOAD_CHUNK_CONCURRENCY)
+    async with httpx.AsyncClient(timeout=ConfigClass.PREUPLOAD_CHUNK_TIMEOUT) as client:
+
+        async def send_chunk(chunk):
+            async with semaphore:
+                try:
+                    return await client.post(url, headers=headers, json={**payload, 'data': chunk})
+                except httpx.HTTPError as e:
+                    return e
+
+        responses = await asyncio.gather(*(send_chunk(chunk) for chunk in chunks))
+
+    return merge_chunk_responses([len(chunk) for chunk in chunks], responses)
+
+
+def get_error_msg(response):
+    try:
+        return response.json().get('error_msg')
+    except ValueError:
+        return response.text
+
+
+def merge_chunk_responses(chunk_sizes, responses):
+    jobs = []
+    failed_chunks = []
+    for number, (chunk_size, response) in enumerate(zip(chunk_sizes, responses)):
+        if isinstance(response, Exception):
+            status_code, error_msg = EAPIResponseCode.internal_error.value, str(response)
+        elif response.status_code != 200:
+            status_code, error_msg = response.status_code, get_error_msg(response)
+        else:
+            result = response.json().get('result') or []
+            jobs.extend(result if isinstance(result, list) else [result])
+            continue
+        logger.error(f'Chunk {number} failed with {status_code}: {error_msg}')
+        failed_chunks.append({'chunk': number, 'files': chunk_size, 'status_code': status_code, 'error_msg': error_msg})
+
+    if not failed_chunks:
+        return httpx.Response(200, json={'code': 200, 'error_msg': '', 'result': jobs})
+
+    conflict = all(failed['status_code'] == EAPIResponseCode.conflict.value for failed in failed_chunks)
+    if len(failed_chunks) < len(chunk_sizes):
+        # jobs of the successful chunks were already created, so the failure is only partial
+        status_code = EAPIResponseCode.multi_status.value
+    elif conflict:
+        status_code = EAPIResponseCode.conflict.value
+    else:
+        status_code = EAPIResponseCode.internal_error.value
+    error_msg = f'{len(failed_chunks)} of {len(chunk_sizes)} chunks failed: ' + '; '.join(
+        f'chunk {failed["chunk"]}: {failed["error_msg"]}' for failed in failed_chunks
+    )
+    return httpx.Response(
+        status_code,
+        json={
+            'code': status_code,
+            'error_msg': error_msg,
+            'result': {'jobs': jobs, 'failed_chunks': failed_chunks},
+        },
+    )
+
+
+@lru_cache(1)
+def get_lineage_client() -> LineageClient:
+    """Get Lineage client with connection pool shared by the whole application."""
+    return LineageClient()
@@ -0,0 +1,143 @@
+# Copyright (C) 2022-Present Indoc Systems
+#
+# Licensed under the GNU AFFERO GENERAL PUBLIC LICENSE,
+# Version 3.0 (the "License") available at https://www.gnu.org/licenses/agpl-3.0.en.html.
+# You may not use this file except in compliance with the License.
+
+import asyncio
+from collections import deque
+from collections.abc import AsyncIterator
+from typing import Any
+
+from fastapi import Request
+
+from app.logger import logger
+from app.models.file_models import FolderTreeOrder
+from app.resources.helpers import iter_query_file_folder_pages
+
+FolderListing = tuple[list[dict[str, Any]], int]
+
+
+class FolderTreeWalker:
+    """Walk folder tree in the metadata service expanding subfolders concurrently.
+
+    At most concurrency folders are listed at the same time and folders deeper than max_depth are not expanded, the
+    whole tree is walked when max_depth is None.
+    Subfolders are listed only when there is a free slot, so at most concurrency listings are kept in memory besides
+    the folders on the current path.
+    """
+
+    expandable_types = {'folder', 'name_folder'}
+
+    def __init__(
+        self, params: dict[str, Any], request: Request, *, max_depth: int | None, concurrency: int, page_size: int
+    ) -> None:
+        self.params = {**params, 'page': 0, 'page_size': page_size}
+        self.request = request
+        self.max_depth = max_depth
+        self.concurrency = concurrency
+        self.semaphore = asyncio.Semaphore(concurrency)
+
+        self._tasks: set[asyncio.Task] = set()
+        self._prefetched = 0
+
+    @staticmethod
+    def get_item_path(item: dict[str, Any]) -> str:
+        parent_path = item.get('parent_path')
+        return f'{parent_path}/{item["name"]}' if parent_path else item['name']
+
+    def is_expandable(self, item: dict[str, Any], depth: int) -> bool:
+        return item.get('type') in self.expandable_types and (self.max_depth is None or depth < self.max_depth)
+
+    async def list_folder(self, parent_path: str, depth: int) -> FolderListing:
+        """Return all items within the folder together with their depth."""
+
+        params = dict(self.params)
+        if parent_path:
+            params['parent_path'] = parent_path
+
+        items = []
+        async with self.semaphore:
+            async for page in iter_query_file_folder_pages(params, self.request):
+                if page.get('code') != 200:
+                    raise Exception(f'Error Getting Folder: {page.get("error_msg")}')
+                items.extend(page.get('result'))
+
+        return items, depth + 1
+
+    def _spawn(self, parent_path: str, depth: int) -> asyncio.Task:
+        task = asyncio.ensure_future(self.list_folder(parent_path, depth))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async def _walk_in_discovery_order(self, root: FolderListing) -> AsyncIterator[dict[str, Any]]:
+        waiting: deque[tuple[str, int]] = deque()
+        running = set()
+        listings = [root]
+        while listings or running:
+            for items, depth in listings:
+                for item in items:
+                    yield item
+                    if self.is_expandable(item, depth):
+                        waiting.append((self.get_item_path(item), depth))
+            while waiting and len(running) < self.concurrency:
+                running.add(self._spawn(*waiting.popleft()))
+            listings = []
+            if running:
+                done, running = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                listings = [task.result() for task in done]
+
+    async def _walk_in_path_order(self, listing: FolderListing) -> AsyncIterator[dict[str, Any]]:
+        items, depth = listing
+        items = sorted(items, key=lambda item: item['name'])
+        expandable = [index for index, item in enumerate(items) if self.is_expandable(item, depth)]
+        subfolders = {}
+        spawned = 0
+        for index, item in enumerate(items):
+            yield item
+            if not self.is_expandable(item, depth):
+                continue
+
+            # list the following subfolders in advance while there are free slots
+            while spawned < len(expandable) and (expandable[spawned] <= index or self._prefetched < self.concurrency):
+                subfolders[expandable[spawned]] = self._spawn(self.get_item_path(items[expandable[spawned]]), depth)
+                self._prefetched += 1
+                spawned += 1
+
+            subfolder = await subfolders.pop(index)
+            self._prefetched -= 1
+            async for subfolder_item in self._walk_in_path_order(subfolder):
+                yield subfolder_item
+
+    async def walk(self, root: FolderListing, order: FolderTreeOrder) -> AsyncIterator[dict[str, Any]]:
+        """Yield items of the tree starting from the root folder listing."""
+
+        walk = self._walk_in_path_order if order == FolderTreeOrder.PATH else self._walk_in_discovery_order
+        count = 0
+        try:
+            async for item in walk(root):
+                count += 1
+                yield item
+        finally:
+            for task in list(self._tasks):
+                task.cancel()
+            logger.info(f'Folder tree walk yielded {count} items')
+
+    async def summarize(self, folder: str) -> dict[str, Any]:
+        """Aggregate number of files and folders, total size and latest modification time of the folder tree."""
+
+        summary = {'file_count': 0, 'folder_count': 0, 'total_size': 0, 'last_updated_time': None}
+        async for item in self.walk(await self.list_folder(folder, 0), FolderTreeOrder.DISCOVERY):
+            if item.get('type') == 'file':
+                summary['file_count'] += 1
+                summary['total_size'] += item.get('size') or 0
+            else:
+                summary['folder_count'] += 1
+            last_updated_time = item.get('last_updated_time')
+            if last_updated_time and (
+                not summary['last_updated_time'] or last_updated_time > summary['last_updated_time']
+            ):
+                summary['last_updated_time'] = last_updated_time
+
+        return summary
@@ -4,6 +4,8 @@
 # Version 3.0 (the "License") available at https://www.gnu.org/licenses/agpl-3.0.en.html.
 # You may not use this file except in compliance with the License.
 
+import asyncio
+
 import httpx
 from common.project.project_client import ProjectClient
 
@@ -38,34 +40,98 @@ async def get_item_by_id(item_id: str) -> dict:
     return response.json().get('result')
 
 
-async def batch_query_node_by_geid(geid_list):
-    logger.info('batch_query_node_by_geid'.center(80, '-'))
-    params = {'ids': geid_list}
-    logger.info(f'params: {params}')
-    async with httpx.AsyncClient() as client:
-        response = await client.get(
-            ConfigClass.METADATA_SERVICE + '/v1/items/batch/',
-            params=params,
-            follow_redirects=True,
-        )
-    logger.info(response.url)
-    logger.info(f'query response: {response.text}')
-    res_json = response.json()
-    logger.info(f'res_json: {res_json}')
-    result = res_json.get('result')
+def split_geid_into_chunks(geid_list, unique=True):
+    if unique:
+        geid_list = list(dict.fromkeys(geid_list))
+    chunk_size = ConfigClass.METADATA_BATCH_QUERY_SIZE
+    return [geid_list[i : i + chunk_size] for i in range(0, len(geid_list), chunk_size)]
+
+
+async def query_node_chunk_by_geid(client, chunk):
+    response = await client.get(
+        ConfigClass.METADATA_SERVICE + '/v1/items/batch/',
+        params={'ids': chunk},
+        follow_redirects=True,
+    )
+    logger.info(f'query response: {response.url}')
+    requested_geid = set(chunk)
     located_geid = []
     query_result = {}
-    for node in result:
+    for node in response.json().get('result'):
         geid = node.get('id', '')
         status = node.get('status')
-        if geid in geid_list and status != ItemStatus.ARCHIVED:
+        if geid in requested_geid and status != ItemStatus.ARCHIVED:
             located_geid.append(geid)
             query_result[geid] = node
+    return located_geid, query_result
+
+
+async def batch_query_node_by_geid(geid_list):
+    """
+    Summary:
+        the helper function to get the items by list of ids. The ids are
+        split into chunks of METADATA_BATCH_QUERY_SIZE which are fetched
+        concurrently and merged back in the order of the chunks.
+    Parameter:
+        - geid_list(list): the unique identifiers of items
+    Return:
+        - located_geid(list): ids of found items which are not archived
+        - query_result(dict): the pair of id: item detail
+    """
+    logger.info('batch_query_node_by_geid'.center(80, '-'))
+    chunks = split_geid_into_chunks(geid_list)
+    logger.info(f'Querying {len(geid_list)} ids in {len(chunks)} chunks')
+    semaphore = asyncio.Semaphore(ConfigClass.METADATA_BATCH_QUERY_CONCURRENCY)
+
+    async def query_chunk(client, chunk):
+        async with semaphore:
+            return await query_node_chunk_by_geid(client, chunk)
+
+    async with httpx.AsyncClient() as client:
+        results = await asyncio.gather(*(query_chunk(client, chunk) for chunk in chunks))
+
+    located_geid = []
+    query_result = {}
+    for chunk_located_geid, chunk_query_result in results:
+        located_geid.extend(chunk_located_geid)
+        query_result.update(chunk_query_result)
     logger.info(f'returning located_geid: {located_geid}')
-    logger.info(f'returning query_result: {query_result}')
     return located_geid, query_result
 
 
+async def iter_batch_query_node_by_geid(geid_list):
+    """
+    Summary:
+        the helper function to get the items by list of ids chunk by chunk.
+        The next chunk is fetched while the current one is being consumed,
+        so at most two chunks are held in memory. The chunks keep the order
+        and duplicates of the ids, only the query of each chunk is unique.
+    Parameter:
+        - geid_list(list): the identifiers of items
+    Yield:
+        - chunk(list): ids of the chunk as requested
+        - located_geid(list): ids of found items in the chunk which are not archived
+        - query_result(dict): the pair of id: item detail
+    """
+    logger.info('iter_batch_query_node_by_geid'.center(80, '-'))
+    chunks = split_geid_into_chunks(geid_list, unique=False)
+    async with httpx.AsyncClient() as client:
+        pending = []
+        try:
+            for chunk in chunks:
+                query = query_node_chunk_by_geid(client, list(dict.fromkeys(chunk)))
+                pending.append((chunk, asyncio.ensure_future(query)))
+                if len(pending) > 1:
+                    current_chunk, task = pending.pop(0)
+                    yield current_chunk, *await task
+            while pending:
+                current_chunk, task = pending.pop(0)
+                yield current_chunk, *await task
+        finally:
+            for _, task in pending:
+                task.cancel()
+
+
 async def get_dataset(client: HTTPClient, dataset_code):
     """Get dataset node information."""
     logger.info('get_dataset'.center(80, '-'))
@@ -143,6 +209,55 @@ async def query_file_folder(params, request):
         raise
 
 
+def has_next_page(response, page, page_size):
+    """
+    Summary:
+        the helper function to check if there is a page after the
+        current one in the paginated response
+    Parameter:
+        - response(dict): the json response of the current page
+        - page(int): the number of the current page
+        - page_size(int): the size of the page
+    return:
+        - bool: true if the next page exists, when num_of_pages is missing
+          the full page means there might be the next one
+    """
+    num_of_pages = response.get('num_of_pages')
+    if num_of_pages is None:
+        return page_size > 0 and len(response.get('result') or []) == page_size
+    return page + 1 < num_of_pages
+
+
+async def iter_query_file_folder_pages(params, request):
+    """
+    Summary:
+        the helper function to walk through all pages of the item search
+        starting from the page in params. The next page is requested while
+        the current one is being consumed.
+    Parameter:
+        - params(dict): the query parameters of item search
+        - request(Request): the incoming request
+    Yield:
+        - response(dict): the json response of each page, the walk stops
+          after the last page or after the first unsuccessful response
+    """
+    logger.info('iter_query_file_folder_pages'.center(80, '-'))
+    page = int(params.get('page', 0))
+    page_size = int(params.get('page_size', 0))
+    next_page = asyncio.ensure_future(query_file_folder({**params, 'page': page}, request))
+    try:
+        while next_page:
+            response = (await next_page).json()
+            next_page = None
+            if response.get('code') == 200 and has_next_page(response, page, page_size):
+                page += 1
+                next_page = asyncio.ensure_future(query_file_folder({**params, 'page': page}, request))
+            yield response
+    finally:
+        if next_page:
+            next_page.cancel()
+
+
 async def get_dataset_versions(client: HTTPClient, event):
     logger.info('get_dataset_versions'.center(80, '-'))
     logger.info(f'Query event: {event}')
@@ -15,6 +15,12 @@ from fastapi import Request
 from fastapi_utils.cbv import cbv
 from starlette.datastructures import MultiDict
 
+from app.components.etag import conditional_response
+from app.components.page_prefetcher import Page
+from app.components.page_prefetcher import PagePrefetcher
+from app.components.page_prefetcher import get_page_prefetcher
+from app.components.request.context import RequestContext
+from app.components.request.context import get_request_context
 from app.components.user.models import CurrentUser
 from app.logger import logger
 from app.models.base_models import EAPIResponseCode
@@ -25,7 +31,6 @@ from app.resources.error_handler import APIException
 from app.resources.error_handler import ECustomizedError
 from app.resources.error_handler import catch_internal
 from app.resources.error_handler import customized_error_template
-from app.resources.helpers import get_dataset
 from app.resources.helpers import get_dataset_versions
 from app.services.dataset.client import DatasetServiceClient
 from app.services.dataset.client import get_dataset_service_client
@@ -120,8 +125,10 @@ class ListDatasets(ProxyPass):
     response_allowed_headers: ClassVar[set[str]] = {'Content-Type'}
 
     current_user: CurrentUser = Depends(jwt_required)
+    request_context: RequestContext = Depends(get_request_context)
     project_service_client: ProjectServiceClient = Depends(get_project_service_client)
     dataset_service_client: DatasetServiceClient = Depends(get_dataset_service_client)
+    page_prefetcher: PagePrefetcher = Depends(get_page_prefetcher)
 
     @router.get('/datasets', summary='List all Datasets user can access.')
     async def __call__(self, request: Request) -> fastapi.Response:
@@ -144,11 +151,10 @@ class ListDatasets(ProxyPass):
         user_projects_with_admin_role = self.current_user.get_projects_with_role('admin')
 
         if not creator_parameter and not project_code_parameter and user_projects_with_admin_role:
-            project_ids = []
-            for project_code in user_projects_with_admin_role:
-                project = await self.project_service_client.get(code=project_code)
-                project_ids.append(project.id)
-            modified_parameters['project_id_any'] = ','.join(project_ids)
+            project_ids = await self.request_context.memo.get_project_ids(
+                self.project_service_client, user_projects_with_admin_role
+            )
+            modified_parameters['project_id_any'] = ','.join(map(str, project_ids))
             modified_parameters['or_creator'] = self.current_user.username
 
             return modified_parameters
@@ -161,19 +167,25 @@ class ListDatasets(ProxyPass):
             if project_code_parameter not in user_projects:
                 raise APIException(error_msg='Permission denied', status_code=EAPIResponseCode.forbidden.value)
 
-            project = await self.project_service_client.get(code=project_code_parameter)
+            project = await self.request_context.memo.get_project(self.project_service_client, project_code_parameter)
             modified_parameters['project_id'] = project.id
 
         return modified_parameters
 
-    async def proxy_request(self, parameters: MultiDict[str]) -> httpx.Response:
-        return await self.dataset_service_client.list_datasets(parameters)
+    async def proxy_request(self, parameters: MultiDict[str]) -> Page | None:
+        try:
+            return await self.page_prefetcher.get_page(
+                self.current_user.username, 'datasets', parameters, self.dataset_service_client.list_datasets
+            )
+        except ValueError:
+            logger.exception('Unable to parse the list of datasets')
+            return None
 
-    async def process_response(self, response: httpx.Response) -> fastapi.Response:
+    async def process_response(self, page: Page | None) -> fastapi.Response:
         api_response = DatasetListResponse(code=EAPIResponseCode.success)
 
         try:
-            api_response.result = response.json().get('result')
+            api_response.result = page.get('result')
         except Exception:
             api_response.result = None
 
@@ -183,6 +195,7 @@ class ListDatasets(ProxyPass):
 @cbv(router)
 class GetDataset:
     current_identity: CurrentUser = Depends(jwt_required)
+    request_context: RequestContext = Depends(get_request_context)
     project_service_client: ProjectServiceClient = Depends(get_project_service_client)
     dataset_service_client: DatasetServiceClient = Depends(get_dataset_service_client)
 
@@ -196,7 +209,8 @@ class GetDataset:
         """
         Summary:
             The api will integrate with dataset detail and versions
-            api to have a joint response for cli tool.
+            api to have a joint response for cli tool. Responds
+            with 304 if the detail did not change since If-None-Match.
         Path Parameter:
             - dataset_code(str): unique identifier of dataset
         Parameter:
@@ -210,14 +224,16 @@ class GetDataset:
         api_response = DatasetDetailResponse()
 
         logger.info(f'User request with identity: {self.current_identity}')
-        dataset = await get_dataset(self.dataset_service_client.client, dataset_code)
+        dataset = await self.request_context.memo.get_dataset(self.dataset_service_client.client, dataset_code)
         logger.info(f'Getting user dataset node: {dataset}')
         if not dataset:
             api_response.code = EAPIResponseCode.not_found
             api_response.error_msg = customized_error_template(ECustomizedError.DATASET_NOT_FOUND)
             return api_response.json_response()
 
-        if not await self.current_identity.can_access_dataset(dataset, self.project_service_client):
+        if not await self.current_identity.can_access_dataset(
+            dataset, self.project_service_client, self.request_context.memo
+        ):
             api_response.code = EAPIResponseCode.forbidden
             api_response.error_msg = customized_error_template(ECustomizedError.PERMISSION_DENIED)
             return api_response.json_response()
@@ -231,4 +247,4 @@ class GetDataset:
         dataset_detail = {'general_info': dataset, 'version_detail': versions, 'version_no': len(versions)}
         api_response.result = dataset_detail
         api_response.code = EAPIResponseCode.success
-        return api_response.json_response()
+        return conditional_response(self.request_context.request, api_response.json_response())
@@ -4,16 +4,35 @@
 # Version 3.0 (the "License") available at https://www.gnu.org/licenses/agpl-3.0.en.html.
 # You may not use this file except in compliance with the License.
 
-from common import has_file_permission
+from datetime import datetime
+from functools import partial
+
 from fastapi import APIRouter
 from fastapi import Depends
 from fastapi import Request
 from fastapi_utils.cbv import cbv
 
+from app.components.cache_generation import CacheGenerations
+from app.components.cache_generation import get_cache_generations
+from app.components.folder_summary_cache import FolderSummaryCache
+from app.components.folder_summary_cache import FolderSummaryKey
+from app.components.folder_summary_cache import get_folder_summary_cache
+from app.components.page_prefetcher import PagePrefetcher
+from app.components.page_prefetcher import get_page_prefetcher
+from app.components.permission.evaluator import FilePermissionEvaluator
+from app.components.permission.evaluator import get_file_permission_evaluator
+from app.components.projection import ItemProjectionDependency
+from app.components.streaming import NDJSONResponse
+from app.components.streaming import accepts_ndjson
+from app.components.sync_cursor import SYNC_CURSOR_HEADER
+from app.components.sync_cursor import SYNC_PAGE_CURSOR_HEADER
+from app.components.sync_cursor import SyncWindow
 from app.components.user.models import CurrentUser
 from app.config import ConfigClass
 from app.logger import logger
 
+from ...models.file_models import FolderTreeOrder
+from ...models.file_models import GetFolderSummaryResponse
 from ...models.file_models import GetProjectFileListResponse
 from ...models.file_models import ItemStatus
 from ...models.file_models import QueryDataInfo
@@ -24,8 +43,11 @@ from ...resources.error_handler import EAPIResponseCode
 from ...resources.error_handler import ECustomizedError
 from ...resources.error_handler import catch_internal
 from ...resources.error_handler import customized_error_template
+from ...resources.folder_tree import FolderTreeWalker
 from ...resources.helpers import batch_query_node_by_geid
 from ...resources.helpers import get_zone
+from ...resources.helpers import iter_batch_query_node_by_geid
+from ...resources.helpers import iter_query_file_folder_pages
 from ...resources.helpers import query_file_folder
 
 router = APIRouter()
@@ -36,24 +58,21 @@ _API_NAMESPACE = 'api_files'
 @cbv(router)
 class APIFile:
     current_identity: CurrentUser = Depends(jwt_required)
+    permission_evaluator: FilePermissionEvaluator = Depends(get_file_permission_evaluator)
+    folder_summary_cache: FolderSummaryCache = Depends(get_folder_summary_cache)
+    cache_generations: CacheGenerations = Depends(get_cache_generations)
+    page_prefetcher: PagePrefetcher = Depends(get_page_prefetcher)
 
-    @router.post(
-        '/query/geid',
-        tags=[_API_TAG],
-        response_model=QueryDataInfoResponse,
-        summary='Query file/folder information by geid',
-    )
-    @catch_internal(_API_NAMESPACE)
-    async def query_file_folders_by_geid(self, data: QueryDataInfo):
-        """Get file/folder information by geid."""
-        file_response = QueryDataInfoResponse()
+    async def resolve_geid_records(self, geid_list, located_geid, query_result, projection):
+        """Build the status record for each of the geid, checking the view permission of found items in batch."""
+        located_geid = set(located_geid)
+        active_geid = [geid for geid in located_geid if query_result[geid].get('status') != ItemStatus.ARCHIVED]
+        permissions = await self.permission_evaluator.has_permissions(
+            [query_result[geid] for geid in active_geid], 'view'
+        )
+        permissions = dict(zip(active_geid, permissions))
 
-        geid_list = data.geid
-        logger.info('API /query/geid'.center(80, '-'))
-        logger.info(f'Received information geid: {geid_list}')
-        logger.info(f'User identity: {self.current_identity}')
-        response_list = []
-        located_geid, query_result = await batch_query_node_by_geid(geid_list)
+        records = []
         for global_entity_id in geid_list:
             logger.info(f'Query geid: {global_entity_id}')
             result = {}
@@ -66,15 +85,46 @@ class APIFile:
             else:
                 logger.info(f'Query result: {query_result[global_entity_id]}')
 
-                permission = await has_file_permission(
-                    ConfigClass.AUTH_SERVICE + '/v1/', query_result[global_entity_id], 'view', self.current_identity
-                )
-                if not permission:
+                if not permissions[global_entity_id]:
                     status = customized_error_template(ECustomizedError.PERMISSION_DENIED)
                 else:
                     status = 'success'
-                    result = query_result[global_entity_id]
-            response_list.append({'status': status, 'result': result, 'geid': global_entity_id})
+                    result = projection(query_result[global_entity_id])
+            records.append({'status': status, 'result': result, 'geid': global_entity_id})
+        return records
+
+    async def stream_geid_records(self, geid_list, projection):
+        """Yield the status records chunk by chunk as soon as each chunk is resolved."""
+        async for chunk, located_geid, query_result in iter_batch_query_node_by_geid(geid_list):
+            for record in await self.resolve_geid_records(chunk, located_geid, query_result, projection):
+                yield record
+
+    @router.post(
+        '/query/geid',
+        tags=[_API_TAG],
+        response_model=QueryDataInfoResponse,
+        summary='Query file/folder information by geid',
+    )
+    @catch_internal(_API_NAMESPACE)
+    async def query_file_folders_by_geid(
+        self, data: QueryDataInfo, request: Request, projection: ItemProjectionDependency
+    ):
+        """Get file/folder information by geid.
+
+        When the request accepts application/x-ndjson, each record is streamed as a separate line as soon as it is
+        resolved instead of returning one JSON array at the end.
+        """
+        file_response = QueryDataInfoResponse()
+
+        geid_list = data.geid
+        logger.info('API /query/geid'.center(80, '-'))
+        logger.info(f'Received information geid: {geid_list}')
+        logger.info(f'User identity: {self.current_identity}')
+        if accepts_ndjson(request):
+            return NDJSONResponse(self.stream_geid_records(geid_list, projection))
+
+        located_geid, query_result = await batch_query_node_by_geid(geid_list)
+        response_list = await self.resolve_geid_records(geid_list, located_geid, query_result, projection)
 
         logger.info(f'Query file/folder result: {response_list}')
         file_response.result = response_list
@@ -88,8 +138,29 @@ class APIFile:
         summary='Get files and folders in the project/folder',
     )
     @catch_internal(_API_NAMESPACE)
-    async def get_file_folders(self, project_code, zone, folder, source_type, page, page_size, request: Request):
-        """List files and folders in project."""
+    async def get_file_folders(
+        self,
+        project_code,
+        zone,
+        folder,
+        source_type,
+        page,
+        page_size,
+        request: Request,
+        projection: ItemProjectionDependency,
+        recursive: bool = False,
+        modified_since: datetime | None = None,
+        cursor: str | None = None,
+    ):
+        """List files and folders in project.
+
+        When the request accepts application/x-ndjson, all pages starting from the requested one are walked server
+        side and every item is streamed as a separate line.
+
+        When modified_since or the sync cursor of the previous listing is given, only items modified since then are
+        returned together with the cursor for the next sync in the X-Sync-Cursor header. Following pages of the same
+        sync are requested with the cursor from the X-Sync-Page-Cursor header, which keeps the end of the window.
+        """
         logger.info('API file_list_query'.center(80, '-'))
         file_response = GetProjectFileListResponse()
 
@@ -103,7 +174,7 @@ class APIFile:
         params = {
             'container_code': project_code,
             'container_type': source_type.lower(),
-            'recursive': False,
+            'recursive': recursive,
             'zone': zone,
             'status': ItemStatus.ACTIVE,
             'page': page,
@@ -112,18 +183,141 @@ class APIFile:
         }
         if folder:
             params['parent_path'] = folder
+        headers = {}
+        if modified_since or cursor:
+            try:
+                sync_window = SyncWindow.open(modified_since, cursor, ConfigClass.SYNC_WINDOW_LAG)
+            except ValueError as e:
+                file_response.code = EAPIResponseCode.bad_request
+                file_response.error_msg = str(e)
+                return file_response.json_response()
+            params.update(sync_window.params)
+            headers[SYNC_CURSOR_HEADER] = sync_window.next_cursor
+            headers[SYNC_PAGE_CURSOR_HEADER] = sync_window.page_cursor
         logger.info(f'Query node payload: {params}')
-        folder_info = await query_file_folder(params, request)
-        logger.info(f'folder_info: {folder_info}')
-        response = folder_info.json()
+        if accepts_ndjson(request):
+            pages = iter_query_file_folder_pages(params, request)
+            response = await anext(pages)
+        else:
+            response = await self.page_prefetcher.get_page(
+                self.current_identity['username'],
+                'files',
+                params,
+                lambda page_params: query_file_folder(page_params, request),
+            )
         logger.info(f'folder_response: {response}')
         if response.get('code') != 200:
             file_response.result = response.get('result')
             file_response.code = EAPIResponseCode.internal_error
             file_response.error_msg = 'Error Getting Folder: ' + response.get('error_msg')
             return file_response.json_response()
+        elif accepts_ndjson(request):
+            return NDJSONResponse(projection.stream(stream_page_items(response, pages)), headers=headers)
         else:
-            file_response.result = response.get('result')
+            file_response.result = projection.items(response.get('result'))
             file_response.code = EAPIResponseCode.success
             file_response.error_msg = response.get('error_msg')
-            return file_response.json_response()
+            json_response = file_response.json_response()
+            json_response.headers.update(headers)
+            return json_response
+
+    @router.get(
+        '/{project_code}/files/tree',
+        tags=[_API_TAG],
+        summary='Stream files and folders of the folder tree in the project',
+    )
+    @catch_internal(_API_NAMESPACE)
+    async def get_file_folder_tree(
+        self,
+        project_code,
+        zone,
+        source_type,
+        request: Request,
+        projection: ItemProjectionDependency,
+        folder: str = '',
+        max_depth: int | None = None,
+        order: FolderTreeOrder = FolderTreeOrder.DISCOVERY,
+    ):
+        """List files and folders of the whole folder tree as newline delimited JSON.
+
+        Subfolders are expanded concurrently up to max_depth levels, capped by FOLDER_TREE_MAX_DEPTH, and items are
+        streamed either as soon as they are discovered or depth first in the path order.
+        """
+        logger.info('API file_tree_query'.center(80, '-'))
+        params = {
+            'container_code': project_code,
+            'container_type': source_type.lower(),
+            'recursive': False,
+            'zone': get_zone(zone),
+            'status': ItemStatus.ACTIVE,
+            'order': 'desc',
+        }
+        if max_depth is None:
+            max_depth = ConfigClass.FOLDER_TREE_MAX_DEPTH
+        walker = FolderTreeWalker(
+            params,
+            request,
+            max_depth=max(0, min(max_depth, ConfigClass.FOLDER_TREE_MAX_DEPTH)),
+            concurrency=ConfigClass.FOLDER_TREE_CONCURRENCY,
+            page_size=ConfigClass.FOLDER_TREE_PAGE_SIZE,
+        )
+        logger.info(f'Walking folder tree of {project_code} from "{folder}" in {order} order')
+        root = await walker.list_folder(folder.strip('/'), 0)
+        return NDJSONResponse(projection.stream(walker.walk(root, order)))
+
+    @router.get(
+        '/{project_code}/files/summary',
+        tags=[_API_TAG],
+        response_model=GetFolderSummaryResponse,
+        summary='Get number of files, total size and last modification time of the folder tree',
+    )
+    @catch_internal(_API_NAMESPACE)
+    async def get_folder_summary(self, project_code, zone, source_type, request: Request, folder: str = ''):
+        """Get aggregates of the whole folder tree computed by walking the tree server side.
+
+        The whole tree is walked regardless of its depth. Summaries are cached per user for FOLDER_SUMMARY_CACHE_TTL
+        seconds and stop being used by all workers when files are uploaded into the project, concurrent requests for the
+        same summary share one walk.
+        """
+        logger.info('API folder_summary_query'.center(80, '-'))
+        api_response = GetFolderSummaryResponse()
+
+        folder = folder.strip('/')
+        zone = get_zone(zone)
+        username = self.current_identity['username']
+        generation = await self.cache_generations.get(project_code, zone)
+        cache_key = FolderSummaryKey(project_code, source_type.lower(), zone, folder, username, generation)
+        params = {
+            'container_code': project_code,
+            'container_type': source_type.lower(),
+            'recursive': False,
+            'zone': zone,
+            'status': ItemStatus.ACTIVE,
+            'order': 'desc',
+        }
+        walker = FolderTreeWalker(
+            params,
+            request,
+            max_depth=None,
+            concurrency=ConfigClass.FOLDER_TREE_CONCURRENCY,
+            page_size=ConfigClass.FOLDER_TREE_PAGE_SIZE,
+        )
+        if generation is None:
+            summary = await walker.summarize(folder)
+        else:
+            summary = await self.folder_summary_cache.get_or_set(cache_key, partial(walker.summarize, folder))
+
+        api_response.result = summary
+        api_response.code = EAPIResponseCode.success
+        return api_response.json_response()
+
+
+async def stream_page_items(first_page, pages):
+    """Yield items of the first page and then of every following page."""
+    for item in first_page.get('result'):
+        yield item
+    async for page in pages:
+        if page.get('code') != 200:
+            raise Exception('Error Getting Folder: ' + str(page.get('error_msg')))
+        for item in page.get('result'):
+            yield item
@@ -6,14 +6,21 @@
 
 from fastapi import APIRouter
 from fastapi import Depends
+from fastapi import Request
 from fastapi.responses import JSONResponse
 from fastapi_utils.cbv import cbv
 
+from app.components.lineage_spool import LineageSpool
+from app.components.lineage_spool import get_lineage_spool
+from app.components.preupload_jobs import prefers_async
 from app.components.user.models import CurrentUser
+from app.config import ConfigClass
 from app.logger import logger
 
 from ...clients.lineage import LineageClient
 from ...models.base_models import EAPIResponseCode
+from ...models.lineage_models import LineageBatchCreatePost
+from ...models.lineage_models import LineageBatchCreateResponse
 from ...models.lineage_models import LineageCreatePost
 from ...models.lineage_models import LineageCreateResponse
 from ...resources.dependencies import get_lineage_client
@@ -38,10 +45,25 @@ class APILineage:
     async def create_lineage(
         self,
         request_payload: LineageCreatePost,
+        request: Request,
         current_identity: CurrentUser = Depends(jwt_required),
         get_lineage: LineageClient = Depends(get_lineage_client),
+        spool: LineageSpool = Depends(get_lineage_spool),
     ) -> JSONResponse:
+        """Create lineage in Atlas.
+
+        When the lineage spool is enabled, the "Prefer: respond-async" header makes the lineage to be spooled and 202
+        is returned right away, the lineage is then created in Atlas by the spool worker.
+        """
         response = LineageCreateResponse()
+        if ConfigClass.LINEAGE_SPOOL_ENABLED and prefers_async(request):
+            try:
+                await spool.put(request_payload.dict())
+                response.code = EAPIResponseCode.accepted
+                return response.json_response()
+            except Exception:
+                logger.exception('Failure to spool lineage, creating it synchronously')
+
         try:
             logger.info('API Lineage'.center(80, '-'))
             proxy_payload = request_payload.__dict__
@@ -61,3 +83,54 @@ class APILineage:
             response.code = EAPIResponseCode.internal_error
             response.error_msg = 'Lineage creation failed'
         return response.json_response()
+
+    @router.post(
+        '/lineage/batch',
+        tags=[_API_TAG],
+        response_model=LineageBatchCreateResponse,
+        summary='Create lineage for many pairs of input and output ids',
+    )
+    @catch_internal(_API_NAMESPACE)
+    async def create_lineage_batch(
+        self,
+        request_payload: LineageBatchCreatePost,
+        current_identity: CurrentUser = Depends(jwt_required),
+        get_lineage: LineageClient = Depends(get_lineage_client),
+    ) -> JSONResponse:
+        """Create lineage of all pairs submitting them to Atlas in bulk requests.
+
+        Lineages are created in the given order. When a bulk request fails, the lineages of the preceding bulk requests
+        stay created and their number is returned in the result, so only the remaining lineages need to be resubmitted.
+        """
+        response = LineageBatchCreateResponse()
+        logger.info('API Lineage Batch'.center(80, '-'))
+        if len(request_payload.lineages) > ConfigClass.LINEAGE_BATCH_MAX_SIZE:
+            response.code = EAPIResponseCode.bad_request
+            response.error_msg = f'Too many lineages, at most {ConfigClass.LINEAGE_BATCH_MAX_SIZE} are allowed'
+            return response.json_response()
+
+        created = 0
+        try:
+            lineages = [
+                get_lineage.build_lineage(
+                    input_id=lineage.input_id,
+                    output_id=lineage.output_id,
+                    input_path=lineage.input_path,
+                    output_path=lineage.output_path,
+                    container_code=lineage.project_code,
+                    action_type=lineage.action_type,
+                    description=lineage.description,
+                )
+                for lineage in request_payload.lineages
+            ]
+            for start in range(0, len(lineages), get_lineage.bulk_size):
+                bulk = lineages[start : start + get_lineage.bulk_size]
+                await get_lineage.create_lineages(bulk)
+                created += len(bulk)
+            response.code = EAPIResponseCode.success
+        except Exception:
+            logger.exception(f'Failure to create lineage batch after {created} lineages were created')
+            response.code = EAPIResponseCode.internal_error
+            response.error_msg = 'Lineage creation failed'
+        response.result = {'created': created}
+        return response.json_response()
@@ -4,14 +4,20 @@
 # Version 3.0 (the "License") available at https://www.gnu.org/licenses/agpl-3.0.en.html.
 # You may not use this file except in compliance with the License.
 
-from common import has_file_permission
+from functools import partial
+
 from fastapi import APIRouter
 from fastapi import Depends
 from fastapi import Request
 from fastapi_utils.cbv import cbv
 
+from app.components.etag import conditional_response
+from app.components.idempotency import IdempotencyStore
+from app.components.idempotency import get_idempotency_store
+from app.components.permission.evaluator import FilePermissionEvaluator
+from app.components.permission.evaluator import get_file_permission_evaluator
+from app.components.request.context import RequestContextDependency
 from app.components.user.models import CurrentUser
-from app.config import ConfigClass
 from app.logger import logger
 
 from ...models.file_models import ItemStatus
@@ -25,8 +31,6 @@ from ...resources.error_handler import ECustomizedError
 from ...resources.error_handler import catch_internal
 from ...resources.error_handler import customized_error_template
 from ...resources.helpers import Annotations
-from ...resources.helpers import get_attribute_templates
-from ...resources.helpers import get_user_projects
 from ...resources.helpers import get_zone
 from ...resources.helpers import query_file_folder
 from ...resources.helpers import separate_rel_path
@@ -50,15 +54,17 @@ class APIManifest:
     async def list_manifest(
         self,
         project_code: str,
+        request_context: RequestContextDependency,
         current_identity: CurrentUser = Depends(jwt_required),
     ):
+        """List manifests of the project, answering 304 if they did not change since If-None-Match."""
         api_response = ManifestListResponse()
         try:
             _ = current_identity['username']
         except (AttributeError, TypeError):
             return current_identity
 
-        project_list = await get_user_projects(current_identity)
+        project_list = await request_context.memo.get_user_projects(current_identity)
         if project_code not in [x.get('code') for x in project_list]:
             api_response.code = EAPIResponseCode.forbidden
             api_response.error_msg = 'User is not the member of the project'
@@ -68,7 +74,7 @@ class APIManifest:
         logger.info(f'User request with identity: {current_identity}')
         logger.info(f'User request information: project_code: {project_code}')
         try:
-            response = await get_attribute_templates(project_code)
+            response = await request_context.memo.get_attribute_templates(project_code)
             manifest_list = response.get('result')
             status_code = response.get('code')
             if status_code != 200:
@@ -79,7 +85,7 @@ class APIManifest:
             logger.info(f'Getting manifest list: {manifest_list}')
             api_response.result = manifest_list
             api_response.code = EAPIResponseCode.success
-            return api_response.json_response()
+            return conditional_response(request_context.request, api_response.json_response())
         except Exception as e:
             logger.error(f'Error listing manifest: {e}')
             api_response.code = EAPIResponseCode.internal_error
@@ -97,15 +103,15 @@ class APIManifest:
         self,
         data: ManifestAttachPost,
         request: Request,
+        request_context: RequestContextDependency,
         current_identity: CurrentUser = Depends(jwt_required),
+        permission_evaluator: FilePermissionEvaluator = Depends(get_file_permission_evaluator),
+        idempotency: IdempotencyStore = Depends(get_idempotency_store),
     ):
-        """CLI will call manifest validation API before attach manifest to file after uploading process."""
-        api_response = ManifestAttachResponse()
-        manifest_name = data.manifest_name
-        project_code = data.project_code
-        attributes = data.attributes
-        zone = data.zone
-        file_path = data.file_name
+        """CLI will call manifest validation API before attach manifest to file after uploading process.
+
+        Retries with the same "Idempotency-Key" header get the response of the first attach instead of attaching again.
+        """
         try:
             _ = current_identity['username']
         except (AttributeError, TypeError):
@@ -113,6 +119,27 @@ class APIManifest:
         logger.info('API attach_manifest'.center(80, '-'))
         logger.info(f'User request with identity: {current_identity}')
 
+        return await idempotency.run(
+            request,
+            current_identity['username'],
+            partial(self.attach, data, request, request_context, permission_evaluator),
+        )
+
+    async def attach(
+        self,
+        data: ManifestAttachPost,
+        request: Request,
+        request_context: RequestContextDependency,
+        permission_evaluator: FilePermissionEvaluator,
+    ):
+        """Validate the manifest attributes against the item and the template, then attach them to the item."""
+        api_response = ManifestAttachResponse()
+        manifest_name = data.manifest_name
+        project_code = data.project_code
+        attributes = data.attributes
+        zone = data.zone
+        file_path = data.file_name
+
         parent_path, file_name = separate_rel_path(file_path)
         file_info = {
             'container_code': project_code,
@@ -135,9 +162,7 @@ class APIManifest:
             file_type = file_node[0].get('type')
 
         try:
-            if not await has_file_permission(
-                ConfigClass.AUTH_SERVICE + '/v1/', file_node[0], 'annotate', current_identity
-            ):
+            if not await permission_evaluator.has_permission(file_node[0], 'annotate'):
                 api_response.error_msg = 'Permission denied'
                 api_response.code = EAPIResponseCode.forbidden
                 return api_response.json_response()
@@ -151,7 +176,7 @@ class APIManifest:
         logger.info(f'Globale entity id for {file_name}: {global_entity_id}')
         logger.info(f'File {file_name} file_type by {file_type}')
         annotation_func = getattr(Annotations, f'attach_manifest_to_{file_type}')
-        filter_template_res = await get_attribute_templates(project_code, manifest_name)
+        filter_template_res = await request_context.memo.get_attribute_templates(project_code, manifest_name)
 
         logger.info(f'filter_template_res: {filter_template_res}')
         target_manifest = filter_template_res.get('result')
@@ -179,6 +204,11 @@ class APIManifest:
             'manifest_id': manifest_id,
             'attributes': attributes,
         }
+        return await self.annotate(annotation_func, annotation_event)
+
+    async def annotate(self, annotation_func, annotation_event):
+        """Attach the manifest attributes to the item and return the response for the client."""
+        api_response = ManifestAttachResponse()
         response = await annotation_func(annotation_event)
         logger.info(f'Attach manifest result: {response}')
         if not response:
@@ -201,9 +231,10 @@ class APIManifest:
         self,
         project_code,
         name,
+        request_context: RequestContextDependency,
         current_identity: CurrentUser = Depends(jwt_required),
     ):
-        """Export manifest from the project."""
+        """Export manifest from the project, answering 304 if it did not change since If-None-Match."""
         api_response = ManifestExportResponse()
         try:
             _ = current_identity['username']
@@ -212,13 +243,13 @@ class APIManifest:
         logger.info('API export_manifest'.center(80, '-'))
         logger.info(f'User request with identity: {current_identity}')
 
-        project_list = await get_user_projects(current_identity)
+        project_list = await request_context.memo.get_user_projects(current_identity)
         if project_code not in [x.get('code') for x in project_list]:
             api_response.code = EAPIResponseCode.forbidden
             api_response.error_msg = 'User is not the member of the project'
             return api_response.json_response()
 
-        manifest_res = await get_attribute_templates(project_code, name)
+        manifest_res = await request_context.memo.get_attribute_templates(project_code, name)
         manifest = manifest_res.get('result')
         logger.info(f'Matched manifest: {manifest}')
         logger.info(f'not manifest: {not manifest}')
@@ -231,4 +262,4 @@ class APIManifest:
             logger.info(f'Attributes result {manifest}')
             api_response.code = EAPIResponseCode.success
             api_response.result = manifest
-            return api_response.json_response()
+            return conditional_response(request_context.request, api_response.json_response())
@@ -4,45 +4,84 @@
 # Version 3.0 (the "License") available at https://www.gnu.org/licenses/agpl-3.0.en.html.
 # You may not use this file except in compliance with the License.
 
+import asyncio
+from functools import partial
+
 import httpx
-from common import has_file_permission
 from fastapi import APIRouter
 from fastapi import Depends
 from fastapi import Request
+from fastapi import Response
 from fastapi_utils.cbv import cbv
 
+from app.components.cache_generation import CacheGenerations
+from app.components.cache_generation import get_cache_generations
+from app.components.etag import conditional_response
+from app.components.idempotency import IdempotencyStore
+from app.components.idempotency import get_idempotency_store
+from app.components.item_path_cache import ItemPathCache
+from app.components.item_path_cache import ItemPathKey
+from app.components.item_path_cache import get_item_path_cache
+from app.components.page_prefetcher import PagePrefetcher
+from app.components.page_prefetcher import get_page_prefetcher
+from app.components.permission.evaluator import FilePermissionEvaluator
+from app.components.permission.evaluator import get_file_permission_evaluator
+from app.components.preupload_jobs import PreuploadJobTracker
+from app.components.preupload_jobs import get_preupload_job_tracker
+from app.components.preupload_jobs import prefers_async
+from app.components.projection import ItemProjectionDependency
 from app.components.request.context import RequestContextDependency
+from app.components.streaming import iter_batches
+from app.components.streaming import iter_ndjson
 from app.components.user.models import CurrentUser
 from app.config import ConfigClass
 from app.logger import logger
+from app.models.base_models import APIJSONResponse
 from app.models.base_models import EAPIResponseCode
 from app.models.file_models import ItemStatus
 from app.models.project_models import GetProjectFolderResponse
+from app.models.project_models import ItemSearchMatch
 from app.models.project_models import POSTProjectFile
+from app.models.project_models import POSTProjectFileBatch
+from app.models.project_models import POSTProjectFileBatchResponse
+from app.models.project_models import POSTProjectFileDownloadStreamResponse
 from app.models.project_models import POSTProjectFileResponse
+from app.models.project_models import POSTProjectItemPaths
+from app.models.project_models import POSTProjectItemPathsResponse
 from app.models.project_models import PreDownloadProjectFile
+from app.models.project_models import PreDownloadProjectFileStream
+from app.models.project_models import PreuploadJobResponse
 from app.models.project_models import ProjectListResponse
 from app.models.project_models import ResumableResponse
 from app.models.project_models import ResumableUploadPOST
 from app.resources.authorization.decorator import cli_rules_enforcement
 from app.resources.authorization.models import ValidAction
 from app.resources.dependencies import jwt_required
+from app.resources.dependencies import merge_chunk_responses
+from app.resources.dependencies import select_download_url_by_zone
 from app.resources.dependencies import transfer_to_pre
 from app.resources.error_handler import catch_internal
-from app.resources.helpers import get_item_by_id
+from app.resources.folder_tree import FolderTreeWalker
+from app.resources.helpers import batch_query_node_by_geid
 from app.resources.helpers import get_user_projects
 from app.resources.helpers import get_zone
 from app.resources.helpers import query_file_folder
+from app.resources.helpers import query_node_chunk_by_geid
 
 router = APIRouter()
 _API_TAG = 'V1 Projects'
 _API_NAMESPACE = 'api_project'
+_ALL_ZONES = 'all'
 
 
 @cbv(router)
 class APIProject:
 
     current_identity: CurrentUser = Depends(jwt_required)
+    permission_evaluator: FilePermissionEvaluator = Depends(get_file_permission_evaluator)
+    item_path_cache: ItemPathCache = Depends(get_item_path_cache)
+    cache_generations: CacheGenerations = Depends(get_cache_generations)
+    page_prefetcher: PagePrefetcher = Depends(get_page_prefetcher)
 
     @router.get(
         '/projects',
@@ -51,8 +90,8 @@ class APIProject:
         summary='Get project list that user have access to',
     )
     @catch_internal(_API_NAMESPACE)
-    async def list_project(self, page=0, page_size=10, order='created_at', order_by='desc'):
-        """Get the project list that user have access to."""
+    async def list_project(self, request: Request, page=0, page_size=10, order='created_at', order_by='desc'):
+        """Get the project list that user have access to, answering 304 if it did not change since If-None-Match."""
         logger.info('API list_project'.center(80, '-'))
         api_response = ProjectListResponse()
 
@@ -63,7 +102,58 @@ class APIProject:
         logger.info(f'Number of projects: {len(project_list)}')
         api_response.result = project_list
         api_response.code = EAPIResponseCode.success
-        return api_response.json_response()
+        return conditional_response(request, api_response.json_response())
+
+    async def has_items_permission(self, item_ids, operation):
+        """Return true if all items exist and the user is allowed to perform the operation on every one of them."""
+        located_geid, query_result = await batch_query_node_by_geid(item_ids)
+        if set(located_geid) != set(item_ids):
+            return False
+        items = [query_result[geid] for geid in dict.fromkeys(item_ids)]
+        return all(await self.permission_evaluator.has_permissions(items, operation))
+
+    async def check_preupload_permissions(self, project_code, item, annotate):
+        """Return the error message if the user is not allowed to upload into the item or None otherwise."""
+        operations = ['upload', 'annotate'] if annotate else ['upload']
+        permissions = await self.permission_evaluator.has_operations(item, operations)
+        if not permissions['upload']:
+            error_msg = f'Unauthorized upload action on project {project_code}'
+        elif not permissions.get('annotate', True):
+            error_msg = f'Unauthorized annotation action on project {project_code}'
+        else:
+            return None
+
+        logger.error(error_msg)
+        return error_msg
+
+    async def run_preupload(self, data, project_code, headers, item):
+        """Create upload jobs in the upload service and return the response for the client."""
+        api_response = POSTProjectFileResponse()
+        try:
+            logger.info('Tansfering to pre upload')
+            result = await transfer_to_pre(data, project_code, headers)
+            logger.info(result.text)
+            await self.cache_generations.bump(project_code, item['zone'])
+            self.page_prefetcher.invalidate_listing('files', project_code, item['zone'])
+            if result.status_code == 409:
+                api_response.error_msg = result.json()['error_msg']
+                api_response.result = result.json().get('result') or {}
+                api_response.code = EAPIResponseCode.conflict
+            elif result.status_code == 207:
+                api_response.error_msg = 'Partial Upload Error: ' + result.json()['error_msg']
+                api_response.result = result.json()['result']
+                api_response.code = EAPIResponseCode.multi_status
+            elif result.status_code != 200:
+                api_response.error_msg = 'Upload Error: ' + result.json()['error_msg']
+                api_response.result = result.json().get('result') or {}
+                api_response.code = EAPIResponseCode.internal_error
+            else:
+                api_response.result = result.json()['result']
+
+            return api_response
+        except Exception as e:
+            logger.error(f'Preupload error: {e}')
+            raise e
 
     @router.post(
         '/project/{project_code}/files',
@@ -78,52 +168,148 @@ class APIProject:
         project_code,
         request_context: RequestContextDependency,
         data: POSTProjectFile,
+        job_tracker: PreuploadJobTracker = Depends(get_preupload_job_tracker),
+        idempotency: IdempotencyStore = Depends(get_idempotency_store),
     ):
-        """PRE upload and check existence of file in project."""
+        """PRE upload and check existence of file in project.
+
+        With the "Prefer: respond-async" header the upload service is called in the background and 202 with the job
+        is returned immediately, the outcome is then available through the preupload job status endpoint. Retries with
+        the same "Idempotency-Key" header get the response of the first request instead of running the preupload again.
+        """
         api_response = POSTProjectFileResponse()
         logger.info('API project_file_preupload'.center(80, '-'))
 
-        item = await get_item_by_id(data.parent_folder_id)
+        item = await request_context.memo.get_item(data.parent_folder_id)
         if not item:
             api_response.error_msg = 'Item not found'
             api_response.code = EAPIResponseCode.not_found
             return api_response
 
-        if not await has_file_permission(ConfigClass.AUTH_SERVICE + '/v1/', item, 'upload', self.current_identity):
-            error_msg = f'Unauthorized upload action on project {project_code}'
-            logger.error(error_msg)
+        error_msg = await self.check_preupload_permissions(project_code, item, len(data.folder_tags) > 0)
+        if error_msg:
             api_response.error_msg = error_msg
             api_response.code = EAPIResponseCode.forbidden
             return api_response.json_response()
 
-        elif len(data.folder_tags) > 0 and not await has_file_permission(
-            ConfigClass.AUTH_SERVICE + '/v1/', item, 'annotate', self.current_identity
-        ):
-            error_msg = f'Unauthorized annotation action on project {project_code}'
-            logger.error(error_msg)
-            api_response.error_msg = error_msg
-            api_response.code = EAPIResponseCode.forbidden
+        return await idempotency.run(
+            request_context.request,
+            self.current_identity['username'],
+            partial(self.start_preupload, data, project_code, request_context, job_tracker, item),
+        )
+
+    async def start_preupload(self, data, project_code, request_context, job_tracker, item):
+        """Run the preupload or start it as a background job when the client prefers asynchronous processing."""
+        preupload = self.run_preupload(data, project_code, request_context.headers, item)
+        if not prefers_async(request_context.request):
+            return (await preupload).json_response()
+
+        job = await job_tracker.start(project_code, self.current_identity['username'], preupload)
+        api_response = POSTProjectFileResponse()
+        api_response.result = job
+        api_response.code = EAPIResponseCode.accepted
+        response = api_response.json_response()
+        response.headers['Location'] = f'/v1/project/{project_code}/files/jobs/{job["job_id"]}'
+        return response
+
+    @router.post(
+        '/project/{project_code}/files/batch',
+        response_model=POSTProjectFileBatchResponse,
+        summary='pre upload files of multiple jobs to the target zone',
+        tags=['V1 Files'],
+    )
+    @catch_internal(_API_NAMESPACE)
+    @cli_rules_enforcement(ValidAction.UPLOAD)
+    async def project_file_batch_preupload(
+        self, project_code, request_context: RequestContextDependency, data: POSTProjectFileBatch
+    ):
+        """PRE upload files of multiple jobs and return the result of each job in the order of jobs.
+
+        Parent folders and permissions are checked once for every distinct parent folder and the jobs are then sent to
+        the upload service concurrently.
+        """
+        api_response = POSTProjectFileBatchResponse()
+        logger.info('API project_file_batch_preupload'.center(80, '-'))
+
+        if len(data.jobs) > ConfigClass.PREUPLOAD_BATCH_MAX_JOBS:
+            api_response.error_msg = f'Too many jobs, at most {ConfigClass.PREUPLOAD_BATCH_MAX_JOBS} are allowed'
+            api_response.code = EAPIResponseCode.bad_request
             return api_response.json_response()
 
-        try:
-            logger.info('Tansfering to pre upload')
-            result = await transfer_to_pre(data, project_code, request_context.headers)
-            logger.info(result.text)
-            if result.status_code == 409:
-                api_response.error_msg = result.json()['error_msg']
-                api_response.code = EAPIResponseCode.conflict
-                return api_response.json_response()
-            elif result.status_code != 200:
-                api_response.error_msg = 'Upload Error: ' + result.json()['error_msg']
+        # jobs with the same parent folder share one lookup through the request memo
+        parent_items = await asyncio.gather(*(request_context.memo.get_item(job.parent_folder_id) for job in data.jobs))
+        items = {job.parent_folder_id: item for job, item in zip(data.jobs, parent_items)}
+        checks = list(dict.fromkeys((job.parent_folder_id, len(job.folder_tags) > 0) for job in data.jobs))
+        checks = [(parent_id, annotate) for parent_id, annotate in checks if items[parent_id]]
+        permission_errors = await asyncio.gather(
+            *(
+                self.check_preupload_permissions(project_code, items[parent_id], annotate)
+                for parent_id, annotate in checks
+            )
+        )
+        errors = dict(zip(checks, permission_errors))
+
+        semaphore = asyncio.Semaphore(ConfigClass.PREUPLOAD_BATCH_CONCURRENCY)
+        api_response.result = await asyncio.gather(
+            *(
+                self.run_batch_preupload_job(
+                    job,
+                    data.zone,
+                    project_code,
+                    request_context.headers,
+                    items[job.parent_folder_id],
+                    errors.get((job.parent_folder_id, len(job.folder_tags) > 0)),
+                    semaphore,
+                )
+                for job in data.jobs
+            )
+        )
+        return api_response.json_response()
+
+    async def run_batch_preupload_job(self, job, zone, project_code, headers, item, error_msg, semaphore):
+        """Run the preupload of one job of the batch and return its outcome."""
+        api_response = POSTProjectFileResponse()
+        if job.zone != zone:
+            api_response.error_msg = f'Invalid zone: {job.zone}'
+            api_response.code = EAPIResponseCode.bad_request
+        elif not item:
+            api_response.error_msg = 'Item not found'
+            api_response.code = EAPIResponseCode.not_found
+        elif error_msg:
+            api_response.error_msg = error_msg
+            api_response.code = EAPIResponseCode.forbidden
+        else:
+            try:
+                async with semaphore:
+                    api_response = await self.run_preupload(job, project_code, headers, item)
+            except Exception as e:
+                api_response.error_msg = f'Preupload error: {e}'
                 api_response.code = EAPIResponseCode.internal_error
-                return api_response.json_response()
-            else:
-                api_response.result = result.json()['result']
 
+        return {'code': api_response.code.value, 'error_msg': api_response.error_msg, 'result': api_response.result}
+
+    @router.get(
+        '/project/{project_code}/files/jobs/{job_id}',
+        response_model=PreuploadJobResponse,
+        summary='Get status of the asynchronous pre upload job',
+        tags=['V1 Files'],
+    )
+    @catch_internal(_API_NAMESPACE)
+    async def get_preupload_job(
+        self, project_code, job_id, job_tracker: PreuploadJobTracker = Depends(get_preupload_job_tracker)
+    ):
+        """Get status of the pre upload job started by the current user."""
+        api_response = PreuploadJobResponse()
+        logger.info('API get_preupload_job'.center(80, '-'))
+
+        job = await job_tracker.get(job_id)
+        if not job or job['project_code'] != project_code or job['username'] != self.current_identity['username']:
+            api_response.error_msg = 'Pre upload job not found'
+            api_response.code = EAPIResponseCode.not_found
             return api_response.json_response()
-        except Exception as e:
-            logger.error(f'Preupload error: {e}')
-            raise e
+
+        api_response.result = job
+        return api_response.json_response()
 
     @router.post(
         '/project/{project_code}/files/resumable',
@@ -159,22 +345,21 @@ class APIProject:
         api_response = POSTProjectFileResponse()
         logger.info('API project file resumable upload'.center(80, '-'))
 
-        for x in data.object_infos:
-            item = await get_item_by_id(x.item_id)
-            if not await has_file_permission(ConfigClass.AUTH_SERVICE + '/v1/', item, 'upload', self.current_identity):
-                error_msg = f'Unauthorized upload action on project {project_code}'
-                logger.error(error_msg)
-                api_response.error_msg = error_msg
-                api_response.code = EAPIResponseCode.forbidden
+        if not await self.has_items_permission([x.item_id for x in data.object_infos], 'upload'):
+            error_msg = f'Unauthorized upload action on project {project_code}'
+            logger.error(error_msg)
+            api_response.error_msg = error_msg
+            api_response.code = EAPIResponseCode.forbidden
 
-                return api_response.json_response()
+            return api_response.json_response()
 
         try:
             logger.info('Tansfering to pre upload')
             async with httpx.AsyncClient() as client:
                 url = ConfigClass.UPLOAD_SERVICE_GREENROOM + '/v1/files/resumable'
-                payload = await request_context.request.json()
-                res = await client.post(url, headers=request_context.headers, json=payload, timeout=None)
+                headers = {**request_context.headers, 'content-type': 'application/json'}
+                body = await request_context.request.body()
+                res = await client.post(url, headers=headers, content=body, timeout=None)
                 api_response.result = res.json().get('result', [])
 
             return api_response.json_response()
@@ -205,40 +390,183 @@ class APIProject:
             {self.current_identity}'
         )
 
-        for x in data.files:
-            item = await get_item_by_id(x.id)
-            if not await has_file_permission(
-                ConfigClass.AUTH_SERVICE + '/v1/', item, 'download', self.current_identity
-            ):
-                error_msg = f'Unauthorized download action on project {project_code}'
-                logger.error(error_msg)
-                api_response.error_msg = error_msg
-                api_response.code = EAPIResponseCode.forbidden
-                return api_response.json_response()
+        if not await self.has_items_permission([x.id for x in data.files], 'download'):
+            error_msg = f'Unauthorized download action on project {project_code}'
+            logger.error(error_msg)
+            api_response.error_msg = error_msg
+            api_response.code = EAPIResponseCode.forbidden
+            return api_response.json_response()
 
         try:
-            if data.zone == ConfigClass.GREEN_ZONE_LABEL.lower():
-                url = ConfigClass.DOWNLOAD_SERVICE_GREENROOM + '/v2/download/pre/'
-            else:
-                url = ConfigClass.DOWNLOAD_SERVICE_CORE + '/v2/download/pre/'
+            url = select_download_url_by_zone(data.zone)
             async with httpx.AsyncClient() as client:
-                payload = {
-                    'files': [dict(x) for x in data.files],
-                    'zone': data.zone,
-                    'operator': data.operator,
-                    'container_code': data.container_code,
-                    'container_type': data.container_type,
-                }
-                result = await client.post(url, headers=request_context.headers, json=payload)
+                headers = {**request_context.headers, 'content-type': 'application/json'}
+                body = await request_context.request.body()
+                result = await client.post(url, headers=headers, content=body)
                 if result.status_code != 200:
                     raise Exception(result.json().get('error_msg'))
 
-            return result.json()
+            return Response(content=result.content, status_code=result.status_code, media_type='application/json')
         except Exception as e:
             api_response.error_msg = f'Download service error: {e}'
             api_response.code = EAPIResponseCode.bad_request
             return api_response.json_response()
 
+    @router.post(
+        '/project/{project_code}/files/download/stream',
+        response_model=POSTProjectFileDownloadStreamResponse,
+        summary='pre download files streamed as newline delimited JSON from the target zone',
+        tags=['V1 Files'],
+    )
+    @cli_rules_enforcement(ValidAction.DOWNLOAD)
+    @catch_internal(_API_NAMESPACE)
+    async def project_file_predownload_stream(
+        self,
+        project_code,
+        request_context: RequestContextDependency,
+        data: PreDownloadProjectFileStream = Depends(),
+    ):
+        """PRE download files with ids streamed in the request body as newline delimited {"id": ...} records.
+
+        Permissions are checked for every chunk of PREDOWNLOAD_CHUNK_SIZE ids as it arrives. Only when all of them are
+        granted, the chunks are sent to the download service, which creates one job per chunk. The result always has
+        the jobs of all chunks and the chunks which failed, so it differs from the single job of /files/download.
+        """
+        api_response = POSTProjectFileDownloadStreamResponse()
+        logger.info('API project_file_predownload_stream'.center(80, '-'))
+
+        semaphore = asyncio.Semaphore(ConfigClass.PREDOWNLOAD_CHUNK_CONCURRENCY)
+        async with httpx.AsyncClient(timeout=ConfigClass.PREDOWNLOAD_CHUNK_TIMEOUT) as client:
+            try:
+                chunks = await self.check_predownload_stream_permissions(
+                    client, project_code, request_context.request.stream(), semaphore
+                )
+            except (ValueError, TypeError, KeyError) as e:
+                api_response.error_msg = f'Invalid file list: {e}'
+                api_response.code = EAPIResponseCode.bad_request
+                return api_response.json_response()
+            except PermissionError as e:
+                api_response.error_msg = str(e)
+                api_response.code = EAPIResponseCode.forbidden
+                return api_response.json_response()
+
+            payload = data.dict()
+            headers = {**request_context.headers, 'content-type': 'application/json'}
+            responses = await asyncio.gather(
+                *(self.send_predownload_chunk(client, payload, chunk, headers, semaphore) for chunk in chunks)
+            )
+
+        result = merge_chunk_responses([len(chunk) for chunk in chunks], responses).json()
+        if result['code'] == EAPIResponseCode.success.value:
+            result['result'] = {'jobs': result['result'], 'failed_chunks': []}
+        return APIJSONResponse(content=result, status_code=result['code'])
+
+    async def check_predownload_stream_permissions(self, client, project_code, stream, semaphore):
+        """Return all chunks of files from the stream after the permissions of every chunk were granted.
+
+        Raises ValueError if the stream has more than PREDOWNLOAD_MAX_FILES files and PermissionError if the user is
+        not allowed to download any of the files.
+        """
+        chunks, checks = [], []
+        total = 0
+        try:
+            records = iter_ndjson(stream, ConfigClass.PREDOWNLOAD_MAX_LINE_SIZE)
+            async for chunk in iter_batches(records, ConfigClass.PREDOWNLOAD_CHUNK_SIZE):
+                total += len(chunk)
+                if total > ConfigClass.PREDOWNLOAD_MAX_FILES:
+                    raise ValueError(f'too many files, at most {ConfigClass.PREDOWNLOAD_MAX_FILES} are allowed')
+                file_ids = [record['id'] for record in chunk]
+                chunks.append([{'id': file_id} for file_id in file_ids])
+                checks.append(
+                    asyncio.create_task(self.check_predownload_permissions(client, project_code, file_ids, semaphore))
+                )
+            error_msgs = await asyncio.gather(*checks)
+        finally:
+            for check in checks:
+                check.cancel()
+
+        if not chunks:
+            raise ValueError('no files to download')
+        error_msg = next((error_msg for error_msg in error_msgs if error_msg), None)
+        if error_msg:
+            raise PermissionError(error_msg)
+        return chunks
+
+    async def check_predownload_permissions(self, client, project_code, file_ids, semaphore):
+        """Return the error message if the user is not allowed to download any of the files or None otherwise."""
+        async with semaphore:
+            located_ids, items = await query_node_chunk_by_geid(client, file_ids)
+            granted = await self.permission_evaluator.has_permissions(list(items.values()), 'download')
+        if len(set(located_ids)) == len(set(file_ids)) and all(granted):
+            return None
+
+        error_msg = f'Unauthorized download action on project {project_code}'
+        logger.error(error_msg)
+        return error_msg
+
+    async def send_predownload_chunk(self, client, payload, files, headers, semaphore):
+        """Send one chunk of files to the download service."""
+        async with semaphore:
+            try:
+                return await client.post(
+                    select_download_url_by_zone(payload['zone']), headers=headers, json={**payload, 'files': files}
+                )
+            except httpx.HTTPError as e:
+                return e
+
+    async def search_item(self, folder_check_event, request):
+        """Search the item in one zone, answering repeated lookups from the item path cache."""
+        generation = await self.cache_generations.get(folder_check_event['container_code'], folder_check_event['zone'])
+        cache_key = ItemPathKey(
+            folder_check_event['container_code'],
+            folder_check_event['container_type'],
+            folder_check_event['zone'],
+            folder_check_event['parent_path'],
+            folder_check_event['name'],
+            folder_check_event.get('type'),
+            self.current_identity['username'],
+            generation,
+        )
+        cached_result = self.item_path_cache.get(cache_key) if generation is not None else None
+        if cached_result is not None:
+            return 200, {'result': cached_result}
+
+        folder_response = await query_file_folder(folder_check_event, request)
+        logger.info(f'Folder check response: {folder_response.text}')
+        status_code, response = folder_response.status_code, folder_response.json()
+        if status_code == 200 and response.get('result') is not None and generation is not None:
+            self.item_path_cache.set(cache_key, response['result'])
+        return status_code, response
+
+    async def search_item_in_all_zones(self, folder_check_event, request, match):
+        """Search the item in all zones concurrently.
+
+        Unless all matches are requested, the match from the lowest zone is returned, so an item copied from greenroom
+        to core under the same path is always resolved to the greenroom one. The core search is awaited only when
+        greenroom has no match.
+        """
+        zones = sorted([get_zone(ConfigClass.GREEN_ZONE_LABEL), get_zone(ConfigClass.CORE_ZONE_LABEL)])
+        searches = [
+            asyncio.ensure_future(self.search_item({**folder_check_event, 'zone': zone}, request)) for zone in zones
+        ]
+        results, failures = [], []
+        try:
+            for search in searches:
+                status_code, response = await search
+                if status_code == 200 and response.get('result'):
+                    results.extend(response['result'])
+                    if match == ItemSearchMatch.FIRST:
+                        break
+                elif status_code != 200:
+                    failures.append((status_code, response))
+        finally:
+            for search in searches:
+                search.cancel()
+
+        if results or not failures:
+            return 200, {'result': sorted(results, key=lambda item: item.get('zone', 0))}
+        return max(failures, key=lambda failure: failure[0])
+
     @router.get(
         '/project/{project_code}/search',
         tags=[_API_TAG],
@@ -246,8 +574,22 @@ class APIProject:
         summary='Get item in the project',
     )
     @catch_internal(_API_NAMESPACE)
-    async def get_project_item(self, project_code, zone, path, item_type, container_type, request: Request):
-        """Get item in project."""
+    async def get_project_item(
+        self,
+        project_code,
+        zone,
+        path,
+        item_type,
+        container_type,
+        request: Request,
+        projection: ItemProjectionDependency,
+        match: ItemSearchMatch = ItemSearchMatch.FIRST,
+    ):
+        """Get item in project.
+
+        When zone is "all", both zones are searched concurrently. With match "all" every matching item is returned
+        in a list instead of only the first one.
+        """
         api_response = GetProjectFolderResponse()
 
         logger.info('API get_project_item'.center(80, '-'))
@@ -269,16 +611,18 @@ class APIProject:
         if item_type:
             folder_check_event['type'] = item_type
         logger.info(f'Folder check event: {folder_check_event}')
-        folder_response = await query_file_folder(folder_check_event, request)
-        logger.info(f'Folder check response: {folder_response.text}')
-        response = folder_response.json()
 
-        if folder_response.status_code == 500:
+        if zone.lower() == _ALL_ZONES:
+            status_code, response = await self.search_item_in_all_zones(folder_check_event, request, match)
+        else:
+            status_code, response = await self.search_item(folder_check_event, request)
+
+        if status_code == 500:
             error = response.get('error_msg')
             error_msg = f'Error Getting Folder: {error}'
             response_code = EAPIResponseCode.internal_error
             result = ''
-        elif folder_response.status_code == 404:
+        elif status_code == 404:
             error_msg = 'Error Getting Folder: not found'
             response_code = EAPIResponseCode.not_found
             result = ''
@@ -287,7 +631,7 @@ class APIProject:
             logger.info(f'res: {res}')
 
             if res:
-                result = res[0]
+                result = projection.items(res) if match == ItemSearchMatch.ALL else projection(res[0])
                 response_code = EAPIResponseCode.success
                 error_msg = ''
             else:
@@ -300,3 +644,76 @@ class APIProject:
         api_response.code = response_code
         api_response.error_msg = error_msg
         return api_response.json_response()
+
+    @router.post(
+        '/project/{project_code}/search/bulk',
+        tags=[_API_TAG],
+        response_model=POSTProjectItemPathsResponse,
+        summary='Check existence of many items in the project',
+    )
+    @catch_internal(_API_NAMESPACE)
+    async def check_project_item_paths(self, project_code, data: POSTProjectItemPaths, request: Request):
+        """
+        Summary:
+            the api to check existence of many relative paths at once.
+            Paths are grouped by the parent folder and every parent
+            folder is listed only once.
+        Parameter:
+            - zone(str): the greenroom or core
+            - container_type(str): the type of container
+            - paths(list[str]): the relative paths of items
+        return:
+            - result(list):
+                - path(str): the requested path
+                - exists(bool): if the item exists
+                - id(str): the unique identifier of existing item
+                - type(str): the type of existing item
+                - status(str): the status of existing item
+        """
+        api_response = POSTProjectItemPathsResponse()
+        logger.info('API check_project_item_paths'.center(80, '-'))
+
+        if len(data.paths) > ConfigClass.ITEM_PATH_CHECK_MAX_PATHS:
+            api_response.error_msg = f'Too many paths, at most {ConfigClass.ITEM_PATH_CHECK_MAX_PATHS} are allowed'
+            api_response.code = EAPIResponseCode.bad_request
+            return api_response.json_response()
+
+        paths_by_parent = {}
+        for path in data.paths:
+            parent_path, _, name = path.strip('/').rpartition('/')
+            paths_by_parent.setdefault(parent_path, {}).setdefault(name, []).append(path)
+
+        params = {
+            'container_code': project_code,
+            'container_type': data.container_type,
+            'recursive': False,
+            'zone': get_zone(data.zone),
+            'status': ItemStatus.ACTIVE,
+            'order': 'desc',
+        }
+        walker = FolderTreeWalker(
+            params,
+            request,
+            max_depth=1,
+            concurrency=ConfigClass.FOLDER_TREE_CONCURRENCY,
+            page_size=ConfigClass.FOLDER_TREE_PAGE_SIZE,
+        )
+        logger.info(f'Checking {len(data.paths)} paths within {len(paths_by_parent)} folders')
+        listings = await asyncio.gather(*(walker.list_folder(parent_path, 0) for parent_path in paths_by_parent))
+
+        checks = {}
+        for names, (folder_items, _) in zip(paths_by_parent.values(), listings):
+            existing = {item['name']: item for item in folder_items}
+            for name, paths in names.items():
+                item = existing.get(name, {})
+                for path in paths:
+                    checks[path] = {
+                        'path': path,
+                        'exists': bool(item),
+                        'id': item.get('id'),
+                        'type': item.get('type'),
+                        'status': item.get('status'),
+                    }
+
+        api_response.result = [checks[path] for path in data.paths]
+        return api_response.json_response()
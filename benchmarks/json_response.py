@@ -0,0 +1,63 @@
+# Copyright (C) 2022-Present Indoc Systems
+#
+# Licensed under the GNU AFFERO GENERAL PUBLIC LICENSE,
+# Version 3.0 (the "License") available at https://www.gnu.org/licenses/agpl-3.0.en.html.
+# You may not use this file except in compliance with the License.
+
+"""Compare APIResponse.json_response with the previous dict() and standard library encoder path.
+
+Run with: python -m benchmarks.json_response [items] [repeat]
+"""
+
+import sys
+import timeit
+from functools import partial
+
+from fastapi.responses import JSONResponse
+
+from app.models.base_models import APIResponse
+
+
+def make_items(count: int) -> list[dict]:
+    return [
+        {
+            'id': f'96510da0-22f4-4487-ac88-{index:012d}',
+            'parent': 'f7c4bd06-8c3b-4d0e-9c7b-0c5f7e3c9e3a',
+            'parent_path': 'admin/folder/subfolder',
+            'restore_path': None,
+            'status': 'ACTIVE',
+            'type': 'file',
+            'zone': 0,
+            'name': f'file_{index}.txt',
+            'size': index * 1024,
+            'owner': 'admin',
+            'container_code': 'sampleproject',
+            'container_type': 'project',
+            'created_time': '2022-04-13 18:17:51.008212',
+            'last_updated_time': '2022-04-13 18:17:51.008227',
+            'storage': {'id': 'f0f2ecb3-6e60-4f86-a3c2-dd5a0dcd6ab9', 'location_uri': 'minio://bucket/file'},
+            'extended': {'id': 'b1b4b3a2-4a2e-4c5f-8d3e-6e7f8a9b0c1d', 'extra': {'tags': ['tag1'], 'attributes': {}}},
+        }
+        for index in range(count)
+    ]
+
+
+def legacy_json_response(api_response: APIResponse) -> JSONResponse:
+    data = api_response.dict()
+    data['code'] = api_response.code.value
+    return JSONResponse(status_code=api_response.code.value, content=data)
+
+
+def main(count: int = 10000, repeat: int = 20) -> None:
+    api_response = APIResponse()
+    api_response.result = make_items(count)
+    assert legacy_json_response(api_response).body == api_response.json_response().body
+
+    sys.stdout.write(f'Encoding {count} items, best of {repeat} runs\n')
+    for name, func in (('dict() + json', legacy_json_response), ('json_response', APIResponse.json_response)):
+        best = min(timeit.repeat(partial(func, api_response), number=1, repeat=repeat))
+        sys.stdout.write(f'{name:>15}: {best * 1000:8.2f} ms\n')
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
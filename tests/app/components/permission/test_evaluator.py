@@ -0,0 +1,97 @@
+# Copyright (C) 2022-Present Indoc Systems
+#
+# Licensed under the GNU AFFERO GENERAL PUBLIC LICENSE,
+# Version 3.0 (the "License") available at https://www.gnu.org/licenses/agpl-3.0.en.html.
+# You may not use this file except in compliance with the License.
+
+import re
+
+import pytest
+
+from app.components.permission.evaluator import FilePermissionEvaluator
+from app.components.user.models import CurrentUser
+
+
+@pytest.fixture
+def contributor(fake) -> CurrentUser:
+    return CurrentUser({'username': fake.user_name(), 'role': 'member', 'realm_roles': ['testproject-contributor']})
+
+
+@pytest.fixture
+def permission_evaluator(contributor, request_context, settings) -> FilePermissionEvaluator:
+    return FilePermissionEvaluator(settings.AUTH_SERVICE, request_context.client, contributor)
+
+
+def generate_item(fake, parent_path: str, container_code: str = 'testproject') -> dict[str, str | int]:
+    return {
+        'id': fake.uuid4(),
+        'type': 'file',
+        'status': 'ACTIVE',
+        'zone': 0,
+        'parent_path': parent_path,
+        'container_code': container_code,
+        'container_type': 'project',
+    }
+
+
+def authorize_url(resource: str, operation: str) -> str:
+    return (
+        f'http://auth/v1/authorize?role=contributor&resource={resource}&zone=greenroom'
+        f'&operation={operation}&project_code=testproject'
+    )
+
+
+class TestFilePermissionEvaluator:
+    async def test_has_permissions_requests_each_rule_only_once_for_many_items(
+        self, permission_evaluator, fake, httpx_mock
+    ):
+        items = [generate_item(fake, fake.user_name()) for _ in range(10)]
+        httpx_mock.add_response(url=authorize_url('file_any', 'view'), json={'result': {'has_permission': True}})
+
+        received_permissions = await permission_evaluator.has_permissions(items, 'view')
+
+        assert received_permissions == [True] * len(items)
+        assert len(httpx_mock.get_requests()) == 1
+
+    async def test_has_permissions_allows_only_items_in_own_name_folder_without_file_any_permission(
+        self, permission_evaluator, contributor, fake, httpx_mock
+    ):
+        items = [generate_item(fake, f'{contributor.username}/folder'), generate_item(fake, 'another-user/folder')]
+        httpx_mock.add_response(url=authorize_url('file_any', 'download'), json={'result': {'has_permission': False}})
+        httpx_mock.add_response(
+            url=authorize_url('file_in_own_namefolder', 'download'), json={'result': {'has_permission': True}}
+        )
+
+        received_permissions = await permission_evaluator.has_permissions(items, 'download')
+
+        assert received_permissions == [True, False]
+        assert len(httpx_mock.get_requests()) == 2
+
+    async def test_has_permission_returns_false_when_user_does_not_belong_to_project(
+        self, permission_evaluator, fake, httpx_mock
+    ):
+        item = generate_item(fake, fake.user_name(), container_code=fake.project_code())
+
+        assert await permission_evaluator.has_permission(item, 'view') is False
+        assert httpx_mock.get_requests() == []
+
+    async def test_has_permission_raises_exception_when_authorize_call_fails(
+        self, permission_evaluator, fake, httpx_mock
+    ):
+        item = generate_item(fake, fake.user_name())
+        httpx_mock.add_response(url=re.compile(r'^http://auth/v1/authorize.*$'), status_code=500, json={})
+
+        with pytest.raises(Exception, match='Error calling authorize API'):
+            await permission_evaluator.has_permission(item, 'view')
+
+    async def test_has_operations_returns_permission_for_each_operation_in_single_evaluation(
+        self, permission_evaluator, fake, httpx_mock
+    ):
+        item = generate_item(fake, fake.user_name())
+        httpx_mock.add_response(url=authorize_url('file_any', 'upload'), json={'result': {'has_permission': True}})
+        httpx_mock.add_response(url=authorize_url('file_any', 'annotate'), json={'result': {'has_permission': False}})
+
+        received_permissions = await permission_evaluator.has_operations(item, ['upload', 'annotate'])
+
+        assert received_permissions == {'upload': True, 'annotate': False}
+        assert len(httpx_mock.get_requests()) == 2
@@ -0,0 +1,38 @@
+# Copyright (C) 2022-Present Indoc Systems
+#
+# Licensed under the GNU AFFERO GENERAL PUBLIC LICENSE,
+# Version 3.0 (the "License") available at https://www.gnu.org/licenses/agpl-3.0.en.html.
+# You may not use this file except in compliance with the License.
+
+import asyncio
+
+from app.components.request.memo import RequestMemo
+
+
+class TestRequestMemo:
+    async def test_get_item_fetches_item_only_once(self, fake, httpx_mock):
+        item_id = fake.uuid4()
+        httpx_mock.add_response(
+            method='GET', url=f'http://metadata_service/v1/item/{item_id}/', json={'result': {'id': item_id}}
+        )
+        memo = RequestMemo()
+
+        received_items = await asyncio.gather(memo.get_item(item_id), memo.get_item(item_id))
+        received_item = await memo.get_item(item_id)
+
+        assert received_items == [{'id': item_id}, {'id': item_id}]
+        assert received_item == {'id': item_id}
+        assert len(httpx_mock.get_requests()) == 1
+        assert memo.saved_calls == 2
+
+    async def test_memoize_keeps_entities_from_different_namespaces_separate(self, fake, mocker):
+        key = fake.pystr()
+        factory = mocker.AsyncMock(side_effect=[fake.pystr(), fake.pystr()])
+        memo = RequestMemo()
+
+        first_entity = await memo.memoize('project', key, factory)
+        second_entity = await memo.memoize('dataset', key, factory)
+
+        assert first_entity != second_entity
+        assert factory.await_count == 2
+        assert memo.saved_calls == 0
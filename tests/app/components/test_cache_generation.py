@@ -0,0 +1,26 @@
+# Copyright (C) 2022-Present Indoc Systems
+#
+# Licensed under the GNU AFFERO GENERAL PUBLIC LICENSE,
+# Version 3.0 (the "License") available at https://www.gnu.org/licenses/agpl-3.0.en.html.
+# You may not use this file except in compliance with the License.
+
+from app.components.cache_generation import CacheGenerations
+from tests.fixtures.redis import InMemoryRedis
+
+
+class TestCacheGenerations:
+    async def test_bump_increments_generation_of_the_project_and_zone_only(self):
+        generations = CacheGenerations(InMemoryRedis())
+
+        await generations.bump('project', 0)
+
+        assert await generations.get('project', 0) == 1
+        assert await generations.get('project', 1) == 0
+        assert await generations.get('other', 0) == 0
+
+    async def test_get_returns_none_when_redis_is_not_available(self, mocker):
+        redis = InMemoryRedis()
+        mocker.patch.object(redis, 'get', side_effect=ConnectionError('Redis is down'))
+        generations = CacheGenerations(redis)
+
+        assert await generations.get('project', 0) is None
@@ -0,0 +1,118 @@
+# Copyright (C) 2022-Present Indoc Systems
+#
+# Licensed under the GNU AFFERO GENERAL PUBLIC LICENSE,
+# Version 3.0 (the "License") available at https://www.gnu.org/licenses/agpl-3.0.en.html.
+# You may not use this file except in compliance with the License.
+
+import gzip
+import json
+
+import pytest
+from async_asgi_testclient import TestClient as TestAsyncClient
+from fastapi import FastAPI
+from fastapi import Response
+
+from app.components.compression import CompressionMiddleware
+from app.components.compression import negotiate_encoding
+from app.components.streaming import NDJSONResponse
+from app.models.base_models import APIResponse
+
+
+@pytest.fixture
+def compression_client():
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=100, level=6)
+
+    @app.get('/items')
+    async def list_items(count: int):
+        api_response = APIResponse()
+        api_response.result = [{'name': f'file_{index}.txt'} for index in range(count)]
+        response = api_response.json_response()
+        response.headers['ETag'] = '"etag"'
+        return response
+
+    @app.get('/items/not-modified')
+    async def not_modified_items():
+        return Response(status_code=304, headers={'ETag': '"etag"'})
+
+    @app.get('/items/stream')
+    async def stream_items(count: int):
+        async def records():
+            for index in range(count):
+                yield {'name': f'file_{index}.txt'}
+
+        return NDJSONResponse(records())
+
+    return TestAsyncClient(app)
+
+
+class TestNegotiateEncoding:
+    @pytest.mark.parametrize(
+        'accept_encoding,expected',
+        [
+            ('gzip, deflate', 'gzip'),
+            ('*', 'gzip'),
+            ('gzip;q=0, identity', None),
+            ('br, deflate', None),
+            ('', None),
+        ],
+    )
+    def test_negotiate_encoding_returns_gzip_when_accepted(self, accept_encoding, expected):
+        assert negotiate_encoding(accept_encoding) == expected
+
+
+class TestCompressionMiddleware:
+    async def test_response_larger_than_minimum_size_is_compressed(self, compression_client):
+        response = await compression_client.get(
+            '/items', query_string={'count': 100}, headers={'Accept-Encoding': 'gzip'}, stream=True
+        )
+        body = b''.join([chunk async for chunk in response.iter_content(1024)])
+
+        assert response.headers['Content-Encoding'] == 'gzip'
+        assert response.headers['Vary'] == 'Accept-Encoding'
+        assert response.headers['ETag'] == 'W/"etag"'
+        assert int(response.headers['Content-Length']) == len(body)
+        assert len(json.loads(gzip.decompress(body))['result']) == 100
+
+    async def test_response_smaller_than_minimum_size_is_not_compressed(self, compression_client):
+        response = await compression_client.get(
+            '/items', query_string={'count': 1}, headers={'Accept-Encoding': 'gzip'}
+        )
+
+        assert 'Content-Encoding' not in response.headers
+        assert response.headers['ETag'] == '"etag"'
+        assert response.json()['result'] == [{'name': 'file_0.txt'}]
+
+    async def test_response_is_not_compressed_without_accept_encoding(self, compression_client):
+        response = await compression_client.get(
+            '/items', query_string={'count': 100}, headers={'Accept-Encoding': 'identity'}
+        )
+
+        assert 'Content-Encoding' not in response.headers
+        assert len(response.json()['result']) == 100
+
+    async def test_streaming_response_is_compressed_chunk_by_chunk(self, compression_client):
+        response = await compression_client.get(
+            '/items/stream', query_string={'count': 3}, headers={'Accept-Encoding': 'gzip'}, stream=True
+        )
+        body = b''.join([chunk async for chunk in response.iter_content(1024)])
+
+        assert response.headers['Content-Encoding'] == 'gzip'
+        assert 'Content-Length' not in response.headers
+        records = [json.loads(line) for line in gzip.decompress(body).splitlines()]
+        assert records == [{'name': 'file_0.txt'}, {'name': 'file_1.txt'}, {'name': 'file_2.txt'}]
+
+    async def test_not_modified_response_gets_weak_etag_when_encoding_was_negotiated(self, compression_client):
+        response = await compression_client.get('/items/not-modified', headers={'Accept-Encoding': 'gzip'})
+
+        assert response.status_code == 304
+        assert 'Content-Encoding' not in response.headers
+        assert response.headers['ETag'] == 'W/"etag"'
+        assert response.headers['Vary'] == 'Accept-Encoding'
+
+    async def test_not_modified_response_keeps_strong_etag_without_accept_encoding(self, compression_client):
+        response = await compression_client.get('/items/not-modified', headers={'Accept-Encoding': 'identity'})
+
+        assert response.status_code == 304
+        assert response.headers['ETag'] == '"etag"'
+        assert 'Vary' not in response.headers
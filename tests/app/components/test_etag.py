@@ -0,0 +1,56 @@
+# Copyright (C) 2022-Present Indoc Systems
+#
+# Licensed under the GNU AFFERO GENERAL PUBLIC LICENSE,
+# Version 3.0 (the "License") available at https://www.gnu.org/licenses/agpl-3.0.en.html.
+# You may not use this file except in compliance with the License.
+
+import pytest
+from fastapi import Request
+from fastapi.responses import JSONResponse
+
+from app.components.etag import compute_etag
+from app.components.etag import conditional_response
+from app.components.etag import etag_matches
+
+
+def make_request(if_none_match: str | None = None) -> Request:
+    headers = [(b'if-none-match', if_none_match.encode())] if if_none_match else []
+    return Request({'type': 'http', 'method': 'GET', 'path': '/v1/projects', 'headers': headers, 'query_string': b''})
+
+
+class TestETag:
+    @pytest.mark.parametrize(
+        'if_none_match,expected',
+        [
+            ('"abc"', True),
+            ('W/"abc"', True),
+            ('"xyz", "abc"', True),
+            ('*', True),
+            ('"xyz"', False),
+            ('', False),
+        ],
+    )
+    def test_etag_matches_uses_weak_comparison(self, if_none_match, expected):
+        assert etag_matches('"abc"', if_none_match) is expected
+
+    def test_conditional_response_adds_etag_to_successful_response(self):
+        response = conditional_response(make_request(), JSONResponse({'result': []}))
+
+        assert response.status_code == 200
+        assert response.headers['ETag'] == compute_etag(b'{"result":[]}')
+        assert response.headers['Cache-Control'] == 'private, no-cache'
+
+    def test_conditional_response_returns_304_when_etag_matches(self):
+        etag = compute_etag(b'{"result":[]}')
+
+        response = conditional_response(make_request(etag), JSONResponse({'result': []}))
+
+        assert response.status_code == 304
+        assert response.body == b''
+        assert response.headers['ETag'] == etag
+
+    def test_conditional_response_skips_error_responses(self):
+        response = conditional_response(make_request('*'), JSONResponse({'result': []}, status_code=404))
+
+        assert response.status_code == 404
+        assert 'ETag' not in response.headers
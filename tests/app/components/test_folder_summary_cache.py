@@ -0,0 +1,45 @@
+# Copyright (C) 2022-Present Indoc Systems
+#
+# Licensed under the GNU AFFERO GENERAL PUBLIC LICENSE,
+# Version 3.0 (the "License") available at https://www.gnu.org/licenses/agpl-3.0.en.html.
+# You may not use this file except in compliance with the License.
+
+import asyncio
+
+from app.components.folder_summary_cache import FolderSummaryCache
+from app.components.folder_summary_cache import FolderSummaryKey
+
+
+class TestFolderSummaryCache:
+    async def test_get_or_set_shares_one_computation_between_concurrent_misses(self, mocker):
+        cache = FolderSummaryCache(ttl=10, max_size=10)
+        key = FolderSummaryKey('project', 'project', 0, 'user', 'user', 0)
+        started = asyncio.Event()
+        release = asyncio.Event()
+
+        async def summarize():
+            started.set()
+            await release.wait()
+            return {'file_count': 1}
+
+        factory = mocker.AsyncMock(side_effect=summarize)
+        first = asyncio.ensure_future(cache.get_or_set(key, factory))
+        await started.wait()
+        second = asyncio.ensure_future(cache.get_or_set(key, factory))
+        await asyncio.sleep(0)
+        release.set()
+
+        assert await asyncio.gather(first, second) == [{'file_count': 1}, {'file_count': 1}]
+        assert factory.await_count == 1
+        assert cache.get(key) == {'file_count': 1}
+
+    async def test_get_or_set_does_not_cache_value_of_key_invalidated_while_computing(self):
+        cache = FolderSummaryCache(ttl=10, max_size=10)
+        key = FolderSummaryKey('project', 'project', 0, 'user', 'user', 0)
+
+        async def summarize():
+            cache.invalidate(lambda invalidated_key: invalidated_key == key)
+            return {'file_count': 1}
+
+        assert await cache.get_or_set(key, summarize) == {'file_count': 1}
+        assert cache.get(key) is None
@@ -0,0 +1,125 @@
+# Copyright (C) 2022-Present Indoc Systems
+#
+# Licensed under the GNU AFFERO GENERAL PUBLIC LICENSE,
+# Version 3.0 (the "License") available at https://www.gnu.org/licenses/agpl-3.0.en.html.
+# You may not use this file except in compliance with the License.
+
+import asyncio
+
+import pytest
+from fastapi import Request
+from fastapi.responses import JSONResponse
+
+from app.components.idempotency import IdempotencyStore
+from tests.fixtures.redis import InMemoryRedis
+
+
+def make_request(body: bytes = b'{}', idempotency_key: str | None = 'key') -> Request:
+    async def receive():
+        return {'type': 'http.request', 'body': body, 'more_body': False}
+
+    headers = [(b'idempotency-key', idempotency_key.encode())] if idempotency_key else []
+    scope = {'type': 'http', 'method': 'POST', 'path': '/v1/manifest/attach', 'headers': headers, 'query_string': b''}
+    return Request(scope, receive)
+
+
+class TestIdempotencyStore:
+    async def test_run_replays_stored_response_for_duplicate_key(self):
+        store = IdempotencyStore(InMemoryRedis(), ttl=60, lock_ttl=10, poll_interval=0)
+        calls = []
+
+        async def handler():
+            calls.append(1)
+            return JSONResponse(status_code=200, content={'result': len(calls)})
+
+        first = await store.run(make_request(), 'user', handler)
+        second = await store.run(make_request(), 'user', handler)
+
+        assert len(calls) == 1
+        assert second.status_code == 200
+        assert second.body == first.body
+        assert second.headers['Idempotent-Replayed'] == 'true'
+
+    async def test_run_waits_for_running_request_with_the_same_key(self):
+        store = IdempotencyStore(InMemoryRedis(), ttl=60, lock_ttl=10, poll_interval=0.01)
+        started = asyncio.Event()
+        release = asyncio.Event()
+        calls = []
+
+        async def handler():
+            calls.append(1)
+            started.set()
+            await release.wait()
+            return JSONResponse(status_code=200, content={'result': 'done'})
+
+        first = asyncio.create_task(store.run(make_request(), 'user', handler))
+        await started.wait()
+        second = asyncio.create_task(store.run(make_request(), 'user', handler))
+        await asyncio.sleep(0.05)
+        release.set()
+        responses = await asyncio.gather(first, second)
+
+        assert len(calls) == 1
+        assert [response.body for response in responses] == [b'{"result":"done"}'] * 2
+
+    async def test_run_refreshes_lock_while_request_is_running(self):
+        redis = InMemoryRedis()
+        store = IdempotencyStore(redis, ttl=60, lock_ttl=0.03, poll_interval=0)
+
+        async def handler():
+            redis.expirations.clear()
+            await asyncio.sleep(0.05)
+            assert redis.expirations == {'bff-cli:idempotency:user:/v1/manifest/attach:key': 0.03}
+            return JSONResponse(status_code=200, content={})
+
+        response = await store.run(make_request(), 'user', handler)
+
+        assert response.status_code == 200
+        assert redis.expirations == {'bff-cli:idempotency:user:/v1/manifest/attach:key': 60}
+
+    async def test_run_returns_422_when_key_is_reused_with_different_body(self):
+        store = IdempotencyStore(InMemoryRedis(), ttl=60, lock_ttl=10, poll_interval=0)
+
+        async def handler():
+            return JSONResponse(status_code=200, content={})
+
+        await store.run(make_request(b'{"a": 1}'), 'user', handler)
+        response = await store.run(make_request(b'{"a": 2}'), 'user', handler)
+
+        assert response.status_code == 422
+
+    async def test_run_executes_again_after_server_error_or_exception(self):
+        store = IdempotencyStore(InMemoryRedis(), ttl=60, lock_ttl=10, poll_interval=0)
+
+        async def failing_handler():
+            raise ValueError('error')
+
+        async def error_handler():
+            return JSONResponse(status_code=500, content={})
+
+        async def handler():
+            return JSONResponse(status_code=200, content={})
+
+        with pytest.raises(ValueError):
+            await store.run(make_request(), 'user', failing_handler)
+        error_response = await store.run(make_request(), 'user', error_handler)
+        response = await store.run(make_request(), 'user', handler)
+
+        assert error_response.status_code == 500
+        assert response.status_code == 200
+        assert 'Idempotent-Replayed' not in response.headers
+
+    async def test_run_does_not_share_keys_between_users_or_skip_requests_without_key(self):
+        store = IdempotencyStore(InMemoryRedis(), ttl=60, lock_ttl=10, poll_interval=0)
+        calls = []
+
+        async def handler():
+            calls.append(1)
+            return JSONResponse(status_code=200, content={})
+
+        await store.run(make_request(), 'user', handler)
+        await store.run(make_request(), 'another-user', handler)
+        await store.run(make_request(idempotency_key=None), 'user', handler)
+        await store.run(make_request(idempotency_key=None), 'user', handler)
+
+        assert len(calls) == 4
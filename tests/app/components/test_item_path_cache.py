@@ -0,0 +1,40 @@
+# Copyright (C) 2022-Present Indoc Systems
+#
+# Licensed under the GNU AFFERO GENERAL PUBLIC LICENSE,
+# Version 3.0 (the "License") available at https://www.gnu.org/licenses/agpl-3.0.en.html.
+# You may not use this file except in compliance with the License.
+
+from app.components.item_path_cache import ItemPathCache
+from app.components.item_path_cache import ItemPathKey
+
+
+class TestItemPathCache:
+    def test_get_returns_cached_negative_entry_and_counts_hit_ratio(self):
+        cache = ItemPathCache(ttl=10, max_size=10)
+        key = ItemPathKey('project', 'project', 0, 'user', 'folder', 'folder', 'user', 0)
+
+        assert cache.get(key) is None
+        cache.set(key, [])
+
+        assert cache.get(key) == []
+        assert cache.hit_ratio == 0.5
+
+    def test_get_returns_none_when_entry_is_expired(self, mocker):
+        cache = ItemPathCache(ttl=10, max_size=10)
+        key = ItemPathKey('project', 'project', 0, 'user', 'folder', 'folder', 'user', 0)
+        monotonic = mocker.patch('app.components.cache.time.monotonic', return_value=100)
+        cache.set(key, [{'name': 'folder'}])
+        monotonic.return_value = 111
+
+        assert cache.get(key) is None
+
+    def test_set_evicts_oldest_entry_when_cache_is_full(self):
+        cache = ItemPathCache(ttl=10, max_size=1)
+        first_key = ItemPathKey('project', 'project', 0, 'user', 'folder1', 'folder', 'user', 0)
+        second_key = ItemPathKey('project', 'project', 0, 'user', 'folder2', 'folder', 'user', 0)
+
+        cache.set(first_key, [])
+        cache.set(second_key, [])
+
+        assert cache.get(first_key) is None
+        assert cache.get(second_key) == []
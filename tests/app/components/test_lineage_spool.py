@@ -0,0 +1,141 @@
+# Copyright (C) 2022-Present Indoc Systems
+#
+# Licensed under the GNU AFFERO GENERAL PUBLIC LICENSE,
+# Version 3.0 (the "License") available at https://www.gnu.org/licenses/agpl-3.0.en.html.
+# You may not use this file except in compliance with the License.
+
+import httpx
+import pytest
+
+from app.clients.lineage import LineageClient
+from app.components.lineage_spool import LineageSpool
+from app.config import ConfigClass
+from tests.fixtures.redis import InMemoryRedis
+
+LINEAGE = {
+    'project_code': 'test_project',
+    'input_id': 'fake_input_id',
+    'output_id': 'fake_output_id',
+    'input_path': 'fake/path/test.txt',
+    'output_path': 'fake/path/destination/test.txt',
+    'action_type': 'copy',
+    'description': 'Test lineage',
+}
+
+
+class TestLineageSpool:
+    async def test_drain_submits_identical_lineage_once_and_removes_it_from_spool(self, mocker):
+        redis = InMemoryRedis()
+        spool = LineageSpool(redis, batch_size=10, interval=1, max_interval=10, max_attempts=2)
+        lineage_client = LineageClient()
+        create_lineages = mocker.patch.object(lineage_client, 'create_lineages')
+        await spool.put(LINEAGE)
+        await spool.put(LINEAGE)
+        await spool.put({**LINEAGE, 'output_id': 'another_output_id'})
+
+        drained = await spool.drain(lineage_client)
+
+        assert drained == 2
+        assert len(create_lineages.call_args.args[0]) == 2
+        assert await spool.drain(lineage_client) == 0
+
+    async def test_drain_keeps_lineage_in_spool_when_atlas_fails(self, mocker):
+        redis = InMemoryRedis()
+        spool = LineageSpool(redis, batch_size=10, interval=1, max_interval=10, max_attempts=2)
+        lineage_client = LineageClient()
+        create_lineages = mocker.patch.object(
+            lineage_client, 'create_lineages', side_effect=httpx.ConnectError('Atlas error')
+        )
+        await spool.put(LINEAGE)
+
+        with pytest.raises(httpx.ConnectError, match='Atlas error'):
+            await spool.drain(lineage_client)
+        create_lineages.side_effect = None
+
+        assert await spool.drain(lineage_client) == 1
+
+    async def test_drain_skips_when_another_instance_holds_the_lock(self, mocker):
+        redis = InMemoryRedis()
+        spool = LineageSpool(redis, batch_size=10, interval=1, max_interval=10, max_attempts=2)
+        lineage_client = LineageClient()
+        mocker.patch.object(lineage_client, 'create_lineages')
+        await spool.put(LINEAGE)
+        await redis.set(spool.lock_key, 'locked')
+
+        assert await spool.drain(lineage_client) == 0
+
+    async def test_drain_isolates_rejected_lineage_and_moves_it_to_dead_letter(self, mocker):
+        redis = InMemoryRedis()
+        spool = LineageSpool(redis, batch_size=10, interval=1, max_interval=10, max_attempts=2)
+        lineage_client = LineageClient()
+        rejected = {**LINEAGE, 'input_id': 'missing_input_id'}
+
+        async def create_lineages(lineages):
+            if any(
+                lineage['attributes']['inputs'][0]['uniqueAttributes']['item_id'] == 'missing_input_id'
+                for lineage in lineages
+            ):
+                raise Exception('Atlas rejected lineage')
+
+        mocker.patch.object(lineage_client, 'create_lineages', side_effect=create_lineages)
+        await spool.put(rejected)
+        await spool.put(LINEAGE)
+
+        assert await spool.drain(lineage_client) == 1
+        assert list(redis.values[spool.key]) == [spool.get_field(rejected).encode()]
+
+        with pytest.raises(Exception, match='Atlas rejected lineage'):
+            await spool.drain(lineage_client)
+
+        assert redis.values[spool.key] == {}
+        assert list(redis.values[spool.dead_letter_key]) == [spool.get_field(rejected).encode()]
+        assert redis.values[spool.attempts_key] == {}
+
+    async def test_drain_does_not_release_lock_taken_over_by_another_instance(self, mocker):
+        redis = InMemoryRedis()
+        spool = LineageSpool(redis, batch_size=10, interval=1, max_interval=10, max_attempts=2)
+        lineage_client = LineageClient()
+
+        async def create_lineages(lineages):
+            await redis.set(spool.lock_key, 'another_instance')
+
+        mocker.patch.object(lineage_client, 'create_lineages', side_effect=create_lineages)
+        await spool.put(LINEAGE)
+
+        assert await spool.drain(lineage_client) == 1
+        assert await redis.get(spool.lock_key) == b'another_instance'
+
+    async def test_drain_submits_at_most_one_bulk_of_lineages(self, mocker):
+        mocker.patch.object(ConfigClass, 'ATLAS_BULK_SIZE', 2)
+        redis = InMemoryRedis()
+        spool = LineageSpool(redis, batch_size=10, interval=1, max_interval=10, max_attempts=2)
+        lineage_client = LineageClient()
+        create_lineages = mocker.patch.object(lineage_client, 'create_lineages')
+        for output_id in ['output_1', 'output_2', 'output_3']:
+            await spool.put({**LINEAGE, 'output_id': output_id})
+
+        drained = await spool.drain(lineage_client)
+
+        assert drained == 2
+        assert len(create_lineages.call_args.args[0]) == 2
+        assert len(redis.values[spool.key]) == 1
+
+    async def test_drain_one_by_one_stops_when_lock_was_taken_over(self, mocker):
+        redis = InMemoryRedis()
+        spool = LineageSpool(redis, batch_size=10, interval=1, max_interval=10, max_attempts=2)
+        lineage_client = LineageClient()
+
+        async def create_lineages(lineages):
+            await redis.set(spool.lock_key, 'another_instance')
+            raise Exception('Atlas rejected lineage')
+
+        create_lineages = mocker.patch.object(lineage_client, 'create_lineages', side_effect=create_lineages)
+        await spool.put(LINEAGE)
+        await spool.put({**LINEAGE, 'output_id': 'another_output_id'})
+
+        with pytest.raises(Exception, match='Lineage spool lock was lost'):
+            await spool.drain(lineage_client)
+
+        assert create_lineages.call_count == 1
+        assert await redis.get(spool.lock_key) == b'another_instance'
+        assert len(redis.values[spool.key]) == 2
@@ -0,0 +1,96 @@
+# Copyright (C) 2022-Present Indoc Systems
+#
+# Licensed under the GNU AFFERO GENERAL PUBLIC LICENSE,
+# Version 3.0 (the "License") available at https://www.gnu.org/licenses/agpl-3.0.en.html.
+# You may not use this file except in compliance with the License.
+
+from httpx import Response
+from starlette.datastructures import MultiDict
+
+from app.components.page_prefetcher import PagePrefetcher
+
+
+class TestPagePrefetcher:
+    async def test_get_page_serves_next_page_from_prefetched_pages(self, mocker):
+        pages = {
+            '0': Response(200, json={'result': [1, 2], 'num_of_pages': 2}),
+            '1': Response(200, json={'result': [3]}),
+        }
+        fetch_page = mocker.AsyncMock(side_effect=lambda params: pages[params['page']])
+        prefetcher = PagePrefetcher(ttl=10, max_size=10, max_page_size=10)
+
+        await prefetcher.get_page('user', 'files', {'page': '0', 'page_size': '2'}, fetch_page)
+        received_page = await prefetcher.get_page('user', 'files', {'page': '1', 'page_size': '2'}, fetch_page)
+
+        assert received_page == {'result': [3]}
+        assert fetch_page.await_count == 2
+        assert prefetcher.hits == 1
+
+    async def test_get_page_does_not_share_prefetched_pages_between_users(self, mocker):
+        fetch_page = mocker.AsyncMock(return_value=Response(200, json={'result': [1], 'num_of_pages': 3}))
+        prefetcher = PagePrefetcher(ttl=10, max_size=10, max_page_size=10)
+
+        await prefetcher.get_page('user', 'datasets', MultiDict({'page': '0', 'page_size': '1'}), fetch_page)
+        await prefetcher.get_page('another-user', 'datasets', MultiDict({'page': '1', 'page_size': '1'}), fetch_page)
+
+        assert prefetcher.hits == 0
+
+    async def test_get_page_fetches_page_again_when_prefetch_failed(self, mocker):
+        fetch_page = mocker.AsyncMock(
+            side_effect=[
+                Response(200, json={'result': [1], 'num_of_pages': 2}),
+                Exception('Connection error'),
+                Response(200, json={'result': [2], 'num_of_pages': 2}),
+            ]
+        )
+        prefetcher = PagePrefetcher(ttl=10, max_size=10, max_page_size=10)
+
+        await prefetcher.get_page('user', 'files', {'page': '0', 'page_size': '1'}, fetch_page)
+        received_page = await prefetcher.get_page('user', 'files', {'page': '1', 'page_size': '1'}, fetch_page)
+
+        assert received_page == {'result': [2], 'num_of_pages': 2}
+        assert fetch_page.await_count == 3
+
+    async def test_get_page_does_not_prefetch_pages_larger_than_max_page_size(self, mocker):
+        fetch_page = mocker.AsyncMock(return_value=Response(200, json={'result': [1, 2], 'num_of_pages': 2}))
+        prefetcher = PagePrefetcher(ttl=10, max_size=10, max_page_size=1)
+
+        await prefetcher.get_page('user', 'files', {'page': '0', 'page_size': '2'}, fetch_page)
+
+        assert fetch_page.await_count == 1
+
+    async def test_get_page_fetches_page_again_when_prefetched_page_was_not_successful(self, mocker):
+        fetch_page = mocker.AsyncMock(
+            side_effect=[
+                Response(200, json={'result': [1], 'num_of_pages': 2}),
+                Response(500, json={'code': 500, 'error_msg': 'Error'}),
+                Response(200, json={'result': [2], 'num_of_pages': 2}),
+            ]
+        )
+        prefetcher = PagePrefetcher(ttl=10, max_size=10, max_page_size=10)
+
+        await prefetcher.get_page('user', 'files', {'page': '0', 'page_size': '1'}, fetch_page)
+        received_page = await prefetcher.get_page('user', 'files', {'page': '1', 'page_size': '1'}, fetch_page)
+
+        assert received_page == {'result': [2], 'num_of_pages': 2}
+
+    async def test_invalidate_listing_removes_pages_of_the_project_and_zone_for_all_users(self):
+        prefetcher = PagePrefetcher(ttl=10, max_size=10, max_page_size=10)
+        params = {'container_code': 'project', 'zone': 0, 'page': '1', 'page_size': '10'}
+        keys = {
+            'removed': prefetcher.make_key('user', 'files', params),
+            'other_user_removed': prefetcher.make_key('another-user', 'files', params),
+            'other_zone': prefetcher.make_key('user', 'files', {**params, 'zone': 1}),
+            'other_project': prefetcher.make_key('user', 'files', {**params, 'container_code': 'other'}),
+            'other_listing': prefetcher.make_key('user', 'datasets', params),
+        }
+        for key in keys.values():
+            prefetcher.set(key, {'result': []})
+
+        prefetcher.invalidate_listing('files', 'project', 0)
+
+        assert {name for name, key in keys.items() if key in prefetcher} == {
+            'other_zone',
+            'other_project',
+            'other_listing',
+        }
@@ -0,0 +1,62 @@
+# Copyright (C) 2022-Present Indoc Systems
+#
+# Licensed under the GNU AFFERO GENERAL PUBLIC LICENSE,
+# Version 3.0 (the "License") available at https://www.gnu.org/licenses/agpl-3.0.en.html.
+# You may not use this file except in compliance with the License.
+
+import asyncio
+import json
+import time
+
+from app.components.preupload_jobs import PreuploadJobTracker
+from app.models.base_models import APIResponse
+from tests.fixtures.redis import InMemoryRedis
+
+
+class TestPreuploadJobTracker:
+    async def test_running_job_is_refreshed_by_heartbeat(self):
+        redis = InMemoryRedis()
+        tracker = PreuploadJobTracker(redis, ttl=60, max_runtime=60, heartbeat_interval=0.01)
+        finished = asyncio.Event()
+
+        async def preupload():
+            await finished.wait()
+            return APIResponse()
+
+        job = await tracker.start('project', 'user', preupload())
+        started_at = json.loads(await redis.get(tracker.get_key(job['job_id'])))['updated_at']
+        await asyncio.sleep(0.05)
+        refreshed_at = json.loads(await redis.get(tracker.get_key(job['job_id'])))['updated_at']
+        finished.set()
+        await asyncio.gather(*tracker._tasks)
+
+        assert refreshed_at > started_at
+        assert (await tracker.get(job['job_id']))['status'] == 'SUCCEEDED'
+
+    async def test_get_reports_job_which_missed_heartbeats_as_failed(self):
+        redis = InMemoryRedis()
+        tracker = PreuploadJobTracker(redis, ttl=60, max_runtime=3600, heartbeat_interval=5)
+        job = {'job_id': 'job-id', 'status': 'RUNNING', 'updated_at': time.time() - 16}
+        await redis.set(tracker.get_key('job-id'), json.dumps(job))
+
+        received = await tracker.get('job-id')
+
+        assert received['status'] == 'FAILED'
+        assert received['code'] == 500
+        assert received['error_msg'] == 'Preupload job was interrupted'
+
+    async def test_stop_cancels_running_jobs_and_saves_them_as_failed(self):
+        redis = InMemoryRedis()
+        tracker = PreuploadJobTracker(redis, ttl=60, max_runtime=60, heartbeat_interval=5)
+
+        async def preupload():
+            await asyncio.Event().wait()
+
+        job = await tracker.start('project', 'user', preupload())
+        await asyncio.sleep(0)
+        await tracker.stop()
+
+        received = await tracker.get(job['job_id'])
+        assert not tracker._tasks
+        assert received['status'] == 'FAILED'
+        assert received['error_msg'] == 'Preupload job was cancelled on shutdown'
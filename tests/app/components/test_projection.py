@@ -0,0 +1,34 @@
+# Copyright (C) 2022-Present Indoc Systems
+#
+# Licensed under the GNU AFFERO GENERAL PUBLIC LICENSE,
+# Version 3.0 (the "License") available at https://www.gnu.org/licenses/agpl-3.0.en.html.
+# You may not use this file except in compliance with the License.
+
+from app.components.projection import ItemProjection
+from app.components.projection import get_item_projection
+
+
+class TestItemProjection:
+    def test_call_keeps_only_requested_fields_present_in_item(self):
+        projection = ItemProjection(['id', 'name', 'missing'])
+
+        assert projection({'id': 'item-id', 'name': 'file', 'size': 10}) == {'id': 'item-id', 'name': 'file'}
+
+    def test_call_returns_item_unchanged_when_no_fields_are_requested(self):
+        item = {'id': 'item-id', 'name': 'file'}
+
+        assert ItemProjection()(item) is item
+
+    async def test_stream_trims_each_streamed_item(self):
+        async def items():
+            yield {'id': 'item-1', 'name': 'file1'}
+            yield {'id': 'item-2', 'name': 'file2'}
+
+        projection = ItemProjection(['name'])
+
+        assert [item async for item in projection.stream(items())] == [{'name': 'file1'}, {'name': 'file2'}]
+
+    def test_get_item_projection_parses_comma_separated_fields(self):
+        projection = get_item_projection(' id, name,,id ')
+
+        assert projection.fields == ('id', 'name')
@@ -0,0 +1,30 @@
+# Copyright (C) 2022-Present Indoc Systems
+#
+# Licensed under the GNU AFFERO GENERAL PUBLIC LICENSE,
+# Version 3.0 (the "License") available at https://www.gnu.org/licenses/agpl-3.0.en.html.
+# You may not use this file except in compliance with the License.
+
+import pytest
+
+from app.components.streaming import iter_ndjson
+
+
+async def iter_chunks(*chunks: bytes):
+    for chunk in chunks:
+        yield chunk
+
+
+class TestIterNDJSON:
+    async def test_yields_records_split_across_chunks(self):
+        chunks = iter_chunks(b'{"id": "fi', b'le1"}\n\n{"id": "file2"}\n{"id"', b': "file3"}')
+
+        records = [record async for record in iter_ndjson(chunks, max_line_size=100)]
+
+        assert records == [{'id': 'file1'}, {'id': 'file2'}, {'id': 'file3'}]
+
+    @pytest.mark.parametrize('chunks', [(b'{"id": "f1"}\n', b'{"id": "', b'file2"}'), (b'{"id": "file2"}\n',)])
+    async def test_raises_value_error_when_line_is_longer_than_max_line_size(self, chunks):
+        records = iter_ndjson(iter_chunks(*chunks), max_line_size=12)
+
+        with pytest.raises(ValueError, match='line longer than 12 bytes'):
+            [record async for record in records]
@@ -0,0 +1,59 @@
+# Copyright (C) 2022-Present Indoc Systems
+#
+# Licensed under the GNU AFFERO GENERAL PUBLIC LICENSE,
+# Version 3.0 (the "License") available at https://www.gnu.org/licenses/agpl-3.0.en.html.
+# You may not use this file except in compliance with the License.
+
+from datetime import datetime
+from datetime import timedelta
+from datetime import timezone
+
+import pytest
+
+from app.components.sync_cursor import SyncWindow
+from app.components.sync_cursor import decode_sync_cursor
+from app.components.sync_cursor import encode_sync_cursor
+
+
+class TestSyncWindow:
+    def test_open_starts_window_at_time_stored_in_cursor(self):
+        synced_at = datetime(2023, 1, 1, 12, 30)
+
+        sync_window = SyncWindow.open(None, encode_sync_cursor(synced_at))
+
+        assert sync_window.start == synced_at
+        assert sync_window.end > synced_at
+        assert decode_sync_cursor(sync_window.next_cursor) == sync_window.end
+
+    def test_open_converts_modified_since_into_naive_utc(self):
+        modified_since = datetime(2023, 1, 1, 14, 30, tzinfo=timezone(timedelta(hours=2)))
+
+        sync_window = SyncWindow.open(modified_since, None)
+
+        assert sync_window.params['last_updated_start'] == '2023-01-01T12:30:00'
+
+    def test_open_raises_value_error_when_cursor_is_invalid(self):
+        with pytest.raises(ValueError, match='Invalid sync cursor'):
+            SyncWindow.open(None, 'invalid')
+
+    def test_open_ends_window_lag_seconds_before_now(self):
+        before = datetime.now(timezone.utc).replace(tzinfo=None)
+
+        sync_window = SyncWindow.open(datetime(2023, 1, 1), None, lag=60)
+
+        assert sync_window.end <= before - timedelta(seconds=59)
+
+    def test_open_does_not_end_window_before_its_start(self):
+        modified_since = datetime.now(timezone.utc).replace(tzinfo=None)
+
+        sync_window = SyncWindow.open(modified_since, None, lag=60)
+
+        assert sync_window.end == sync_window.start
+
+    def test_open_keeps_end_pinned_in_page_cursor(self):
+        first_page_window = SyncWindow.open(datetime(2023, 1, 1), None, lag=5)
+
+        next_page_window = SyncWindow.open(None, first_page_window.page_cursor, lag=5)
+
+        assert next_page_window == first_page_window
+        assert decode_sync_cursor(next_page_window.next_cursor) == first_page_window.end
@@ -9,6 +9,7 @@ from uuid import UUID
 
 import pytest
 
+from app.components.request.memo import RequestMemo
 from app.components.user.models import CurrentUser
 from app.components.user.models import UserRole
 
@@ -109,3 +110,18 @@ class TestCurrentUser:
         assert await user.can_access_dataset(dataset, project_service_client) is expected_result
 
         convert_codes_method.assert_called_once()
+
+    async def test_can_access_dataset_fetches_projects_through_request_memo(
+        self, fake, mocker, project_factory, project_service_client
+    ):
+        project = project_factory.mock_retrieval_by_code()
+        user = CurrentUser({'username': fake.pystr(), 'realm_roles': [f'{project.code}-{UserRole.ADMIN.value}']})
+        dataset = {'creator': fake.pystr(), 'project_id': str(project.id)}
+        memo = RequestMemo()
+        await memo.get_project(project_service_client, project.code)
+        convert_codes_method = mocker.spy(project_service_client, 'convert_project_codes_into_ids')
+
+        assert await user.can_access_dataset(dataset, project_service_client, memo) is True
+
+        convert_codes_method.assert_not_called()
+        assert memo.saved_calls == 1
@@ -0,0 +1,53 @@
+# Copyright (C) 2022-Present Indoc Systems
+#
+# Licensed under the GNU AFFERO GENERAL PUBLIC LICENSE,
+# Version 3.0 (the "License") available at https://www.gnu.org/licenses/agpl-3.0.en.html.
+# You may not use this file except in compliance with the License.
+
+import json
+
+from fastapi.responses import JSONResponse
+
+from app.models.base_models import APIResponse
+from app.models.base_models import EAPIResponseCode
+from app.models.file_models import ItemStatus
+from app.models.project_models import POSTProjectFile
+
+
+def legacy_json_response(api_response: APIResponse) -> JSONResponse:
+    data = api_response.dict()
+    data['code'] = api_response.code.value
+    return JSONResponse(status_code=api_response.code.value, content=data)
+
+
+class TestAPIResponse:
+    def test_json_response_matches_pydantic_dict_and_standard_encoder(self):
+        api_response = APIResponse()
+        api_response.code = EAPIResponseCode.not_found
+        api_response.error_msg = 'Item not found'
+        api_response.result = [
+            {'name': 'ünïcode', 'status': ItemStatus.ACTIVE, 'size': 1.5, 'tags': ('tag',), 'extra': None},
+            {'zone': 0, 'parents': [{'id': 'id'}]},
+        ]
+
+        response = api_response.json_response()
+
+        assert response.status_code == 404
+        assert response.body == legacy_json_response(api_response).body
+
+    def test_json_response_encodes_nested_models(self):
+        api_response = APIResponse()
+        api_response.result = {
+            'job': POSTProjectFile(
+                operator='admin',
+                job_type='AS_FILE',
+                zone='gr',
+                current_folder_node='',
+                parent_folder_id='id',
+                data=[],
+            )
+        }
+
+        response = api_response.json_response()
+
+        assert json.loads(response.body) == json.loads(legacy_json_response(api_response).body)
@@ -22,6 +22,9 @@ environ['PROJECT_SERVICE'] = 'http://project_service'
 environ['ENABLE_CACHE'] = 'false'
 
 # These imports are located here because of ConfigClass, which must first consume the above redefined env vars
+from app.components.folder_summary_cache import get_folder_summary_cache  # noqa: E402
+from app.components.item_path_cache import get_item_path_cache  # noqa: E402
+from app.components.page_prefetcher import get_page_prefetcher  # noqa: E402
 from app.components.user.models import CurrentUser  # noqa: E402
 from app.config import ConfigClass  # noqa: E402
 from app.config import Settings  # noqa: E402
@@ -157,6 +160,30 @@ def mock_settings(monkeypatch):
     monkeypatch.setattr(ConfigClass, 'METADATA_SERVICE', 'http://metadata_service')
 
 
+@pytest.fixture(autouse=True)
+def item_path_cache():
+    cache = get_item_path_cache()
+    cache.clear()
+    yield cache
+    cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def folder_summary_cache():
+    cache = get_folder_summary_cache()
+    cache.clear()
+    yield cache
+    cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def page_prefetcher():
+    cache = get_page_prefetcher()
+    cache.clear()
+    yield cache
+    cache.clear()
+
+
 @pytest.fixture
 def has_permission_true(httpx_mock):
     url = re.compile('^http://auth/v1/authorize.*$')
@@ -180,4 +207,5 @@ pytest_plugins = [
     'tests.fixtures.services.project',
     'tests.fixtures.fake',
     'tests.fixtures.request_context',
+    'tests.fixtures.redis',
 ]
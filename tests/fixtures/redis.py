@@ -0,0 +1,103 @@
+# Copyright (C) 2022-Present Indoc Systems
+#
+# Licensed under the GNU AFFERO GENERAL PUBLIC LICENSE,
+# Version 3.0 (the "License") available at https://www.gnu.org/licenses/agpl-3.0.en.html.
+# You may not use this file except in compliance with the License.
+
+from collections.abc import Awaitable
+from collections.abc import Callable
+from typing import Any
+
+import pytest
+
+from app.components import cache_generation
+from app.components import idempotency
+from app.components import lineage_spool
+from app.components import preupload_jobs
+
+
+class InMemoryRedis:
+    """Subset of the Redis client interface keeping values in memory."""
+
+    def __init__(self) -> None:
+        self.values: dict[str, bytes | dict[bytes, bytes]] = {}
+        self.expirations: dict[str, int] = {}
+
+    async def get(self, key: str) -> bytes | None:
+        return self.values.get(key)
+
+    async def set(self, key: str, value: str | bytes, ex: int | None = None, nx: bool = False) -> bool | None:
+        if nx and key in self.values:
+            return None
+        self.values[key] = value.encode('utf-8') if isinstance(value, str) else value
+        if ex:
+            self.expirations[key] = ex
+        return True
+
+    async def incr(self, key: str) -> int:
+        value = int(self.values.get(key, b'0')) + 1
+        self.values[key] = str(value).encode('utf-8')
+        return value
+
+    async def expire(self, key: str, seconds: int) -> bool:
+        if key not in self.values:
+            return False
+        self.expirations[key] = seconds
+        return True
+
+    async def delete(self, *keys: str) -> int:
+        return sum(self.values.pop(key, None) is not None for key in keys)
+
+    def register_script(self, script: str) -> Callable[..., Awaitable[int]]:
+        """Return the lock script of the lineage spool, which acts on the key only if it holds the token."""
+
+        async def run(keys: list[str], args: list[Any]) -> int:
+            key, token = keys[0], str(args[0]).encode('utf-8')
+            if self.values.get(key) != token:
+                return 0
+            if script == lineage_spool.EXTEND_LOCK_SCRIPT:
+                return int(await self.expire(key, int(args[1])))
+            if script == lineage_spool.RELEASE_LOCK_SCRIPT:
+                return await self.delete(key)
+            raise NotImplementedError(script)
+
+        return run
+
+    async def hset(self, name: str, key: str | bytes, value: str | bytes) -> int:
+        fields = self.values.setdefault(name, {})
+        key = key if isinstance(key, bytes) else key.encode('utf-8')
+        created = key not in fields
+        fields[key] = value if isinstance(value, bytes) else value.encode('utf-8')
+        return int(created)
+
+    async def hscan(self, name: str, cursor: int = 0, count: int | None = None) -> tuple[int, dict[bytes, bytes]]:
+        return 0, dict(self.values.get(name, {}))
+
+    async def hincrby(self, name: str, key: str | bytes, amount: int = 1) -> int:
+        fields = self.values.setdefault(name, {})
+        key = key if isinstance(key, bytes) else key.encode('utf-8')
+        value = int(fields.get(key, b'0')) + amount
+        fields[key] = str(value).encode('utf-8')
+        return value
+
+    async def hdel(self, name: str, *keys: str | bytes) -> int:
+        fields = self.values.get(name, {})
+        return sum(fields.pop(key if isinstance(key, bytes) else key.encode('utf-8'), None) is not None for key in keys)
+
+
+@pytest.fixture
+def redis(monkeypatch) -> InMemoryRedis:
+    redis = InMemoryRedis()
+    monkeypatch.setattr(preupload_jobs, 'get_redis', lambda: redis)
+    monkeypatch.setattr(cache_generation, 'get_redis', lambda: redis)
+    monkeypatch.setattr(idempotency, 'get_redis', lambda: redis)
+    monkeypatch.setattr(lineage_spool, 'get_redis', lambda: redis)
+    preupload_jobs.get_preupload_job_tracker.cache_clear()
+    cache_generation.get_cache_generations.cache_clear()
+    idempotency.get_idempotency_store.cache_clear()
+    lineage_spool.get_lineage_spool.cache_clear()
+    yield redis
+    preupload_jobs.get_preupload_job_tracker.cache_clear()
+    cache_generation.get_cache_generations.cache_clear()
+    idempotency.get_idempotency_store.cache_clear()
+    lineage_spool.get_lineage_spool.cache_clear()
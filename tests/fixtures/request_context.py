@@ -10,9 +10,25 @@ from fastapi.requests import Request
 
 from app.components.request.context import RequestContext
 from app.components.request.context import get_request_context
+from app.components.request.memo import RequestMemo
 
 
 @pytest.fixture
 def request_context(settings) -> RequestContext:
     request = Request(scope={'type': 'http', 'headers': Headers().raw})
     return get_request_context(request, settings)
+
+
+@pytest.fixture
+def request_memos(monkeypatch) -> list[RequestMemo]:
+    """Collect memos of all requests handled during the test."""
+
+    memos = []
+    init = RequestMemo.__init__
+
+    def collect_memo(memo: RequestMemo) -> None:
+        init(memo)
+        memos.append(memo)
+
+    monkeypatch.setattr(RequestMemo, '__init__', collect_memo)
+    return memos
@@ -4,14 +4,18 @@
 # Version 3.0 (the "License") available at https://www.gnu.org/licenses/agpl-3.0.en.html.
 # You may not use this file except in compliance with the License.
 
+import json
 import time
 
 import jwt
 import pytest
 from fastapi import Request
+from httpx import Response
 
+from app.config import ConfigClass
 from app.models.project_models import POSTProjectFile
 from app.resources.dependencies import jwt_required
+from app.resources.dependencies import merge_chunk_responses
 from app.resources.dependencies import transfer_to_pre
 from app.resources.error_handler import APIException
 
@@ -121,3 +125,111 @@ async def test_transfer_to_pre_with_external_service_fail():
         raise AssertionError()
     except Exception:
         assert True
+
+
+async def test_transfer_to_pre_splits_large_job_into_chunks_and_merges_results(httpx_mock, monkeypatch):
+    monkeypatch.setattr(ConfigClass, 'PREUPLOAD_CHUNK_SIZE', 2)
+    data = POSTProjectFile(
+        operator='operator',
+        job_type='AS_FILE',
+        zone='cr',
+        current_folder_node='current_folder_node',
+        parent_folder_id='parent_folder_id',
+        data=[{'resumable_filename': f'file{index}'} for index in range(5)],
+    )
+    httpx_mock.add_callback(
+        lambda request: Response(
+            200, json={'result': [file['resumable_filename'] for file in json.loads(request.content)['data']]}
+        ),
+        method='POST',
+        url='http://data_upload_cr/v1/files/jobs',
+    )
+
+    result = await transfer_to_pre(data, project_code, {})
+
+    assert result.status_code == 200
+    assert sorted(result.json()['result']) == ['file0', 'file1', 'file2', 'file3', 'file4']
+    assert len(httpx_mock.get_requests()) == 3
+
+
+async def test_transfer_to_pre_reports_failed_chunks(httpx_mock, monkeypatch):
+    monkeypatch.setattr(ConfigClass, 'PREUPLOAD_CHUNK_SIZE', 1)
+    data = POSTProjectFile(
+        operator='operator',
+        job_type='AS_FILE',
+        zone='cr',
+        current_folder_node='current_folder_node',
+        parent_folder_id='parent_folder_id',
+        data=[{'resumable_filename': 'file0'}, {'resumable_filename': 'file1'}],
+    )
+
+    def upload_jobs(request):
+        filename = json.loads(request.content)['data'][0]['resumable_filename']
+        if filename == 'file1':
+            return Response(500, json={'error_msg': 'mock error'})
+        return Response(200, json={'result': [filename]})
+
+    httpx_mock.add_callback(upload_jobs, method='POST', url='http://data_upload_cr/v1/files/jobs')
+
+    result = await transfer_to_pre(data, project_code, {})
+
+    assert result.status_code == 207
+    assert result.json()['error_msg'] == '1 of 2 chunks failed: chunk 1: mock error'
+    assert result.json()['result'] == {
+        'jobs': ['file0'],
+        'failed_chunks': [{'chunk': 1, 'files': 1, 'status_code': 500, 'error_msg': 'mock error'}],
+    }
+
+
+async def test_transfer_to_pre_sends_folder_job_in_one_request(httpx_mock, monkeypatch):
+    monkeypatch.setattr(ConfigClass, 'PREUPLOAD_CHUNK_SIZE', 1)
+    data = POSTProjectFile(
+        operator='operator',
+        job_type='AS_FOLDER',
+        zone='cr',
+        current_folder_node='folder',
+        parent_folder_id='parent_folder_id',
+        data=[{'resumable_filename': 'file0'}, {'resumable_filename': 'file1'}],
+    )
+    httpx_mock.add_response(method='POST', url='http://data_upload_cr/v1/files/jobs', json={'result': []})
+
+    result = await transfer_to_pre(data, project_code, {})
+
+    assert result.status_code == 200
+    assert len(httpx_mock.get_requests()) == 1
+
+
+async def test_transfer_to_pre_reports_failed_chunk_without_json_body(httpx_mock, monkeypatch):
+    monkeypatch.setattr(ConfigClass, 'PREUPLOAD_CHUNK_SIZE', 1)
+    data = POSTProjectFile(
+        operator='operator',
+        job_type='AS_FILE',
+        zone='cr',
+        current_folder_node='current_folder_node',
+        parent_folder_id='parent_folder_id',
+        data=[{'resumable_filename': 'file0'}, {'resumable_filename': 'file1'}],
+    )
+    httpx_mock.add_response(method='POST', url='http://data_upload_cr/v1/files/jobs', json={'result': ['file0']})
+    httpx_mock.add_response(
+        method='POST', url='http://data_upload_cr/v1/files/jobs', status_code=502, text='Bad Gateway'
+    )
+
+    result = await transfer_to_pre(data, project_code, {})
+
+    assert result.status_code == 207
+    assert result.json()['result']['failed_chunks'][0]['error_msg'] == 'Bad Gateway'
+
+
+@pytest.mark.parametrize(
+    'status_codes,expected_status_code',
+    [([409, 409], 409), ([409, 500], 500), ([200, 409], 207)],
+)
+def test_merge_chunk_responses_returns_conflict_only_when_no_chunk_succeeded(status_codes, expected_status_code):
+    responses = [
+        Response(status_code, json={'result': ['job']} if status_code == 200 else {'error_msg': 'error'})
+        for status_code in status_codes
+    ]
+
+    result = merge_chunk_responses([1] * len(responses), responses)
+
+    assert result.status_code == expected_status_code
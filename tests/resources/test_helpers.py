@@ -0,0 +1,38 @@
+# Copyright (C) 2022-Present Indoc Systems
+#
+# Licensed under the GNU AFFERO GENERAL PUBLIC LICENSE,
+# Version 3.0 (the "License") available at https://www.gnu.org/licenses/agpl-3.0.en.html.
+# You may not use this file except in compliance with the License.
+
+import pytest
+
+from app.config import ConfigClass
+from app.models.file_models import ItemStatus
+from app.resources.helpers import batch_query_node_by_geid
+
+pytestmark = pytest.mark.asyncio
+
+
+async def test_batch_query_node_by_geid_splits_ids_into_chunks_and_keeps_order(httpx_mock, monkeypatch):
+    monkeypatch.setattr(ConfigClass, 'METADATA_BATCH_QUERY_SIZE', 2)
+    httpx_mock.add_response(
+        method='GET',
+        url='http://metadata_service/v1/items/batch/?ids=geid1&ids=geid2',
+        json={'result': [{'id': 'geid1', 'status': ItemStatus.ACTIVE}, {'id': 'geid2', 'status': ItemStatus.ARCHIVED}]},
+    )
+    httpx_mock.add_response(
+        method='GET',
+        url='http://metadata_service/v1/items/batch/?ids=geid3&ids=geid4',
+        json={'result': [{'id': 'geid3', 'status': ItemStatus.ACTIVE}, {'id': 'geid4', 'status': ItemStatus.ACTIVE}]},
+    )
+    httpx_mock.add_response(
+        method='GET',
+        url='http://metadata_service/v1/items/batch/?ids=geid5',
+        json={'result': [{'id': 'unknown', 'status': ItemStatus.ACTIVE}]},
+    )
+
+    located_geid, query_result = await batch_query_node_by_geid(['geid1', 'geid2', 'geid3', 'geid1', 'geid4', 'geid5'])
+
+    assert located_geid == ['geid1', 'geid3', 'geid4']
+    assert set(query_result) == {'geid1', 'geid3', 'geid4'}
+    assert len(httpx_mock.get_requests()) == 3
@@ -4,10 +4,20 @@
 # Version 3.0 (the "License") available at https://www.gnu.org/licenses/agpl-3.0.en.html.
 # You may not use this file except in compliance with the License.
 
+import json
+import re
+from datetime import datetime
+
+import httpx
 import pytest
 from pytest_httpx import HTTPXMock
 
+from app.components.cache_generation import get_cache_generations
+from app.components.folder_summary_cache import FolderSummaryKey
+from app.components.sync_cursor import decode_sync_cursor
+from app.config import ConfigClass
 from app.models.file_models import ItemStatus
+from app.resources.folder_tree import FolderTreeWalker
 
 pytestmark = pytest.mark.asyncio
 
@@ -414,3 +424,503 @@ async def test_query_file_by_geid_when_file_is_archived(test_async_client_auth,
     result = res_json.get('result')
     for entity in result:
         assert entity['result'] == {}
+
+
+async def test_query_file_by_geid_streams_ndjson_records_when_requested(
+    test_async_client_auth, httpx_mock, has_permission_true
+):
+    payload = {'geid': ['file_geid', 'missing_geid']}
+    header = {'Authorization': 'fake token', 'Accept': 'application/x-ndjson'}
+    httpx_mock.add_response(
+        method='GET',
+        url='http://metadata_service/v1/items/batch/?ids=file_geid&ids=missing_geid',
+        json={
+            'result': [
+                {
+                    'id': 'file_geid',
+                    'parent_path': 'testuser',
+                    'restore_path': None,
+                    'status': ItemStatus.ACTIVE,
+                    'type': 'file',
+                    'zone': 0,
+                    'name': 'file',
+                    'container_code': project_code,
+                    'container_type': 'project',
+                }
+            ]
+        },
+    )
+
+    res = await test_async_client_auth.post(test_query_geid_api, headers=header, json=payload)
+
+    assert res.status_code == 200
+    assert res.headers['content-type'] == 'application/x-ndjson'
+    records = [json.loads(line) for line in res.text.splitlines()]
+    assert [record['geid'] for record in records] == payload['geid']
+    assert records[0]['status'] == 'success'
+    assert records[0]['result']['name'] == 'file'
+    assert records[1]['status'] == 'File Not Exist'
+
+
+async def test_query_file_by_geid_streams_same_records_as_json_for_duplicate_geids(
+    test_async_client_auth, httpx_mock, has_permission_true
+):
+    payload = {'geid': ['file_geid', 'missing_geid', 'file_geid']}
+    header = {'Authorization': 'fake token'}
+    item = {
+        'id': 'file_geid',
+        'parent_path': 'testuser',
+        'status': ItemStatus.ACTIVE,
+        'type': 'file',
+        'zone': 0,
+        'name': 'file',
+        'container_code': project_code,
+        'container_type': 'project',
+    }
+    for _ in range(2):
+        httpx_mock.add_response(
+            method='GET',
+            url='http://metadata_service/v1/items/batch/?ids=file_geid&ids=missing_geid',
+            json={'result': [item]},
+        )
+
+    json_res = await test_async_client_auth.post(test_query_geid_api, headers=header, json=payload)
+    ndjson_res = await test_async_client_auth.post(
+        test_query_geid_api, headers={**header, 'Accept': 'application/x-ndjson'}, json=payload
+    )
+
+    assert [json.loads(line) for line in ndjson_res.text.splitlines()] == json_res.json()['result']
+    assert [record['geid'] for record in json_res.json()['result']] == payload['geid']
+
+
+async def test_get_files_streams_items_of_all_pages_as_ndjson_when_requested(test_async_client_auth, httpx_mock):
+    param = {
+        'project_code': project_code,
+        'zone': '0',
+        'folder': '',
+        'source_type': 'Project',
+        'page': 0,
+        'page_size': 2,
+    }
+    header = {'Authorization': 'fake token', 'Accept': 'application/x-ndjson'}
+    url = (
+        'http://metadata_service/v1/items/search/?container_code=test_project&container_type=project'
+        '&recursive=false&zone=0&status=ACTIVE&page={page}&page_size=2&order=desc'
+    )
+    httpx_mock.add_response(
+        method='GET',
+        url=url.format(page=0),
+        json={'code': 200, 'num_of_pages': 2, 'result': [{'name': 'file1'}, {'name': 'file2'}]},
+    )
+    httpx_mock.add_response(
+        method='GET',
+        url=url.format(page=1),
+        json={'code': 200, 'num_of_pages': 2, 'result': [{'name': 'file3'}]},
+    )
+
+    res = await test_async_client_auth.get(test_get_file_api, headers=header, query_string=param)
+
+    assert res.status_code == 200
+    assert res.headers['content-type'] == 'application/x-ndjson'
+    assert [json.loads(line)['name'] for line in res.text.splitlines()] == ['file1', 'file2', 'file3']
+
+
+async def test_get_files_as_ndjson_returns_error_when_first_page_fails(test_async_client_auth, httpx_mock):
+    param = {
+        'project_code': project_code,
+        'zone': '0',
+        'folder': '',
+        'source_type': 'Project',
+        'page': 0,
+        'page_size': 2,
+    }
+    header = {'Authorization': 'fake token', 'Accept': 'application/x-ndjson'}
+    httpx_mock.add_response(
+        method='GET',
+        url=(
+            'http://metadata_service/v1/items/search/?container_code=test_project&container_type=project'
+            '&recursive=false&zone=0&status=ACTIVE&page=0&page_size=2&order=desc'
+        ),
+        json={'code': 500, 'error_msg': 'mock error', 'result': []},
+    )
+
+    res = await test_async_client_auth.get(test_get_file_api, headers=header, query_string=param)
+
+    assert res.status_code == 500
+    assert res.json()['error_msg'] == 'Error Getting Folder: mock error'
+
+
+def mock_folder_tree(httpx_mock, tree: dict[str, list[dict[str, str]]]) -> None:
+    url = (
+        'http://metadata_service/v1/items/search/?container_code=test_project&container_type=project'
+        '&recursive=false&zone=0&status=ACTIVE&order=desc&page=0&page_size=500'
+    )
+    for parent_path, items in tree.items():
+        httpx_mock.add_response(
+            method='GET',
+            url=f'{url}&parent_path={parent_path}' if parent_path else url,
+            json={'code': 200, 'num_of_pages': 1, 'result': items},
+        )
+
+
+async def test_get_file_tree_streams_nested_items_in_path_order(test_async_client_auth, httpx_mock):
+    param = {'zone': '0', 'source_type': 'Project', 'order': 'path'}
+    header = {'Authorization': 'fake token'}
+    mock_folder_tree(
+        httpx_mock,
+        {
+            '': [{'name': 'testuser', 'type': 'name_folder', 'parent_path': None}],
+            'testuser': [
+                {'name': 'file2', 'type': 'file', 'parent_path': 'testuser'},
+                {'name': 'folder1', 'type': 'folder', 'parent_path': 'testuser'},
+            ],
+            'testuser/folder1': [{'name': 'file1', 'type': 'file', 'parent_path': 'testuser/folder1'}],
+        },
+    )
+
+    res = await test_async_client_auth.get('/v1/test_project/files/tree', headers=header, query_string=param)
+
+    assert res.status_code == 200
+    assert res.headers['content-type'] == 'application/x-ndjson'
+    assert [json.loads(line)['name'] for line in res.text.splitlines()] == ['testuser', 'file2', 'folder1', 'file1']
+
+
+async def test_get_file_tree_does_not_expand_folders_deeper_than_max_depth(test_async_client_auth, httpx_mock):
+    param = {'zone': '0', 'source_type': 'Project', 'folder': 'testuser', 'max_depth': 2}
+    header = {'Authorization': 'fake token'}
+    mock_folder_tree(
+        httpx_mock,
+        {
+            'testuser': [{'name': 'folder1', 'type': 'folder', 'parent_path': 'testuser'}],
+            'testuser/folder1': [{'name': 'folder2', 'type': 'folder', 'parent_path': 'testuser/folder1'}],
+        },
+    )
+
+    res = await test_async_client_auth.get('/v1/test_project/files/tree', headers=header, query_string=param)
+
+    assert res.status_code == 200
+    assert [json.loads(line)['name'] for line in res.text.splitlines()] == ['folder1', 'folder2']
+
+
+async def test_get_file_tree_with_zero_max_depth_lists_only_the_folder(test_async_client_auth, httpx_mock):
+    param = {'zone': '0', 'source_type': 'Project', 'folder': 'testuser', 'max_depth': 0}
+    header = {'Authorization': 'fake token'}
+    mock_folder_tree(httpx_mock, {'testuser': [{'name': 'folder1', 'type': 'folder', 'parent_path': 'testuser'}]})
+
+    res = await test_async_client_auth.get('/v1/test_project/files/tree', headers=header, query_string=param)
+
+    assert res.status_code == 200
+    assert [json.loads(line)['name'] for line in res.text.splitlines()] == ['folder1']
+
+
+async def test_get_file_tree_lists_subfolders_only_when_there_is_a_free_slot(
+    test_async_client_auth, httpx_mock, monkeypatch
+):
+    monkeypatch.setattr(ConfigClass, 'FOLDER_TREE_CONCURRENCY', 1)
+    param = {'zone': '0', 'source_type': 'Project', 'folder': 'testuser', 'order': 'path'}
+    header = {'Authorization': 'fake token'}
+    folders = [{'name': f'folder{index}', 'type': 'folder', 'parent_path': 'testuser'} for index in range(3)]
+    mock_folder_tree(httpx_mock, {'testuser': folders, **{f'testuser/folder{index}': [] for index in range(3)}})
+    listed = []
+    list_folder = FolderTreeWalker.list_folder
+
+    async def track_list_folder(self, parent_path, depth):
+        listed.append((parent_path, self._prefetched))
+        return await list_folder(self, parent_path, depth)
+
+    monkeypatch.setattr(FolderTreeWalker, 'list_folder', track_list_folder)
+
+    res = await test_async_client_auth.get('/v1/test_project/files/tree', headers=header, query_string=param)
+
+    assert res.status_code == 200
+    assert [json.loads(line)['name'] for line in res.text.splitlines()] == ['folder0', 'folder1', 'folder2']
+    assert max(prefetched for _, prefetched in listed) <= 1
+
+
+async def test_get_file_tree_returns_error_when_root_folder_listing_fails(test_async_client_auth, httpx_mock):
+    param = {'zone': '0', 'source_type': 'Project', 'folder': 'testuser'}
+    header = {'Authorization': 'fake token'}
+    httpx_mock.add_response(method='GET', json={'code': 500, 'error_msg': 'mock error', 'result': []})
+
+    res = await test_async_client_auth.get('/v1/test_project/files/tree', headers=header, query_string=param)
+
+    assert res.status_code == 500
+
+
+async def test_get_files_modified_since_returns_only_changed_items_and_sync_cursor(test_async_client_auth, httpx_mock):
+    param = {
+        'project_code': project_code,
+        'zone': '0',
+        'folder': '',
+        'source_type': 'Project',
+        'page': 0,
+        'page_size': 10,
+        'recursive': True,
+        'modified_since': '2023-01-01T12:30:00',
+    }
+    header = {'Authorization': 'fake token'}
+    httpx_mock.add_response(
+        method='GET',
+        url=re.compile(
+            r'^http://metadata_service/v1/items/search/\?container_code=test_project&container_type=project'
+            r'&recursive=true&zone=0&status=ACTIVE&page=0&page_size=10&order=desc'
+            r'&last_updated_start=2023-01-01T12%3A30%3A00&last_updated_end=.+$'
+        ),
+        json={'code': 200, 'error_msg': '', 'result': [{'name': 'changed_file'}]},
+    )
+
+    res = await test_async_client_auth.get(test_get_file_api, headers=header, query_string=param)
+
+    assert res.status_code == 200
+    assert res.json()['result'] == [{'name': 'changed_file'}]
+    assert decode_sync_cursor(res.headers['X-Sync-Cursor']) > datetime(2023, 1, 1, 12, 30)
+
+
+async def test_get_files_with_page_cursor_lists_next_page_of_the_same_sync_window(test_async_client_auth, httpx_mock):
+    param = {
+        'project_code': project_code,
+        'zone': '0',
+        'folder': '',
+        'source_type': 'Project',
+        'page_size': 1,
+        'modified_since': '2023-01-01T12:30:00',
+    }
+    header = {'Authorization': 'fake token'}
+    httpx_mock.add_response(
+        method='GET',
+        url=re.compile(r'^http://metadata_service/v1/items/search/.*$'),
+        json={'code': 200, 'error_msg': '', 'num_of_pages': 2, 'result': [{'name': 'changed_file'}]},
+    )
+
+    first = await test_async_client_auth.get(test_get_file_api, headers=header, query_string={**param, 'page': 0})
+    next_param = {**param, 'page': 1, 'cursor': first.headers['X-Sync-Page-Cursor']}
+    second = await test_async_client_auth.get(test_get_file_api, headers=header, query_string=next_param)
+
+    assert second.headers['X-Sync-Page-Cursor'] == first.headers['X-Sync-Page-Cursor']
+    assert second.headers['X-Sync-Cursor'] == first.headers['X-Sync-Cursor']
+    ends = {request.url.params['last_updated_end'] for request in httpx_mock.get_requests()}
+    assert len(ends) == 1
+
+
+async def test_get_files_with_page_cursor_serves_next_page_from_prefetched_pages(
+    test_async_client_auth, httpx_mock, page_prefetcher
+):
+    param = {
+        'project_code': project_code,
+        'zone': '0',
+        'folder': '',
+        'source_type': 'Project',
+        'page_size': 1,
+        'modified_since': '2023-01-01T12:30:00',
+    }
+    header = {'Authorization': 'fake token'}
+    httpx_mock.add_callback(
+        lambda request: httpx.Response(
+            200,
+            json={
+                'code': 200,
+                'error_msg': '',
+                'num_of_pages': 2,
+                'result': [{'name': f'file{request.url.params["page"]}'}],
+            },
+        ),
+        method='GET',
+        url=re.compile(r'^http://metadata_service/v1/items/search/.*$'),
+    )
+
+    first = await test_async_client_auth.get(test_get_file_api, headers=header, query_string={**param, 'page': 0})
+    next_param = {**param, 'page': 1, 'cursor': first.headers['X-Sync-Page-Cursor']}
+    second = await test_async_client_auth.get(test_get_file_api, headers=header, query_string=next_param)
+
+    assert second.json()['result'] == [{'name': 'file1'}]
+    assert len(httpx_mock.get_requests()) == 2
+    assert page_prefetcher.hits == 1
+
+
+async def test_get_files_with_invalid_sync_cursor_returns_400(test_async_client_auth, httpx_mock):
+    param = {
+        'project_code': project_code,
+        'zone': '0',
+        'folder': '',
+        'source_type': 'Project',
+        'page': 0,
+        'page_size': 10,
+        'cursor': 'invalid',
+    }
+    header = {'Authorization': 'fake token'}
+
+    res = await test_async_client_auth.get(test_get_file_api, headers=header, query_string=param)
+
+    assert res.status_code == 400
+    assert res.json()['error_msg'] == 'Invalid sync cursor "invalid"'
+
+
+async def test_get_files_returns_only_requested_fields(test_async_client_auth, httpx_mock):
+    param = {
+        'project_code': project_code,
+        'zone': '0',
+        'folder': '',
+        'source_type': 'Project',
+        'page': 0,
+        'page_size': 10,
+        'fields': 'id,name',
+    }
+    header = {'Authorization': 'fake token'}
+    httpx_mock.add_response(
+        method='GET',
+        url=(
+            'http://metadata_service/v1/items/search/?container_code=test_project&container_type=project'
+            '&recursive=false&zone=0&status=ACTIVE&page=0&page_size=10&order=desc'
+        ),
+        json={
+            'code': 200,
+            'error_msg': '',
+            'result': [{'id': 'file-id', 'name': 'file', 'type': 'file', 'extended': {'extra': {'tags': []}}}],
+        },
+    )
+
+    res = await test_async_client_auth.get(test_get_file_api, headers=header, query_string=param)
+
+    assert res.status_code == 200
+    assert res.json()['result'] == [{'id': 'file-id', 'name': 'file'}]
+
+
+async def test_query_file_by_geid_returns_only_requested_fields(
+    test_async_client_auth, httpx_mock, has_permission_true
+):
+    payload = {'geid': ['file_geid']}
+    header = {'Authorization': 'fake token'}
+    httpx_mock.add_response(
+        method='GET',
+        url='http://metadata_service/v1/items/batch/?ids=file_geid',
+        json={
+            'code': 200,
+            'result': [
+                {
+                    'id': 'file_geid',
+                    'name': 'file',
+                    'status': ItemStatus.ACTIVE,
+                    'type': 'file',
+                    'zone': 0,
+                    'parent_path': 'testuser',
+                    'container_code': project_code,
+                    'container_type': 'project',
+                }
+            ],
+        },
+    )
+
+    res = await test_async_client_auth.post(
+        test_query_geid_api, headers=header, json=payload, query_string={'fields': 'id, status'}
+    )
+
+    assert res.status_code == 200
+    assert res.json()['result'] == [
+        {'status': 'success', 'result': {'id': 'file_geid', 'status': 'ACTIVE'}, 'geid': 'file_geid'}
+    ]
+
+
+async def test_get_folder_summary_aggregates_folder_tree_and_caches_result(test_async_client_auth, httpx_mock, redis):
+    param = {'zone': '0', 'source_type': 'Project', 'folder': 'testuser'}
+    header = {'Authorization': 'fake token'}
+    mock_folder_tree(
+        httpx_mock,
+        {
+            'testuser': [
+                {'name': 'file1', 'type': 'file', 'size': 10, 'last_updated_time': '2022-04-13 18:17:51.008227'},
+                {'name': 'folder1', 'type': 'folder', 'parent_path': 'testuser', 'last_updated_time': None},
+            ],
+            'testuser/folder1': [
+                {'name': 'file2', 'type': 'file', 'size': 5, 'last_updated_time': '2023-01-01 10:00:00.000000'}
+            ],
+        },
+    )
+
+    for _ in range(2):
+        res = await test_async_client_auth.get('/v1/test_project/files/summary', headers=header, query_string=param)
+        assert res.status_code == 200
+        assert res.json()['result'] == {
+            'file_count': 2,
+            'folder_count': 1,
+            'total_size': 15,
+            'last_updated_time': '2023-01-01 10:00:00.000000',
+        }
+
+    assert len(httpx_mock.get_requests()) == 2
+
+
+async def test_get_folder_summary_walks_folders_deeper_than_tree_max_depth(
+    test_async_client_auth, httpx_mock, monkeypatch
+):
+    monkeypatch.setattr(ConfigClass, 'FOLDER_TREE_MAX_DEPTH', 1)
+    param = {'zone': '0', 'source_type': 'Project', 'folder': 'testuser'}
+    header = {'Authorization': 'fake token'}
+    mock_folder_tree(
+        httpx_mock,
+        {
+            'testuser': [{'name': 'folder1', 'type': 'folder', 'parent_path': 'testuser'}],
+            'testuser/folder1': [{'name': 'folder2', 'type': 'folder', 'parent_path': 'testuser/folder1'}],
+            'testuser/folder1/folder2': [{'name': 'file', 'type': 'file', 'size': 5}],
+        },
+    )
+
+    res = await test_async_client_auth.get('/v1/test_project/files/summary', headers=header, query_string=param)
+
+    assert res.status_code == 200
+    assert res.json()['result']['file_count'] == 1
+    assert res.json()['result']['total_size'] == 5
+
+
+async def test_get_folder_summary_is_cached_per_user(test_async_client_auth, httpx_mock, folder_summary_cache, redis):
+    param = {'zone': '0', 'source_type': 'Project', 'folder': 'testuser'}
+    header = {'Authorization': 'fake token'}
+    mock_folder_tree(httpx_mock, {'testuser': [{'name': 'file', 'type': 'file', 'size': 5}]})
+    other_user_key = FolderSummaryKey(project_code, 'project', 0, 'testuser', 'other_user', 0)
+    folder_summary_cache.set(other_user_key, {'file_count': 100})
+
+    res = await test_async_client_auth.get('/v1/test_project/files/summary', headers=header, query_string=param)
+
+    assert res.json()['result']['file_count'] == 1
+    assert folder_summary_cache.get(other_user_key) == {'file_count': 100}
+
+
+async def test_get_files_serves_next_page_from_prefetched_pages(test_async_client_auth, httpx_mock, page_prefetcher):
+    param = {
+        'project_code': project_code,
+        'zone': '0',
+        'folder': '',
+        'source_type': 'Project',
+        'page_size': 1,
+    }
+    header = {'Authorization': 'fake token'}
+    url = (
+        'http://metadata_service/v1/items/search/?container_code=test_project&container_type=project'
+        '&recursive=false&zone=0&status=ACTIVE&page={page}&page_size=1&order=desc'
+    )
+    for page in range(2):
+        httpx_mock.add_response(
+            method='GET',
+            url=url.format(page=page),
+            json={'code': 200, 'error_msg': '', 'num_of_pages': 2, 'result': [{'name': f'file{page}'}]},
+        )
+
+    for page in range(2):
+        res = await test_async_client_auth.get(test_get_file_api, headers=header, query_string={**param, 'page': page})
+        assert res.json()['result'] == [{'name': f'file{page}'}]
+
+    assert len(httpx_mock.get_requests()) == 2
+    assert page_prefetcher.hits == 1
+
+
+async def test_get_folder_summary_walks_tree_again_after_upload_in_another_worker(
+    test_async_client_auth, httpx_mock, folder_summary_cache, redis
+):
+    param = {'zone': '0', 'source_type': 'Project', 'folder': 'testuser'}
+    header = {'Authorization': 'fake token'}
+    mock_folder_tree(httpx_mock, {'testuser': [{'name': 'file', 'type': 'file', 'size': 5}]})
+    folder_summary_cache.set(FolderSummaryKey(project_code, 'project', 0, 'testuser', 'testuser', 0), {'file_count': 0})
+    await get_cache_generations().bump(project_code, 0)
+
+    res = await test_async_client_auth.get('/v1/test_project/files/summary', headers=header, query_string=param)
+
+    assert res.json()['result']['file_count'] == 1
@@ -4,10 +4,26 @@
 # Version 3.0 (the "License") available at https://www.gnu.org/licenses/agpl-3.0.en.html.
 # You may not use this file except in compliance with the License.
 
+import json
+
 import pytest
+from async_asgi_testclient import TestClient as TestAsyncClient
+
+from app.components.lineage_spool import get_lineage_spool
+from app.config import ConfigClass
+from app.main import create_app
+from app.resources.dependencies import get_lineage_client
 
 pytestmark = pytest.mark.asyncio
 test_lineage_api = '/v1/lineage'
+test_lineage_batch_api = '/v1/lineage/batch'
+
+
+@pytest.fixture
+def lineage_client():
+    get_lineage_client.cache_clear()
+    yield get_lineage_client()
+    get_lineage_client.cache_clear()
 
 
 async def test_create_lineage_return_200(test_async_client_auth, mocker):
@@ -40,3 +56,114 @@ async def test_create_lineage_with_internal_error_return_500(test_async_client_a
     mocker.patch('app.clients.lineage.LineageClient.create_lineage', side_effect=Exception('ID not found'))
     res = await test_async_client_auth.post(test_lineage_api, headers=header, json=payload)
     assert res.status_code == 500
+
+
+async def test_create_lineage_batch_submits_lineages_in_bulk_requests(
+    test_async_client_auth, httpx_mock, lineage_client
+):
+    lineage_client.bulk_size = 2
+    lineage = {
+        'project_code': 'test_project',
+        'input_id': 'fake_input_id',
+        'output_id': 'fake_output_id',
+        'input_path': 'fake/path/test.txt',
+        'output_path': 'fake/path/destination/test.txt',
+        'action_type': 'copy',
+        'description': 'Test lineage',
+    }
+    payload = {'lineages': [lineage, {**lineage, 'output_id': 'fake_output_id_2'}, {**lineage, 'input_id': 'input_3'}]}
+    httpx_mock.add_response(method='POST', url=f'{ConfigClass.ATLAS_API}/api/atlas/v2/entity/bulk', json={})
+    header = {'Authorization': 'fake token'}
+
+    res = await test_async_client_auth.post(test_lineage_batch_api, headers=header, json=payload)
+
+    assert res.status_code == 200
+    assert res.json()['result'] == {'created': 3}
+    bulk_requests = httpx_mock.get_requests(url=f'{ConfigClass.ATLAS_API}/api/atlas/v2/entity/bulk')
+    assert [len(json.loads(request.content)['entities']) for request in bulk_requests] == [2, 1]
+    outputs = json.loads(bulk_requests[0].content)['entities'][1]['attributes']['outputs']
+    assert outputs[0]['uniqueAttributes'] == {'item_id': 'fake_output_id_2'}
+
+
+async def test_create_lineage_batch_with_atlas_error_return_500(test_async_client_auth, httpx_mock, lineage_client):
+    payload = {
+        'lineages': [
+            {
+                'project_code': 'test_project',
+                'input_id': 'fake_input_id',
+                'output_id': 'fake_output_id',
+                'input_path': 'fake/path/test.txt',
+                'output_path': 'fake/path/destination/test.txt',
+                'action_type': 'copy',
+                'description': 'Test lineage',
+            }
+        ]
+    }
+    httpx_mock.add_response(
+        method='POST', url=f'{ConfigClass.ATLAS_API}/api/atlas/v2/entity/bulk', status_code=500, text='Atlas error'
+    )
+    header = {'Authorization': 'fake token'}
+
+    res = await test_async_client_auth.post(test_lineage_batch_api, headers=header, json=payload)
+
+    assert res.status_code == 500
+    assert res.json()['error_msg'] == 'Lineage creation failed'
+    assert res.json()['result'] == {'created': 0}
+
+
+async def test_create_lineage_batch_reports_lineages_created_before_atlas_error(
+    test_async_client_auth, httpx_mock, lineage_client
+):
+    lineage_client.bulk_size = 1
+    lineage = {
+        'project_code': 'test_project',
+        'input_id': 'fake_input_id',
+        'output_id': 'fake_output_id',
+        'input_path': 'fake/path/test.txt',
+        'output_path': 'fake/path/destination/test.txt',
+        'action_type': 'copy',
+        'description': 'Test lineage',
+    }
+    payload = {'lineages': [lineage, {**lineage, 'output_id': 'fake_output_id_2'}, {**lineage, 'input_id': 'input_3'}]}
+    url = f'{ConfigClass.ATLAS_API}/api/atlas/v2/entity/bulk'
+    httpx_mock.add_response(method='POST', url=url, json={})
+    httpx_mock.add_response(method='POST', url=url, status_code=500, text='Atlas error')
+    header = {'Authorization': 'fake token'}
+
+    res = await test_async_client_auth.post(test_lineage_batch_api, headers=header, json=payload)
+
+    assert res.status_code == 500
+    assert res.json()['result'] == {'created': 1}
+    assert len(httpx_mock.get_requests(url=url)) == 2
+
+
+async def test_shutdown_closes_shared_lineage_client(lineage_client):
+    async with TestAsyncClient(create_app()):
+        assert not lineage_client.client.is_closed
+
+    assert lineage_client.client.is_closed
+    assert get_lineage_client() is not lineage_client
+
+
+async def test_create_lineage_with_respond_async_preference_spools_lineage(
+    test_async_client_auth, mocker, monkeypatch, redis
+):
+    monkeypatch.setattr(ConfigClass, 'LINEAGE_SPOOL_ENABLED', True)
+    payload = {
+        'project_code': 'test_project',
+        'input_id': 'fake_input_id',
+        'output_id': 'fake_output_id',
+        'input_path': 'fake/path/test.txt',
+        'output_path': 'fake/path/destination/test.txt',
+        'action_type': 'copy',
+        'description': 'Test lineage',
+    }
+    header = {'Authorization': 'fake token', 'Prefer': 'respond-async'}
+    create_lineage = mocker.patch('app.clients.lineage.LineageClient.create_lineage')
+
+    res = await test_async_client_auth.post(test_lineage_api, headers=header, json=payload)
+
+    assert res.status_code == 202
+    create_lineage.assert_not_called()
+    _, spooled = await redis.hscan(get_lineage_spool().key)
+    assert [json.loads(lineage) for lineage in spooled.values()] == [payload]
@@ -49,7 +49,7 @@ async def test_get_attributes_should_return_200(test_async_client_auth, mocker,
     )
     payload = {'project_code': project_code}
     header = {'Authorization': 'fake token'}
-    mocker.patch('app.routers.v1.api_manifest.get_user_projects', return_value=[{'code': project_code}])
+    mocker.patch('app.components.request.memo.get_user_projects', return_value=[{'code': project_code}])
     res = await test_async_client_auth.get(test_api, headers=header, query_string=payload)
     res_json = res.json()
     assert res_json.get('code') == 200
@@ -59,7 +59,7 @@ async def test_get_attributes_should_return_200(test_async_client_auth, mocker,
 async def test_get_attributes_no_access_should_return_403(test_async_client_auth, mocker):
     payload = {'project_code': project_code}
     headers = {'Authorization': 'fake token'}
-    mocker.patch('app.routers.v1.api_manifest.get_user_projects', return_value=[])
+    mocker.patch('app.components.request.memo.get_user_projects', return_value=[])
     res = await test_async_client_auth.get(test_api, headers=headers, query_string=payload)
     res_json = res.json()
     assert res_json.get('code') == 403
@@ -69,7 +69,7 @@ async def test_get_attributes_no_access_should_return_403(test_async_client_auth
 async def test_get_attributes_project_not_exist_should_return_403(test_async_client_auth, mocker):
     payload = {'project_code': 't1000'}
     headers = {'Authorization': 'fake token'}
-    mocker.patch('app.routers.v1.api_manifest.get_user_projects', return_value=[])
+    mocker.patch('app.components.request.memo.get_user_projects', return_value=[])
     res = await test_async_client_auth.get(test_api, headers=headers, query_string=payload)
     res_json = res.json()
     assert res_json.get('code') == 403
@@ -110,7 +110,7 @@ async def test_export_attributes_should_return_200(test_async_client_auth, mocke
     )
     param = {'project_code': project_code, 'name': 'fake_manifest'}
     headers = {'Authorization': 'fake token'}
-    mocker.patch('app.routers.v1.api_manifest.get_user_projects', return_value=[{'code': project_code}])
+    mocker.patch('app.components.request.memo.get_user_projects', return_value=[{'code': project_code}])
     res = await test_async_client_auth.get(test_export_api, headers=headers, query_string=param)
     res_json = res.json()
     assert res_json.get('code') == 200
@@ -122,7 +122,7 @@ async def test_export_attributes_should_return_200(test_async_client_auth, mocke
 async def test_export_attributes_no_access(test_async_client_auth, mocker):
     param = {'project_code': project_code, 'name': 'fake_manifest'}
     headers = {'Authorization': 'fake token'}
-    mocker.patch('app.routers.v1.api_manifest.get_user_projects', return_value=[])
+    mocker.patch('app.components.request.memo.get_user_projects', return_value=[])
     res = await test_async_client_auth.get(test_export_api, headers=headers, query_string=param)
     res_json = res.json()
     assert res_json.get('code') == 403
@@ -138,7 +138,7 @@ async def test_export_attributes_not_exist_should_return_404(test_async_client_a
     )
     param = {'project_code': project_code, 'name': 'Manifest1'}
     headers = {'Authorization': 'fake token'}
-    mocker.patch('app.routers.v1.api_manifest.get_user_projects', return_value=[{'code': project_code}])
+    mocker.patch('app.components.request.memo.get_user_projects', return_value=[{'code': project_code}])
     res = await test_async_client_auth.get(test_export_api, headers=headers, query_string=param)
     res_json = res.json()
     assert res_json.get('code') == 404
@@ -148,7 +148,7 @@ async def test_export_attributes_not_exist_should_return_404(test_async_client_a
 async def test_export_attributes_project_not_exist_should_return_403(test_async_client_auth, mocker):
     param = {'project_code': 't1000', 'name': 'fake_manifest'}
     headers = {'Authorization': 'fake token'}
-    mocker.patch('app.routers.v1.api_manifest.get_user_projects', return_value=[])
+    mocker.patch('app.components.request.memo.get_user_projects', return_value=[])
     res = await test_async_client_auth.get(test_export_api, headers=headers, query_string=param)
     res_json = res.json()
     assert res_json.get('code') == 403
@@ -180,7 +180,7 @@ async def test_attach_attributes_should_return_200(test_async_client_auth, mocke
         'zone': '0',
     }
     header = {'Authorization': 'fake token'}
-    mocker.patch('app.routers.v1.api_manifest.has_file_permission', return_value=True)
+    mocker.patch('app.components.permission.evaluator.FilePermissionEvaluator.has_permission', return_value=True)
     # check file exist
     httpx_mock.add_response(
         method='GET',
@@ -301,7 +301,7 @@ async def test_attach_attributes_wrong_file_should_return_404(test_async_client_
         'zone': 'zone',
     }
     header = {'Authorization': 'fake token'}
-    mocker.patch('app.routers.v1.api_manifest.get_user_projects', return_value=[{'code': project_code}])
+    mocker.patch('app.components.request.memo.get_user_projects', return_value=[{'code': project_code}])
     httpx_mock.add_response(
         method='GET',
         url=(
@@ -324,6 +324,37 @@ async def test_attach_attributes_wrong_file_should_return_404(test_async_client_
     assert error == 'File Not Exist'
 
 
+async def test_attach_attributes_with_duplicate_idempotency_key_searches_file_once(
+    test_async_client_auth, httpx_mock, redis
+):
+    payload = {
+        'manifest_name': 'fake_manifest',
+        'project_code': project_code,
+        'attributes': {'attr1': 'a1'},
+        'file_name': 'fake_wrong_file',
+        'zone': 'zone',
+    }
+    header = {'Authorization': 'fake token', 'Idempotency-Key': 'attach-key'}
+    search_url = (
+        'http://metadata_service/v1/items/search/'
+        f'?container_code={project_code}'
+        '&container_type=project'
+        '&parent_path='
+        '&recursive=false'
+        '&zone=0'
+        '&status=ACTIVE'
+        '&name=fake_wrong_file'
+    )
+    httpx_mock.add_response(method='GET', url=search_url, json={'code': 200, 'result': []}, status_code=200)
+
+    first = await test_async_client_auth.post(test_manifest_attach_api, headers=header, json=payload)
+    second = await test_async_client_auth.post(test_manifest_attach_api, headers=header, json=payload)
+
+    assert first.json()['code'] == 404
+    assert second.json() == first.json()
+    assert len(httpx_mock.get_requests(url=search_url)) == 1
+
+
 async def test_attach_attributes_wrong_name_should_return_400(test_async_client_auth, httpx_mock, mocker):
     payload = {
         'manifest_name': 'Manifest1',
@@ -333,7 +364,7 @@ async def test_attach_attributes_wrong_name_should_return_400(test_async_client_
         'zone': 'zone',
     }
     header = {'Authorization': 'fake token'}
-    mocker.patch('app.routers.v1.api_manifest.has_file_permission', return_value=True)
+    mocker.patch('app.components.permission.evaluator.FilePermissionEvaluator.has_permission', return_value=True)
     httpx_mock.add_response(
         method='GET',
         url=(
@@ -426,7 +457,7 @@ async def test_attach_attributes_no_access_should_return_403(test_async_client_a
         'zone': 'zone',
     }
     header = {'Authorization': 'fake token'}
-    mocker.patch('app.routers.v1.api_manifest.has_file_permission', return_value=False)
+    mocker.patch('app.components.permission.evaluator.FilePermissionEvaluator.has_permission', return_value=False)
     res = await test_async_client_auth.post(test_manifest_attach_api, headers=header, json=payload)
     res_json = res.json()
     assert res_json.get('code') == 403
@@ -443,7 +474,7 @@ async def test_fail_to_attach_attributes_return_404(test_async_client_auth, http
         'zone': 'zone',
     }
     header = {'Authorization': 'fake token'}
-    mocker.patch('app.routers.v1.api_manifest.get_user_projects', return_value=[{'code': project_code}])
+    mocker.patch('app.components.request.memo.get_user_projects', return_value=[{'code': project_code}])
     httpx_mock.add_response(
         method='GET',
         url=(
@@ -463,3 +494,26 @@ async def test_fail_to_attach_attributes_return_404(test_async_client_auth, http
     assert res_json.get('code') == 404
     error = res_json.get('error_msg')
     assert error == 'File Not Exist'
+
+
+async def test_export_manifest_with_matching_if_none_match_returns_304(test_async_client_auth, mocker, httpx_mock):
+    httpx_mock.add_response(
+        method='GET',
+        url=f'http://metadata_service/v1/template/?project_code={project_code}&name=fake_manifest',
+        json={
+            'code': 200,
+            'error_msg': '',
+            'result': [{'id': 'fake-id', 'name': 'fake_manifest', 'project_code': project_code, 'attributes': []}],
+        },
+    )
+    mocker.patch('app.components.request.memo.get_user_projects', return_value=[{'code': project_code}])
+    payload = {'project_code': project_code, 'name': 'fake_manifest'}
+    header = {'Authorization': 'fake token'}
+
+    res = await test_async_client_auth.get(test_export_api, headers=header, query_string=payload)
+    not_modified_res = await test_async_client_auth.get(
+        test_export_api, headers={**header, 'If-None-Match': res.headers['ETag']}, query_string=payload
+    )
+
+    assert res.status_code == 200
+    assert not_modified_res.status_code == 304
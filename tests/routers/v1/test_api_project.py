@@ -4,10 +4,19 @@
 # Version 3.0 (the "License") available at https://www.gnu.org/licenses/agpl-3.0.en.html.
 # You may not use this file except in compliance with the License.
 
+import asyncio
+import json
+import re
+import time
+
+import httpx
 import pytest
 from pytest_httpx import HTTPXMock
 from requests.models import Response
 
+from app.components.cache_generation import get_cache_generations
+from app.components.item_path_cache import ItemPathKey
+from app.components.preupload_jobs import get_preupload_job_tracker
 from app.config import ConfigClass
 from app.models.file_models import ItemStatus
 
@@ -52,6 +61,11 @@ def mock_get_item_by_id(httpx_mock):
     )
 
 
+@pytest.fixture
+def mock_get_items_batch(httpx_mock):
+    mock_items_batch(httpx_mock, ['test_id'])
+
+
 async def test_get_project_list_should_return_200(test_async_client_auth, mocker):
     test_project = ['project1', 'project2', 'project3']
     mocker.patch(
@@ -167,6 +181,34 @@ async def test_upload_with_conflict_should_return_409(
     assert res_json.get('error_msg') == 'File with that name already exists'
 
 
+async def test_upload_with_partially_failed_chunks_returns_207_with_created_jobs(
+    test_async_client_auth, mocker, has_permission_true, mock_get_item_by_id
+):
+    payload = {
+        'operator': 'test_user',
+        'job_type': 'AS_FILE',
+        'zone': 'gr',
+        'current_folder_node': '',
+        'parent_folder_id': 'test_id',
+        'data': [{'resumable_filename': 'fake.png', 'resumable_relative_path': ''}],
+    }
+    result = {
+        'jobs': ['job'],
+        'failed_chunks': [{'chunk': 1, 'files': 1, 'status_code': 409, 'error_msg': 'conflict'}],
+    }
+    mock_response = Response()
+    mock_response.status_code = 207
+    mock_response._content = json.dumps({'error_msg': '1 of 2 chunks failed', 'result': result}).encode()
+    mocker.patch('app.routers.v1.api_project.transfer_to_pre', return_value=mock_response)
+    header = {'Authorization': 'fake token'}
+
+    response = await test_async_client_auth.post(test_get_project_file_api, headers=header, json=payload)
+
+    assert response.status_code == 207
+    assert response.json()['result'] == result
+    assert response.json()['error_msg'] == 'Partial Upload Error: 1 of 2 chunks failed'
+
+
 async def test_upload_files_into_project_with_tag_permission_should_return_200(
     test_async_client_auth, mocker, httpx_mock, mock_get_item_by_id, has_permission_true
 ):
@@ -262,7 +304,7 @@ async def test_upload_with_internal_error_should_return_500(
 
 
 async def test_resume_upload_files_success(
-    test_async_client_auth, mocker, httpx_mock, mock_get_item_by_id, has_permission_true
+    test_async_client_auth, mocker, httpx_mock, mock_get_items_batch, has_permission_true
 ):
     httpx_mock.add_response(
         method='POST',
@@ -285,11 +327,44 @@ async def test_resume_upload_files_success(
     assert res.status_code == 200
 
 
+@pytest.mark.parametrize(
+    'extra_field',
+    [
+        {'destination': 'other_project'},
+        {
+            'object_infos': [
+                {
+                    'item_id': 'test_id',
+                    'object_path': 'test_path',
+                    'resumable_id': 'test_resumable_id',
+                    'bucket': 'other_project',
+                }
+            ]
+        },
+    ],
+)
+async def test_resume_upload_rejects_fields_which_would_be_relayed_unvalidated(
+    test_async_client_auth, httpx_mock, extra_field
+):
+    payload = {
+        'bucket': project_code,
+        'zone': 'gr',
+        'object_infos': [{'item_id': 'test_id', 'object_path': 'test_path', 'resumable_id': 'test_resumable_id'}],
+        **extra_field,
+    }
+    header = {'Authorization': 'fake token'}
+
+    res = await test_async_client_auth.post(test_get_project_resume_api, headers=header, json=payload)
+
+    assert res.status_code == 422
+    assert not httpx_mock.get_requests(url='http://data_upload_gr/v1/files/resumable')
+
+
 # project download test
 
 
 async def test_download_with_403_wrong_permission(
-    test_async_client_auth, mocker, mock_get_item_by_id, httpx_mock, has_permission_false
+    test_async_client_auth, mocker, mock_get_items_batch, httpx_mock, has_permission_false
 ):
     payload = {
         'operator': 'test_user',
@@ -307,7 +382,7 @@ async def test_download_with_403_wrong_permission(
 
 
 async def test_download_with_400_bad_request(
-    test_async_client_auth, mocker, mock_get_item_by_id, httpx_mock, has_permission_true
+    test_async_client_auth, mocker, mock_get_items_batch, httpx_mock, has_permission_true
 ):
     payload = {
         'operator': 'test_user',
@@ -333,7 +408,7 @@ async def test_download_with_400_bad_request(
 
 
 async def test_download_with_200_pass(
-    test_async_client_auth, mocker, mock_get_item_by_id, httpx_mock, has_permission_true
+    test_async_client_auth, mocker, mock_get_items_batch, httpx_mock, has_permission_true
 ):
     payload = {
         'operator': 'test_user',
@@ -650,3 +725,622 @@ async def test_get_project_list_desc_order_by_code_should_return_200(test_async_
     assert res.status_code == 200
     assert len(projects) == len(test_project)
     assert projects == test_project
+
+
+async def test_get_item_in_project_reuses_cached_not_found_result(
+    test_async_client_auth, httpx_mock, item_path_cache, redis
+):
+    param = {
+        'zone': 'gr',
+        'project_code': project_code,
+        'path': 'testuser/new_folder',
+        'item_type': 'folder',
+        'container_type': 'project',
+    }
+    httpx_mock.add_response(method='GET', json={'code': 200, 'result': []})
+    header = {'Authorization': 'fake token'}
+
+    for _ in range(3):
+        res = await test_async_client_auth.get(test_get_project_item_api, headers=header, query_string=param)
+        assert res.json().get('error_msg') == 'Folder not exist'
+
+    assert len(httpx_mock.get_requests()) == 1
+    assert item_path_cache.hits == 2
+
+
+async def test_get_item_in_project_does_not_use_results_cached_for_other_users(
+    test_async_client_auth, httpx_mock, item_path_cache, redis
+):
+    param = {
+        'zone': 'gr',
+        'project_code': project_code,
+        'path': 'testuser/new_folder',
+        'item_type': 'folder',
+        'container_type': 'project',
+    }
+    item_path_cache.set(
+        ItemPathKey(project_code, 'project', 0, 'testuser', 'new_folder', 'folder', 'other_user', 0), []
+    )
+    httpx_mock.add_response(method='GET', json={'code': 200, 'result': []})
+    header = {'Authorization': 'fake token'}
+
+    res = await test_async_client_auth.get(test_get_project_item_api, headers=header, query_string=param)
+
+    assert res.json().get('error_msg') == 'Folder not exist'
+    assert len(httpx_mock.get_requests()) == 1
+
+
+async def test_upload_files_into_project_invalidates_cached_items_in_folder(
+    test_async_client_auth,
+    mocker,
+    mock_get_item_by_id,
+    has_permission_true,
+    httpx_mock,
+    item_path_cache,
+    page_prefetcher,
+    redis,
+):
+    payload = {
+        'operator': 'test_user',
+        'job_type': 'AS_FILE',
+        'zone': 'gr',
+        'current_folder_node': 'fake_file',
+        'parent_folder_id': 'test_id',
+        'data': [{'resumable_filename': 'fake.png', 'resumable_relative_path': 'fake_file'}],
+    }
+    key = ItemPathKey(project_code, 'project', 0, 'testuser/fake_file', 'fake.png', 'file', 'testuser', 0)
+    item_path_cache.set(key, [])
+    page_key = page_prefetcher.make_key(
+        'other_user', 'files', {'container_code': project_code, 'zone': 0, 'page': '1', 'page_size': '10'}
+    )
+    page_prefetcher.set(page_key, {'result': []})
+    mock_response = Response()
+    mock_response.status_code = 200
+    mock_response._content = b'{ "result" : "SUCCESSED" }'
+    mocker.patch('app.routers.v1.api_project.transfer_to_pre', return_value=mock_response)
+    header = {'Authorization': 'fake token'}
+
+    response = await test_async_client_auth.post(test_get_project_file_api, headers=header, json=payload)
+
+    assert response.status_code == 200
+    httpx_mock.add_response(method='GET', json={'code': 200, 'result': [{'name': 'fake.png'}]})
+    param = {
+        'zone': 'gr',
+        'project_code': project_code,
+        'path': 'testuser/fake_file/fake.png',
+        'item_type': 'file',
+        'container_type': 'project',
+    }
+    res = await test_async_client_auth.get(test_get_project_item_api, headers=header, query_string=param)
+    assert res.json()['result'] == {'name': 'fake.png'}
+    assert await get_cache_generations().get(project_code, 0) == 1
+    assert page_prefetcher.get(page_key) is None
+
+
+async def test_check_item_paths_lists_each_parent_folder_once(test_async_client_auth, httpx_mock):
+    url = (
+        'http://metadata_service/v1/items/search/?container_code=test_project&container_type=project'
+        '&recursive=false&zone=0&status=ACTIVE&order=desc&page=0&page_size=500&parent_path={parent_path}'
+    )
+    httpx_mock.add_response(
+        method='GET',
+        url=url.format(parent_path='testuser%2Ffolder'),
+        json={
+            'code': 200,
+            'num_of_pages': 1,
+            'result': [{'id': 'file-id', 'name': 'file1.txt', 'type': 'file', 'status': 'ACTIVE'}],
+        },
+    )
+    httpx_mock.add_response(
+        method='GET', url=url.format(parent_path='testuser'), json={'code': 200, 'num_of_pages': 1, 'result': []}
+    )
+    payload = {'zone': 'gr', 'paths': ['testuser/folder/file1.txt', 'testuser/folder/file2.txt', 'testuser/new']}
+    header = {'Authorization': 'fake token'}
+
+    res = await test_async_client_auth.post(f'{test_get_project_item_api}/bulk', headers=header, json=payload)
+
+    assert res.status_code == 200
+    assert res.json()['result'] == [
+        {'path': 'testuser/folder/file1.txt', 'exists': True, 'id': 'file-id', 'type': 'file', 'status': 'ACTIVE'},
+        {'path': 'testuser/folder/file2.txt', 'exists': False, 'id': None, 'type': None, 'status': None},
+        {'path': 'testuser/new', 'exists': False, 'id': None, 'type': None, 'status': None},
+    ]
+    assert len(httpx_mock.get_requests()) == 2
+
+
+async def test_check_item_paths_returns_400_when_too_many_paths_are_requested(
+    test_async_client_auth, httpx_mock, monkeypatch
+):
+    monkeypatch.setattr(ConfigClass, 'ITEM_PATH_CHECK_MAX_PATHS', 1)
+    payload = {'zone': 'gr', 'paths': ['testuser/file1.txt', 'testuser/file2.txt']}
+    header = {'Authorization': 'fake token'}
+
+    res = await test_async_client_auth.post(f'{test_get_project_item_api}/bulk', headers=header, json=payload)
+
+    assert res.status_code == 400
+    assert httpx_mock.get_requests() == []
+
+
+async def test_get_item_in_all_zones_returns_match_from_zone_where_item_exists(test_async_client_auth, httpx_mock):
+    param = {
+        'zone': 'all',
+        'project_code': project_code,
+        'path': 'testuser/fake_file',
+        'item_type': 'file',
+        'container_type': 'project',
+    }
+    url = (
+        'http://metadata_service/v1/items/search/?container_code=test_project&container_type=project'
+        '&parent_path=testuser&recursive=false&zone={zone}&status=ACTIVE&name=fake_file&type=file'
+    )
+    httpx_mock.add_response(method='GET', url=url.format(zone=0), json={'code': 200, 'result': []})
+    httpx_mock.add_response(
+        method='GET', url=url.format(zone=1), json={'code': 200, 'result': [{'id': 'item-id', 'zone': 1}]}
+    )
+    header = {'Authorization': 'fake token'}
+
+    res = await test_async_client_auth.get(test_get_project_item_api, headers=header, query_string=param)
+
+    assert res.status_code == 200
+    assert res.json()['result'] == {'id': 'item-id', 'zone': 1}
+
+
+async def test_get_item_in_all_zones_returns_greenroom_match_even_when_core_answers_first(
+    test_async_client_auth, httpx_mock
+):
+    param = {
+        'zone': 'all',
+        'project_code': project_code,
+        'path': 'testuser/fake_file',
+        'item_type': 'file',
+        'container_type': 'project',
+    }
+    url = (
+        'http://metadata_service/v1/items/search/?container_code=test_project&container_type=project'
+        '&parent_path=testuser&recursive=false&zone={zone}&status=ACTIVE&name=fake_file&type=file'
+    )
+
+    async def slow_greenroom_search(request):
+        await asyncio.sleep(0.05)
+        return httpx.Response(200, json={'code': 200, 'result': [{'id': 'item-0', 'zone': 0}]})
+
+    httpx_mock.add_callback(slow_greenroom_search, method='GET', url=url.format(zone=0))
+    httpx_mock.add_response(
+        method='GET', url=url.format(zone=1), json={'code': 200, 'result': [{'id': 'item-1', 'zone': 1}]}
+    )
+    header = {'Authorization': 'fake token'}
+
+    res = await test_async_client_auth.get(test_get_project_item_api, headers=header, query_string=param)
+
+    assert res.status_code == 200
+    assert res.json()['result'] == {'id': 'item-0', 'zone': 0}
+
+
+async def test_get_item_in_all_zones_returns_all_matches_when_requested(test_async_client_auth, httpx_mock):
+    param = {
+        'zone': 'all',
+        'project_code': project_code,
+        'path': 'testuser/fake_file',
+        'item_type': 'file',
+        'container_type': 'project',
+        'match': 'all',
+    }
+    url = (
+        'http://metadata_service/v1/items/search/?container_code=test_project&container_type=project'
+        '&parent_path=testuser&recursive=false&zone={zone}&status=ACTIVE&name=fake_file&type=file'
+    )
+    for zone in range(2):
+        httpx_mock.add_response(
+            method='GET',
+            url=url.format(zone=zone),
+            json={'code': 200, 'result': [{'id': f'item-{zone}', 'zone': zone}]},
+        )
+    header = {'Authorization': 'fake token'}
+
+    res = await test_async_client_auth.get(test_get_project_item_api, headers=header, query_string=param)
+
+    assert res.status_code == 200
+    assert res.json()['result'] == [{'id': 'item-0', 'zone': 0}, {'id': 'item-1', 'zone': 1}]
+
+
+async def test_get_item_in_all_zones_returns_500_when_search_fails_and_item_is_not_found(
+    test_async_client_auth, httpx_mock
+):
+    param = {
+        'zone': 'all',
+        'project_code': project_code,
+        'path': 'testuser/fake_file',
+        'item_type': 'file',
+        'container_type': 'project',
+    }
+    url = (
+        'http://metadata_service/v1/items/search/?container_code=test_project&container_type=project'
+        '&parent_path=testuser&recursive=false&zone={zone}&status=ACTIVE&name=fake_file&type=file'
+    )
+    httpx_mock.add_response(method='GET', url=url.format(zone=0), json={'code': 200, 'result': []})
+    httpx_mock.add_response(
+        method='GET', url=url.format(zone=1), status_code=500, json={'code': 500, 'error_msg': 'mock error'}
+    )
+    header = {'Authorization': 'fake token'}
+
+    res = await test_async_client_auth.get(test_get_project_item_api, headers=header, query_string=param)
+
+    assert res.status_code == 500
+    assert res.json()['error_msg'] == 'Error Getting Folder: mock error'
+
+
+async def test_download_relays_request_and_response_bodies_unchanged(
+    test_async_client_auth, mock_get_items_batch, httpx_mock, has_permission_true
+):
+    payload = {
+        'operator': 'test_user',
+        'zone': 'gr',
+        'container_code': project_code,
+        'container_type': 'project',
+        'files': [{'id': 'test_id'}],
+    }
+    upstream_content = b'{"code": 200, "error_msg": "", "result": {"job_id": "job-id"}}'
+    httpx_mock.add_response(
+        method='POST', url=ConfigClass.DOWNLOAD_SERVICE_GREENROOM + '/v2/download/pre/', content=upstream_content
+    )
+    header = {'Authorization': 'fake token'}
+
+    response = await test_async_client_auth.post(test_get_project_file_download_api, headers=header, json=payload)
+
+    assert response.status_code == 200
+    assert response.content == upstream_content
+    upstream_request = httpx_mock.get_request(url=ConfigClass.DOWNLOAD_SERVICE_GREENROOM + '/v2/download/pre/')
+    assert json.loads(upstream_request.content) == payload
+
+
+@pytest.mark.parametrize(
+    'extra_field',
+    [{'destination': 'other_project'}, {'files': [{'id': 'test_id', 'container_code': 'other_project'}]}],
+)
+async def test_download_rejects_fields_which_would_be_relayed_unvalidated(
+    test_async_client_auth, httpx_mock, extra_field
+):
+    payload = {
+        'operator': 'test_user',
+        'zone': 'gr',
+        'container_code': project_code,
+        'container_type': 'project',
+        'files': [{'id': 'test_id'}],
+        **extra_field,
+    }
+    header = {'Authorization': 'fake token'}
+
+    response = await test_async_client_auth.post(test_get_project_file_download_api, headers=header, json=payload)
+
+    assert response.status_code == 422
+    assert not httpx_mock.get_requests(url=ConfigClass.DOWNLOAD_SERVICE_GREENROOM + '/v2/download/pre/')
+
+
+async def test_upload_files_with_respond_async_preference_returns_202_and_job_status(
+    test_async_client_auth, mocker, mock_get_item_by_id, has_permission_true, redis
+):
+    payload = {
+        'operator': 'test_user',
+        'job_type': 'AS_FILE',
+        'zone': 'gr',
+        'current_folder_node': 'folder1',
+        'parent_folder_id': 'test_id',
+        'data': [{'resumable_filename': 'fake.png', 'resumable_relative_path': 'folder1'}],
+    }
+    mock_response = Response()
+    mock_response.status_code = 200
+    mock_response._content = b'{ "result" : "SUCCESSED" }'
+    mocker.patch('app.routers.v1.api_project.transfer_to_pre', return_value=mock_response)
+    header = {'Authorization': 'fake token', 'Prefer': 'respond-async'}
+
+    response = await test_async_client_auth.post(test_get_project_file_api, headers=header, json=payload)
+    job_id = response.json()['result']['job_id']
+    await asyncio.gather(*get_preupload_job_tracker()._tasks)
+    job_response = await test_async_client_auth.get(response.headers['Location'], headers=header)
+
+    assert response.status_code == 202
+    assert response.json()['result']['status'] == 'RUNNING'
+    assert job_response.status_code == 200
+    assert job_response.json()['result']['job_id'] == job_id
+    assert job_response.json()['result']['status'] == 'SUCCEEDED'
+    assert job_response.json()['result']['result'] == 'SUCCESSED'
+
+
+async def test_get_preupload_job_of_another_user_returns_404(test_async_client_auth, redis):
+    tracker = get_preupload_job_tracker()
+    job = {'job_id': 'job-id', 'project_code': project_code, 'username': 'another-user', 'status': 'RUNNING'}
+    await tracker.save(job)
+    header = {'Authorization': 'fake token'}
+
+    response = await test_async_client_auth.get(f'/v1/project/{project_code}/files/jobs/job-id', headers=header)
+
+    assert response.status_code == 404
+    assert response.json()['error_msg'] == 'Pre upload job not found'
+
+
+async def test_get_preupload_job_which_missed_heartbeats_reports_failure(test_async_client_auth, redis):
+    tracker = get_preupload_job_tracker()
+    job = {
+        'job_id': 'job-id',
+        'project_code': project_code,
+        'username': 'testuser',
+        'status': 'RUNNING',
+        'updated_at': time.time() - ConfigClass.PREUPLOAD_JOB_HEARTBEAT_INTERVAL * 3 - 1,
+    }
+    await redis.set(tracker.get_key('job-id'), json.dumps(job))
+    header = {'Authorization': 'fake token'}
+
+    response = await test_async_client_auth.get(f'/v1/project/{project_code}/files/jobs/job-id', headers=header)
+
+    assert response.status_code == 200
+    assert response.json()['result']['status'] == 'FAILED'
+    assert response.json()['result']['code'] == 500
+
+
+async def test_upload_files_with_duplicate_idempotency_key_replays_first_response(
+    test_async_client_auth, mocker, mock_get_item_by_id, has_permission_true, redis
+):
+    payload = {
+        'operator': 'test_user',
+        'job_type': 'AS_FILE',
+        'zone': 'gr',
+        'current_folder_node': 'folder1',
+        'parent_folder_id': 'test_id',
+        'data': [{'resumable_filename': 'fake.png', 'resumable_relative_path': 'folder1'}],
+    }
+    mock_response = Response()
+    mock_response.status_code = 200
+    mock_response._content = b'{ "result" : "SUCCESSED" }'
+    transfer_to_pre = mocker.patch('app.routers.v1.api_project.transfer_to_pre', return_value=mock_response)
+    header = {'Authorization': 'fake token', 'Idempotency-Key': 'upload-key'}
+
+    response = await test_async_client_auth.post(test_get_project_file_api, headers=header, json=payload)
+    retried_response = await test_async_client_auth.post(test_get_project_file_api, headers=header, json=payload)
+
+    assert transfer_to_pre.call_count == 1
+    assert retried_response.status_code == 200
+    assert retried_response.json() == response.json()
+    assert retried_response.headers['Idempotent-Replayed'] == 'true'
+
+
+async def test_batch_upload_checks_each_parent_folder_once_and_returns_result_of_each_job(
+    test_async_client_auth, mocker, mock_get_item_by_id, httpx_mock, has_permission_true, request_memos
+):
+    httpx_mock.add_response(
+        method='GET', url=ConfigClass.METADATA_SERVICE + '/v1/item/missing_id/', json={'code': 404, 'result': {}}
+    )
+    job = {
+        'operator': 'test_user',
+        'job_type': 'AS_FILE',
+        'zone': 'gr',
+        'current_folder_node': 'folder1',
+        'parent_folder_id': 'test_id',
+        'data': [{'resumable_filename': 'fake.png', 'resumable_relative_path': 'folder1'}],
+    }
+    payload = {
+        'zone': 'gr',
+        'jobs': [job, {**job, 'current_folder_node': 'folder2'}, {**job, 'parent_folder_id': 'missing_id'}],
+    }
+    mock_response = Response()
+    mock_response.status_code = 200
+    mock_response._content = b'{ "result" : "SUCCESSED" }'
+    transfer_to_pre = mocker.patch('app.routers.v1.api_project.transfer_to_pre', return_value=mock_response)
+    header = {'Authorization': 'fake token'}
+
+    response = await test_async_client_auth.post(f'{test_get_project_file_api}/batch', headers=header, json=payload)
+
+    assert response.status_code == 200
+    assert response.json()['result'] == [
+        {'code': 200, 'error_msg': '', 'result': 'SUCCESSED'},
+        {'code': 200, 'error_msg': '', 'result': 'SUCCESSED'},
+        {'code': 404, 'error_msg': 'Item not found', 'result': {}},
+    ]
+    assert transfer_to_pre.call_count == 2
+    assert len(httpx_mock.get_requests(url=ConfigClass.METADATA_SERVICE + '/v1/item/test_id/')) == 1
+    assert request_memos[0].saved_calls == 1
+    assert len(httpx_mock.get_requests(method='GET', url=re.compile('^http://auth/v1/authorize.*$'))) == 1
+
+
+async def test_batch_upload_returns_403_for_jobs_without_permission(
+    test_async_client_auth, mocker, mock_get_item_by_id, has_permission_false
+):
+    job = {
+        'operator': 'test_user',
+        'job_type': 'AS_FILE',
+        'zone': 'gr',
+        'current_folder_node': 'folder1',
+        'parent_folder_id': 'test_id',
+        'data': [{'resumable_filename': 'fake.png', 'resumable_relative_path': 'folder1'}],
+    }
+    transfer_to_pre = mocker.patch('app.routers.v1.api_project.transfer_to_pre')
+    header = {'Authorization': 'fake token'}
+
+    response = await test_async_client_auth.post(
+        f'{test_get_project_file_api}/batch', headers=header, json={'zone': 'gr', 'jobs': [job]}
+    )
+
+    assert response.status_code == 200
+    assert response.json()['result'] == [
+        {'code': 403, 'error_msg': f'Unauthorized upload action on project {project_code}', 'result': {}}
+    ]
+    transfer_to_pre.assert_not_called()
+
+
+def mock_items_batch(httpx_mock, item_ids):
+    items = [
+        {
+            'id': item_id,
+            'parent_path': 'testuser',
+            'status': ItemStatus.ACTIVE,
+            'type': 'file',
+            'zone': 0,
+            'name': item_id,
+            'container_code': project_code,
+            'container_type': 'project',
+        }
+        for item_id in item_ids
+    ]
+    httpx_mock.add_response(
+        method='GET',
+        url=ConfigClass.METADATA_SERVICE + '/v1/items/batch/?' + '&'.join(f'ids={item_id}' for item_id in item_ids),
+        json={'code': 200, 'error_msg': '', 'result': items},
+    )
+
+
+async def test_download_fetches_all_items_in_one_batch_query(test_async_client_auth, httpx_mock, has_permission_true):
+    mock_items_batch(httpx_mock, ['file1', 'file2', 'file3'])
+    httpx_mock.add_response(
+        method='POST',
+        url=ConfigClass.DOWNLOAD_SERVICE_GREENROOM + '/v2/download/pre/',
+        json={'code': 200, 'error_msg': '', 'result': {}},
+    )
+    payload = {
+        'operator': 'test_user',
+        'zone': 'gr',
+        'container_code': project_code,
+        'container_type': 'project',
+        'files': [{'id': 'file1'}, {'id': 'file2'}, {'id': 'file3'}],
+    }
+    header = {'Authorization': 'fake token'}
+
+    response = await test_async_client_auth.post(test_get_project_file_download_api, headers=header, json=payload)
+
+    assert response.status_code == 200
+    assert not httpx_mock.get_requests(url=re.compile(f'^{ConfigClass.METADATA_SERVICE}/v1/item/.*$'))
+
+
+async def test_download_returns_403_when_item_is_not_found(test_async_client_auth, httpx_mock):
+    httpx_mock.add_response(
+        method='GET',
+        url=ConfigClass.METADATA_SERVICE + '/v1/items/batch/?ids=test_id',
+        json={'code': 200, 'error_msg': '', 'result': []},
+    )
+    payload = {
+        'operator': 'test_user',
+        'zone': 'gr',
+        'container_code': project_code,
+        'container_type': 'project',
+        'files': [{'id': 'test_id'}],
+    }
+    header = {'Authorization': 'fake token'}
+
+    response = await test_async_client_auth.post(test_get_project_file_download_api, headers=header, json=payload)
+
+    assert response.status_code == 403
+
+
+async def test_stream_download_checks_and_sends_files_in_chunks_and_merges_jobs(
+    test_async_client_auth, monkeypatch, httpx_mock, has_permission_true
+):
+    monkeypatch.setattr(ConfigClass, 'PREDOWNLOAD_CHUNK_SIZE', 2)
+    mock_items_batch(httpx_mock, ['file1', 'file2'])
+    mock_items_batch(httpx_mock, ['file3'])
+    httpx_mock.add_callback(
+        lambda request: httpx.Response(
+            200,
+            json={
+                'code': 200,
+                'error_msg': '',
+                'result': {'job_id': f'job-{len(json.loads(request.content)["files"])}'},
+            },
+        ),
+        method='POST',
+        url=ConfigClass.DOWNLOAD_SERVICE_GREENROOM + '/v2/download/pre/',
+    )
+    params = {'zone': 'gr', 'operator': 'testuser', 'container_code': project_code, 'container_type': 'project'}
+    header = {'Authorization': 'fake token', 'Content-Type': 'application/x-ndjson'}
+    body = b'{"id": "file1"}\n{"id": "file2"}\n{"id": "file3"}\n'
+
+    response = await test_async_client_auth.post(
+        f'{test_get_project_file_download_api}/stream', headers=header, query_string=params, data=body
+    )
+
+    assert response.status_code == 200
+    assert response.json()['result'] == {'jobs': [{'job_id': 'job-2'}, {'job_id': 'job-1'}], 'failed_chunks': []}
+    download_requests = httpx_mock.get_requests(url=ConfigClass.DOWNLOAD_SERVICE_GREENROOM + '/v2/download/pre/')
+    assert [json.loads(request.content)['files'] for request in download_requests] == [
+        [{'id': 'file1'}, {'id': 'file2'}],
+        [{'id': 'file3'}],
+    ]
+    assert json.loads(download_requests[0].content)['operator'] == 'testuser'
+
+
+async def test_stream_download_returns_403_without_permission(test_async_client_auth, httpx_mock, has_permission_false):
+    mock_items_batch(httpx_mock, ['file1'])
+    params = {'zone': 'gr', 'operator': 'testuser', 'container_code': project_code, 'container_type': 'project'}
+    header = {'Authorization': 'fake token', 'Content-Type': 'application/x-ndjson'}
+
+    response = await test_async_client_auth.post(
+        f'{test_get_project_file_download_api}/stream', headers=header, query_string=params, data=b'{"id": "file1"}\n'
+    )
+
+    assert response.status_code == 403
+    assert response.json()['error_msg'] == f'Unauthorized download action on project {project_code}'
+
+
+async def test_stream_download_does_not_create_jobs_when_later_chunk_is_not_permitted(
+    test_async_client_auth, monkeypatch, httpx_mock, mocker
+):
+    monkeypatch.setattr(ConfigClass, 'PREDOWNLOAD_CHUNK_SIZE', 1)
+    mocker.patch(
+        'app.components.permission.evaluator.FilePermissionEvaluator.has_permissions',
+        side_effect=lambda items, operation: [item['id'] != 'file2' for item in items],
+    )
+    mock_items_batch(httpx_mock, ['file1'])
+    mock_items_batch(httpx_mock, ['file2'])
+    params = {'zone': 'gr', 'operator': 'testuser', 'container_code': project_code, 'container_type': 'project'}
+    header = {'Authorization': 'fake token', 'Content-Type': 'application/x-ndjson'}
+    body = b'{"id": "file1"}\n{"id": "file2"}\n'
+
+    response = await test_async_client_auth.post(
+        f'{test_get_project_file_download_api}/stream', headers=header, query_string=params, data=body
+    )
+
+    assert response.status_code == 403
+    assert not httpx_mock.get_requests(url=ConfigClass.DOWNLOAD_SERVICE_GREENROOM + '/v2/download/pre/')
+
+
+async def test_stream_download_returns_400_for_invalid_body(test_async_client_auth):
+    params = {'zone': 'gr', 'operator': 'testuser', 'container_code': project_code, 'container_type': 'project'}
+    header = {'Authorization': 'fake token', 'Content-Type': 'application/x-ndjson'}
+
+    response = await test_async_client_auth.post(
+        f'{test_get_project_file_download_api}/stream', headers=header, query_string=params, data=b'not json\n'
+    )
+
+    assert response.status_code == 400
+    assert response.json()['error_msg'].startswith('Invalid file list')
+
+
+async def test_stream_download_returns_400_when_stream_has_too_many_files(
+    test_async_client_auth, monkeypatch, httpx_mock
+):
+    monkeypatch.setattr(ConfigClass, 'PREDOWNLOAD_CHUNK_SIZE', 1)
+    monkeypatch.setattr(ConfigClass, 'PREDOWNLOAD_MAX_FILES', 1)
+    params = {'zone': 'gr', 'operator': 'testuser', 'container_code': project_code, 'container_type': 'project'}
+    header = {'Authorization': 'fake token', 'Content-Type': 'application/x-ndjson'}
+    body = b'{"id": "file1"}\n{"id": "file2"}\n'
+
+    response = await test_async_client_auth.post(
+        f'{test_get_project_file_download_api}/stream', headers=header, query_string=params, data=body
+    )
+
+    assert response.status_code == 400
+    assert response.json()['error_msg'] == 'Invalid file list: too many files, at most 1 are allowed'
+    assert not httpx_mock.get_requests(url=ConfigClass.DOWNLOAD_SERVICE_GREENROOM + '/v2/download/pre/')
+
+
+async def test_get_project_list_with_matching_if_none_match_returns_304(test_async_client_auth, mocker):
+    mocker.patch('app.routers.v1.api_project.get_user_projects', return_value=['project1', 'project2'])
+    header = {'Authorization': 'fake token'}
+
+    response = await test_async_client_auth.get(test_project_api, headers=header)
+    etag = response.headers['ETag']
+    not_modified_response = await test_async_client_auth.get(
+        test_project_api, headers={**header, 'If-None-Match': etag}
+    )
+
+    assert response.status_code == 200
+    assert not_modified_response.status_code == 304
+    assert not_modified_response.content == b''
+    assert not_modified_response.headers['ETag'] == etag